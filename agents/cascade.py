@@ -0,0 +1,184 @@
+# File: agents/cascade.py
+
+"""
+Model cascade for the Solver and Verifier agents.
+
+Most JEE-style problems are easy enough for a small, fast model. The cascade
+solves and verifies with the first tier in Config.AGENT_MODEL_TIERS and only
+escalates to the next tier when:
+- the solver hit its fallback path (no usable answer/steps), or
+- the verifier ran and its confidence is below Config.VERIFIER_CONFIDENCE_THRESHOLD
+
+For probability problems, a Monte Carlo simulation (core/probability_check.py)
+is tried before the verifier. It only recognises single-condition events (see
+that module), and when it confirms the answer the verifier LLM is skipped. If it
+contradicts the answer, the verifier always runs (even when the profile would
+skip it), and the discrepancy is added to its issues.
+
+Neither the verifier nor a further escalation starts once the request's budget
+(core/deadline.py) is exhausted.
+
+Escalation rate and per-tier latency are kept in `cascade_stats`.
+"""
+
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from core.config import Config
+from core.deadline import BudgetExhausted, current_budget
+from core.probability_check import check_probability_answer, probability_check_stats
+from agents.solver_agent import solve_problem, solver_is_certain
+from agents.verifier_agent import verify_solution
+
+
+class CascadeStats:
+    """Thread-safe counters for escalations and per-tier latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.escalated_requests = 0
+        self.calls: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record_call(self, agent: str, tier: str, seconds: float):
+        with self._lock:
+            entry = self.calls.setdefault((agent, tier), {"calls": 0, "total_seconds": 0.0})
+            entry["calls"] += 1
+            entry["total_seconds"] += seconds
+
+    def record_request(self, escalated: bool):
+        with self._lock:
+            self.requests += 1
+            self.escalated_requests += int(escalated)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "escalated_requests": self.escalated_requests,
+                "escalation_rate": round(self.escalated_requests / self.requests, 3) if self.requests else 0.0,
+                "tiers": {
+                    f"{agent}:{tier}": {
+                        "model": Config.MODEL_TIERS[tier],
+                        "calls": entry["calls"],
+                        "avg_latency_s": round(entry["total_seconds"] / entry["calls"], 3),
+                    }
+                    for (agent, tier), entry in self.calls.items()
+                },
+                "monte_carlo": probability_check_stats.report(),
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+def _tier_name(agent: str, level: int) -> str:
+    tiers = Config.AGENT_MODEL_TIERS[agent]
+    return tiers[min(level, len(tiers) - 1)]
+
+
+def monte_carlo_verification(simulation: Dict) -> Dict:
+    """Verifier-shaped result for an answer confirmed by core/probability_check.py."""
+    return {
+        "is_correct": True,
+        "confidence": Config.PROB_CHECK_CONFIDENCE,
+        "issues": [],
+        "suggested_fix": "",
+        "checked_by": "monte_carlo",
+        "monte_carlo": simulation,
+    }
+
+
+def solve_and_verify(
+    problem_text: str,
+    retrieved: List[Dict],
+    required_tools: List[str],
+    topic: str = None,
+    verify: str = "always",  # "always" | "on_low_certainty" (see Config.PIPELINE_PROFILES)
+) -> Tuple[Dict, Dict, Dict]:
+    """
+    Run solver (+ verifier) from the cheapest tier upwards.
+
+    Returns (solution, verification, cascade_info). `verification` is {} when the
+    profile skipped the verifier. cascade_info records the tiers used per attempt.
+    """
+    levels = len(Config.AGENT_MODEL_TIERS["solver"])
+    attempts = []
+    solution, verification = {}, {}
+    budget_exhausted = False
+
+    for level in range(levels):
+        solver_tier = _tier_name("solver", level)
+        start = time.perf_counter()
+        try:
+            solution = solve_problem(
+                problem_text=problem_text,
+                retrieved=retrieved,
+                required_tools=required_tools,
+                topic=topic,
+                level=level,
+            )
+        except BudgetExhausted:
+            if not attempts:
+                raise
+            # An escalation ran out of time: keep the previous tier's answer
+            budget_exhausted = True
+            break
+        cascade_stats.record_call("solver", solver_tier, time.perf_counter() - start)
+        attempt = {"solver": solver_tier}
+
+        certain = solver_is_certain(solution)
+        verification = {}
+        budget = current_budget()
+        if budget is not None and budget.exhausted:
+            # Out of time: return the unverified answer rather than start another call
+            attempts.append(attempt)
+            budget_exhausted = True
+            break
+        simulation = None
+        if certain and topic == "probability" and Config.PROB_CHECK_ENABLED:
+            simulation = check_probability_answer(problem_text, solution.get("answer", ""))
+            if simulation is not None:
+                attempt["monte_carlo"] = "agrees" if simulation["agrees"] else "disagrees"
+
+        if simulation is not None and simulation["agrees"]:
+            # A deterministic check passed; no verifier LLM call needed
+            verification = monte_carlo_verification(simulation)
+            attempt["confidence"] = verification["confidence"]
+        elif verify == "always" or not certain or simulation is not None:
+            verifier_tier = _tier_name("verifier", level)
+            start = time.perf_counter()
+            try:
+                verification = verify_solution(problem_text, solution, level=level)
+            except BudgetExhausted:
+                # Ran out of time mid-verification: keep the unverified answer
+                attempts.append(attempt)
+                budget_exhausted = True
+                break
+            cascade_stats.record_call("verifier", verifier_tier, time.perf_counter() - start)
+            if simulation is not None:
+                verification = {
+                    **verification,
+                    "issues": list(verification.get("issues", [])) + [
+                        f"Simulation ({simulation['scenario']}, {simulation['trials']:,} trials) estimates "
+                        f"{simulation['estimate']:.4f}, outside the answer's tolerance "
+                        f"[{simulation['interval'][0]:.4f}, {simulation['interval'][1]:.4f}]"
+                    ],
+                    "monte_carlo": simulation,
+                }
+            attempt["verifier"] = verifier_tier
+            attempt["confidence"] = verification.get("confidence")
+        attempts.append(attempt)
+
+        low_confidence = bool(verification) and verification.get("confidence", 0.0) < Config.VERIFIER_CONFIDENCE_THRESHOLD
+        if certain and not low_confidence:
+            break
+        budget = current_budget()
+        if budget is not None and budget.exhausted:
+            budget_exhausted = True
+            break
+
+    escalated = len(attempts) > 1
+    cascade_stats.record_request(escalated)
+    return solution, verification, {"attempts": attempts, "escalated": escalated, "budget_exhausted": budget_exhausted}
@@ -0,0 +1,196 @@
+# File: agents/deferred_explainer.py
+
+"""
+Deferred explanation generation.
+
+explain_solution() is the slowest LLM call in the pipeline and many clients
+only read the answer. run_pipeline registers every solved problem here and
+returns a `solution_id` straight away; the explanation is then produced either
+in the background (Config.EXPLANATION_MODE = "background") or on the first
+GET /explanations/{id} ("on_demand").
+
+- Concurrent requests for the same id within one API process share one
+  in-flight generation (coalescing). Coalescing is per process: two workers
+  asked for the same pending id may each generate it, and the last write wins
+- Finished explanations are cached in memory (LRU) and on disk under
+  Config.EXPLANATIONS_DIR, so any API worker can serve one once it is ready
+- A failed generation (explain_solution(..., raise_on_error=True) raises) is
+  never stored as the explanation: the record keeps the error, and the next
+  request retries, up to Config.EXPLANATION_MAX_ATTEMPTS
+- Entries older than Config.EXPLANATION_TTL_SECONDS are pruned
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from core.config import Config
+from agents.explainer_agent import explain_solution
+
+
+class ExplanationFailed(Exception):
+    """Generation failed; `retryable` is False once EXPLANATION_MAX_ATTEMPTS is used up."""
+
+    def __init__(self, solution_id: str, error: str, attempts: int):
+        super().__init__(f"Explanation for {solution_id} failed after {attempts} attempt(s): {error}")
+        self.error = error
+        self.attempts = attempts
+        self.retryable = attempts < Config.EXPLANATION_MAX_ATTEMPTS
+
+
+class ExplanationStore:
+    """Registry of solved problems and their (possibly pending) explanations."""
+
+    def __init__(self):
+        self.directory = Config.EXPLANATIONS_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.EXPLANATION_WORKERS, thread_name_prefix="explainer"
+        )
+        self._last_prune = 0.0
+
+    # -----------------------------
+    # Disk records
+    # -----------------------------
+    def _path(self, solution_id: str):
+        return self.directory / f"{solution_id}.json"
+
+    def _read(self, solution_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(solution_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, solution_id: str, record: Dict):
+        tmp_path = self._path(solution_id).with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._path(solution_id))
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for path in self.directory.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime > Config.EXPLANATION_TTL_SECONDS:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _remember(self, solution_id: str, explanation: str):
+        with self._lock:
+            self._cache[solution_id] = explanation
+            self._cache.move_to_end(solution_id)
+            while len(self._cache) > Config.EXPLANATION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def register(self, problem_text: str, solution: Dict) -> str:
+        """Record a solved problem and return its solution_id."""
+        solution_id = uuid.uuid4().hex
+        self._write(solution_id, {
+            "problem_text": problem_text,
+            "solution": {"answer": solution.get("answer"), "steps": solution.get("steps", [])},
+            "explanation": None,
+            "created": time.time(),
+        })
+        self._prune()
+        return solution_id
+
+    def exists(self, solution_id: str) -> bool:
+        return solution_id in self._cache or self._path(solution_id).exists()
+
+    def peek(self, solution_id: str) -> Optional[str]:
+        """Cached explanation if already generated, else None (never triggers generation)."""
+        with self._lock:
+            if solution_id in self._cache:
+                self._cache.move_to_end(solution_id)
+                return self._cache[solution_id]
+        record = self._read(solution_id)
+        if record and record.get("explanation"):
+            self._remember(solution_id, record["explanation"])
+            return record["explanation"]
+        return None
+
+    def _generate(self, solution_id: str) -> str:
+        record = self._read(solution_id)
+        if record is None:
+            raise KeyError(solution_id)
+        if record.get("explanation"):
+            return record["explanation"]
+        attempts = record.get("failed_attempts", 0)
+        if attempts >= Config.EXPLANATION_MAX_ATTEMPTS:
+            raise ExplanationFailed(solution_id, record.get("error") or "unknown error", attempts)
+
+        try:
+            explanation = explain_solution(record["problem_text"], record["solution"], raise_on_error=True)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            record["failed_attempts"] = attempts + 1
+            self._write(solution_id, record)
+            raise ExplanationFailed(solution_id, record["error"], record["failed_attempts"])
+
+        record["explanation"] = explanation
+        record.pop("error", None)
+        self._write(solution_id, record)
+        self._remember(solution_id, explanation)
+        return explanation
+
+    def schedule(self, solution_id: str) -> Future:
+        """Start (or join) generation for this id; concurrent callers share one future."""
+        with self._lock:
+            future = self._inflight.get(solution_id)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._generate, solution_id)
+            self._inflight[solution_id] = future
+
+        def done(_):
+            with self._lock:
+                self._inflight.pop(solution_id, None)
+
+        future.add_done_callback(done)
+        return future
+
+    def failure(self, solution_id: str) -> Optional[Dict]:
+        """{"error", "attempts", "retryable"} if the last generation failed and none is running."""
+        with self._lock:
+            if solution_id in self._inflight:
+                return None
+        record = self._read(solution_id)
+        if not record or record.get("explanation") or not record.get("failed_attempts"):
+            return None
+        return {
+            "error": record.get("error"),
+            "attempts": record["failed_attempts"],
+            "retryable": record["failed_attempts"] < Config.EXPLANATION_MAX_ATTEMPTS,
+        }
+
+    def get(self, solution_id: str, timeout: float = None) -> str:
+        """
+        Return the explanation, generating it (coalesced) if needed.
+        Raises KeyError if unknown, ExplanationFailed if generation failed.
+        """
+        cached = self.peek(solution_id)
+        if cached is not None:
+            return cached
+        if not self.exists(solution_id):
+            raise KeyError(solution_id)
+        return self.schedule(solution_id).result(timeout=timeout)
+
+
+# Process-wide store used by run_pipeline and the /explanations endpoint
+explanation_store = ExplanationStore()
@@ -11,35 +11,46 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
 from core.config import Config
+from core.deadline import BudgetExhausted
+from core.resilience import resilient_call
 from core.prompts import EXPLAINER_PROMPT
 
 # Shared LLM (slightly higher temperature for more engaging explanations)
 llm = ChatGroq(
     api_key=Config.GROQ_API_KEY,
-    model_name=Config.LLM_MODEL,
+    model_name=Config.model_for("explainer"),
     temperature=0.4,  # Slightly higher for natural, engaging tone
     max_tokens=Config.LLM_MAX_TOKENS,
+    timeout=Config.AGENT_RESILIENCE["explainer"]["timeout"],
+    max_retries=0,  # Retries and hedging are handled by core/resilience.py
 )
 
 # Explainer chain (no output parser needed – free-form text output)
 explainer_chain = EXPLAINER_PROMPT | llm
 
-
 def explain_solution(
     problem_text: str,
     solution: dict,  # From solver_agent: {"answer": ..., "steps": [...]}
+    raise_on_error: bool = False,
 ) -> str:
     """
     Run the Explainer Agent.
 
     Returns a string with the full student-friendly explanation.
     Includes boxed final answer.
+
+    If the LLM call fails, returns a fallback text built from the solver steps,
+    or re-raises the error with raise_on_error=True (used by agents/deferred_explainer.py,
+    which must not store the fallback as a finished explanation).
     """
     final_answer = solution.get("answer", "No answer provided")
     steps_str = "\n".join(solution.get("steps", ["No steps available"]))
 
     try:
-        response = explainer_chain.invoke(
+        response = resilient_call(
+            "explainer",
+            Config.model_for("explainer"),
+            explainer_chain.invoke,
             {
                 "problem_text": problem_text,
                 "solution_steps": steps_str,
@@ -55,7 +66,11 @@ def explain_solution(
 
         return explanation
 
+    except BudgetExhausted:
+        raise
     except Exception as e:
+        if raise_on_error:
+            raise
         # Fallback explanation
         return f"""
 **Problem:** {problem_text}
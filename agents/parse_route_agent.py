@@ -0,0 +1,83 @@
+# File: agents/parse_route_agent.py
+
+"""
+Fused Parser + Router Agent: one LLM round-trip instead of two.
+
+The router only re-reads the parser's JSON to confirm the topic and pick tools,
+so both structures can be produced by a single call (PARSE_ROUTE_PROMPT).
+Validation and fallbacks are shared with parser_agent / router_agent, so the
+outputs are interchangeable with the two-call path.
+
+Enabled with Config.PARSE_ROUTE_MODE = "fused".
+"""
+
+from typing import Dict, Tuple
+
+from langchain_groq import ChatGroq
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.exceptions import OutputParserException
+
+from core.config import Config
+from core.deadline import BudgetExhausted
+from core.resilience import resilient_call
+from core.prompts import PARSE_ROUTE_PROMPT
+from agents.parser_agent import validate_parsed_output, parser_fallback
+from agents.router_agent import validate_routing_output, router_fallback
+
+# Initialize LLM
+llm = ChatGroq(
+    api_key=Config.GROQ_API_KEY,
+    model_name=Config.model_for("parser"),
+    temperature=Config.LLM_TEMPERATURE,
+    max_tokens=Config.LLM_MAX_TOKENS,
+    timeout=Config.AGENT_RESILIENCE["parser"]["timeout"],
+    max_retries=0,  # Retries and hedging are handled by core/resilience.py
+)
+
+# JSON parser for strict structured output
+json_parser = JsonOutputParser()
+
+# Fused chain: prompt → LLM → JSON parse
+parse_route_chain = PARSE_ROUTE_PROMPT | llm | json_parser
+
+
+def parse_and_route(raw_text: str) -> Tuple[Dict[str, any], Dict[str, any]]:
+    """
+    Run the fused agent on raw extracted text.
+
+    Returns (parsed, routing) with the same shapes as parse_problem() and route_problem().
+    If the parsed part is unusable, both fall back exactly as the two agents would;
+    if only the routing part is unusable, routing falls back based on the parsed topic.
+    """
+    try:
+        output = resilient_call("parser", Config.model_for("parser"), parse_route_chain.invoke, {"raw_text": raw_text})
+        if not isinstance(output, dict) or "parsed" not in output:
+            raise ValueError("Missing key in parse+route output: parsed")
+        parsed = validate_parsed_output(output["parsed"])
+
+    except BudgetExhausted:
+        raise
+    except OutputParserException as e:
+        parsed = parser_fallback(
+            raw_text,
+            f"Parser failed to produce valid output: {str(e)}. Please review the problem statement."
+        )
+        return parsed, router_fallback(parsed, f"Router parsing failed: {str(e)}. Using defaults.")
+    except Exception as e:
+        parsed = parser_fallback(raw_text, f"Unexpected error in parsing: {str(e)}")
+        return parsed, router_fallback(parsed, f"Unexpected error in routing: {str(e)}")
+
+    try:
+        routing = validate_routing_output(output.get("routing") or {})
+    except Exception as e:
+        routing = router_fallback(parsed, f"Unexpected error in routing: {str(e)}")
+
+    return parsed, routing
+
+
+# Example usage (for local testing)
+if __name__ == "__main__":
+    sample_raw = "Find the probability that when a fair coin is tossed three times, we get exactly two heads."
+    parsed, routing = parse_and_route(sample_raw)
+    print(parsed)
+    print(routing)
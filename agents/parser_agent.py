@@ -14,14 +14,18 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
 
 from core.config import Config
+from core.deadline import BudgetExhausted
+from core.resilience import resilient_call
 from core.prompts import PARSER_PROMPT
 
 # Initialize LLM
 llm = ChatGroq(
     api_key=Config.GROQ_API_KEY,
-    model_name=Config.LLM_MODEL,
+    model_name=Config.model_for("parser"),
     temperature=Config.LLM_TEMPERATURE,
     max_tokens=Config.LLM_MAX_TOKENS,
+    timeout=Config.AGENT_RESILIENCE["parser"]["timeout"],
+    max_retries=0,  # Retries and hedging are handled by core/resilience.py
 )
 
 # JSON parser for strict structured output
@@ -30,6 +34,46 @@ json_parser = JsonOutputParser()
 # Parser chain: prompt → LLM → JSON parse
 parser_chain = PARSER_PROMPT | llm | json_parser
 
+PARSER_REQUIRED_KEYS = ["problem_text", "topic", "variables", "constraints", "needs_clarification", "clarification_needed"]
+
+
+def validate_parsed_output(structured_output: Dict) -> Dict[str, any]:
+    """
+    Validate and normalize a parser JSON object (shared with the fused parse+route agent).
+    Raises ValueError if required keys are missing.
+    """
+    # Validate required keys and types
+    for key in PARSER_REQUIRED_KEYS:
+        if key not in structured_output:
+            raise ValueError(f"Missing key in parser output: {key}")
+
+    # Ensure topic is supported
+    if structured_output["topic"] not in Config.SUPPORTED_TOPICS:
+        # Fallback to most likely or trigger clarification
+        structured_output["topic"] = "algebra"  # default fallback
+        structured_output["needs_clarification"] = True
+        structured_output["clarification_needed"] = f"Topic '{structured_output['topic']}' not recognized. Classified as algebra."
+
+    # Ensure types
+    structured_output["variables"] = list(structured_output.get("variables", []))
+    structured_output["constraints"] = list(structured_output.get("constraints", []))
+    structured_output["needs_clarification"] = bool(structured_output.get("needs_clarification", False))
+
+    return structured_output
+
+
+def parser_fallback(raw_text: str, message: str) -> Dict[str, any]:
+    """Safe parser output that routes the problem to HITL clarification."""
+    return {
+        "problem_text": raw_text.strip(),
+        "topic": "unknown",
+        "variables": [],
+        "constraints": [],
+        "needs_clarification": True,
+        "clarification_needed": message
+    }
+
+
 def parse_problem(raw_text: str) -> Dict[str, any]:
     """
     Run the Parser Agent on raw extracted text.
@@ -38,48 +82,20 @@ def parse_problem(raw_text: str) -> Dict[str, any]:
     Raises exception if JSON parsing fails (can be caught in app for HITL).
     """
     try:
-        structured_output = parser_chain.invoke({"raw_text": raw_text})
-        
-        # Validate required keys and types
-        required_keys = ["problem_text", "topic", "variables", "constraints", "needs_clarification", "clarification_needed"]
-        for key in required_keys:
-            if key not in structured_output:
-                raise ValueError(f"Missing key in parser output: {key}")
-        
-        # Ensure topic is supported
-        if structured_output["topic"] not in Config.SUPPORTED_TOPICS:
-            # Fallback to most likely or trigger clarification
-            structured_output["topic"] = "algebra"  # default fallback
-            structured_output["needs_clarification"] = True
-            structured_output["clarification_needed"] = f"Topic '{structured_output['topic']}' not recognized. Classified as algebra."
-        
-        # Ensure types
-        structured_output["variables"] = list(structured_output.get("variables", []))
-        structured_output["constraints"] = list(structured_output.get("constraints", []))
-        structured_output["needs_clarification"] = bool(structured_output.get("needs_clarification", False))
-        
-        return structured_output
+        structured_output = resilient_call("parser", Config.model_for("parser"), parser_chain.invoke, {"raw_text": raw_text})
+        return validate_parsed_output(structured_output)
     
     except OutputParserException as e:
         # If JSON parsing fails → treat as ambiguity → HITL
-        return {
-            "problem_text": raw_text.strip(),
-            "topic": "unknown",
-            "variables": [],
-            "constraints": [],
-            "needs_clarification": True,
-            "clarification_needed": f"Parser failed to produce valid output: {str(e)}. Please review the problem statement."
-        }
+        return parser_fallback(
+            raw_text,
+            f"Parser failed to produce valid output: {str(e)}. Please review the problem statement."
+        )
+    except BudgetExhausted:
+        raise
     except Exception as e:
         # General fallback
-        return {
-            "problem_text": raw_text.strip(),
-            "topic": "unknown",
-            "variables": [],
-            "constraints": [],
-            "needs_clarification": True,
-            "clarification_needed": f"Unexpected error in parsing: {str(e)}"
-        }
+        return parser_fallback(raw_text, f"Unexpected error in parsing: {str(e)}")
 
 # Example usage (for local testing)
 if __name__ == "__main__":
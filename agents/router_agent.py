@@ -18,14 +18,18 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
 
 from core.config import Config
+from core.deadline import BudgetExhausted
+from core.resilience import resilient_call
 from core.prompts import ROUTER_PROMPT
 
 # Reuse the same LLM instance (or create new – but consistent)
 llm = ChatGroq(
     api_key=Config.GROQ_API_KEY,
-    model_name=Config.LLM_MODEL,
+    model_name=Config.model_for("router"),
     temperature=Config.LLM_TEMPERATURE,
     max_tokens=Config.LLM_MAX_TOKENS,
+    timeout=Config.AGENT_RESILIENCE["router"]["timeout"],
+    max_retries=0,  # Retries and hedging are handled by core/resilience.py
 )
 
 # JSON parser for strict structured output
@@ -34,6 +38,60 @@ json_parser = JsonOutputParser()
 # Router chain: prompt → LLM → JSON parse
 router_chain = ROUTER_PROMPT | llm | json_parser
 
+ROUTER_REQUIRED_KEYS = ["topic", "required_tools", "rag_depth"]
+KNOWN_TOOLS = ["sympy_calculator", "linear_algebra_calculator"]
+
+
+def validate_routing_output(routing_output: Dict) -> Dict[str, any]:
+    """
+    Validate and normalize a router JSON object (shared with the fused parse+route agent).
+    Raises ValueError if required keys are missing.
+    """
+    # Validate required keys
+    for key in ROUTER_REQUIRED_KEYS:
+        if key not in routing_output:
+            raise ValueError(f"Missing key in router output: {key}")
+
+    # Ensure topic is supported – if not, fallback
+    if routing_output["topic"] not in Config.SUPPORTED_TOPICS:
+        routing_output["topic"] = "algebra"  # safe default
+
+    # Normalize tools
+    routing_output["required_tools"] = list(set(routing_output.get("required_tools", [])))
+    # Ensure only known tools
+    routing_output["required_tools"] = [
+        t for t in routing_output["required_tools"] if t in KNOWN_TOOLS
+    ]
+    # Matrix problems get the linear-algebra tool whenever the router asked for any tool
+    if (
+        routing_output["topic"] == "linear_algebra"
+        and routing_output["required_tools"]
+        and "linear_algebra_calculator" not in routing_output["required_tools"]
+    ):
+        routing_output["required_tools"].append("linear_algebra_calculator")
+
+    # Validate rag_depth
+    valid_rag_depths = ["deep", "shallow", "none"]
+    if routing_output["rag_depth"] not in valid_rag_depths:
+        routing_output["rag_depth"] = "shallow"  # default
+
+    return routing_output
+
+
+def router_fallback(structured_problem: Dict, message: str) -> Dict[str, any]:
+    """Safe routing defaults derived from the parsed topic."""
+    topic = structured_problem.get("topic", "algebra")
+    required_tools = ["sympy_calculator"] if topic in ["algebra", "calculus", "linear_algebra"] else []
+    if topic == "linear_algebra":
+        required_tools.append("linear_algebra_calculator")
+    return {
+        "topic": topic,
+        "required_tools": required_tools,
+        "rag_depth": "shallow",
+        "error": message
+    }
+
+
 def route_problem(structured_problem: Dict) -> Dict[str, any]:
     """
     Run the Router Agent on the structured output from Parser Agent.
@@ -43,7 +101,7 @@ def route_problem(structured_problem: Dict) -> Dict[str, any]:
     Returns:
     {
         "topic": str,                          # Confirmed topic (must be in SUPPORTED_TOPICS)
-        "required_tools": list[str],           # e.g., ["sympy_calculator"] or []
+        "required_tools": list[str],           # e.g., ["sympy_calculator"], ["linear_algebra_calculator"] or []
         "rag_depth": "deep" | "shallow" | "none"
     }
     
@@ -54,49 +112,17 @@ def route_problem(structured_problem: Dict) -> Dict[str, any]:
         import json
         structured_json = json.dumps(structured_problem, indent=2)
         
-        routing_output = router_chain.invoke({"structured_json": structured_json})
-        
-        # Validate required keys
-        required_keys = ["topic", "required_tools", "rag_depth"]
-        for key in required_keys:
-            if key not in routing_output:
-                raise ValueError(f"Missing key in router output: {key}")
-        
-        # Ensure topic is supported – if not, fallback
-        if routing_output["topic"] not in Config.SUPPORTED_TOPICS:
-            routing_output["topic"] = "algebra"  # safe default
-        
-        # Normalize tools
-        routing_output["required_tools"] = list(set(routing_output.get("required_tools", [])))
-        # Ensure only known tools (currently only sympy_calculator)
-        known_tools = ["sympy_calculator"]
-        routing_output["required_tools"] = [
-            t for t in routing_output["required_tools"] if t in known_tools
-        ]
-        
-        # Validate rag_depth
-        valid_rag_depths = ["deep", "shallow", "none"]
-        if routing_output["rag_depth"] not in valid_rag_depths:
-            routing_output["rag_depth"] = "shallow"  # default
-        
-        return routing_output
+        routing_output = resilient_call("router", Config.model_for("router"), router_chain.invoke, {"structured_json": structured_json})
+        return validate_routing_output(routing_output)
     
     except OutputParserException as e:
         # Fallback on parsing error
-        return {
-            "topic": structured_problem.get("topic", "algebra"),
-            "required_tools": ["sympy_calculator"] if structured_problem.get("topic") in ["algebra", "calculus", "linear_algebra"] else [],
-            "rag_depth": "shallow",
-            "error": f"Router parsing failed: {str(e)}. Using defaults."
-        }
+        return router_fallback(structured_problem, f"Router parsing failed: {str(e)}. Using defaults.")
+    except BudgetExhausted:
+        raise
     except Exception as e:
         # General fallback
-        return {
-            "topic": structured_problem.get("topic", "algebra"),
-            "required_tools": ["sympy_calculator"] if structured_problem.get("topic") in ["algebra", "calculus", "linear_algebra"] else [],
-            "rag_depth": "shallow",
-            "error": f"Unexpected error in routing: {str(e)}"
-        }
+        return router_fallback(structured_problem, f"Unexpected error in routing: {str(e)}")
 
 # Example usage (for local testing)
 if __name__ == "__main__":
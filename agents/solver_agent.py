@@ -1,23 +1,35 @@
 # agents/solver_agent.py (simplified & robust for 70B models)
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_groq import ChatGroq
 from core.config import Config
+from core.resilience import resilient_call
+from core.deadline import BudgetCallback, BudgetExhausted, current_budget
 from core.tools import tools as available_tools
+from core.context_packer import pack_context
 
-llm = ChatGroq(
-    api_key=Config.GROQ_API_KEY,
-    model_name=Config.LLM_MODEL,
-    temperature=0.0,  # Critical for JSON compliance
-    max_tokens=Config.LLM_MAX_TOKENS,
-)
+def _make_llm(level: int) -> ChatGroq:
+    return ChatGroq(
+        api_key=Config.GROQ_API_KEY,
+        model_name=Config.model_for("solver", level),
+        temperature=0.0,  # Critical for JSON compliance
+        max_tokens=Config.LLM_MAX_TOKENS,
+        timeout=Config.AGENT_RESILIENCE["solver"]["timeout"],
+        max_retries=0,  # Retries and hedging are handled by core/resilience.py
+    )
+
+# One LLM per cascade level (see Config.AGENT_MODEL_TIERS["solver"])
+llms = [_make_llm(level) for level in range(len(Config.AGENT_MODEL_TIERS["solver"]))]
+llm = llms[0]
 
 parser = JsonOutputParser()
 
-def create_solver_agent(bound_tools: List) -> AgentExecutor:
+SOLVER_FALLBACK_ANSWER = "Solver execution failed"
+
+def create_solver_agent(bound_tools: List, level: int = 0, max_execution_time: Optional[float] = None) -> AgentExecutor:
     system_prompt = """
 You are an expert Math Solver Agent.
 Solve the problem step-by-step.
@@ -33,33 +45,63 @@ You MUST output ONLY valid JSON in this exact format (no extra text):
         ("placeholder", "{agent_scratchpad}"),
     ]).partial(format_instructions=parser.get_format_instructions())
 
-    agent = create_tool_calling_agent(llm, bound_tools, prompt)
-    return AgentExecutor(agent=agent, tools=bound_tools, verbose=False, max_iterations=12)
+    agent = create_tool_calling_agent(llms[min(level, len(llms) - 1)], bound_tools, prompt)
+    return AgentExecutor(
+        agent=agent,
+        tools=bound_tools,
+        verbose=False,
+        max_iterations=12,
+        max_execution_time=max_execution_time,  # Stop iterating once the request budget is spent
+        early_stopping_method="force",
+    )
 
-def solve_problem(problem_text: str, retrieved: List[Dict], required_tools: List[str]) -> Dict:
+def solve_problem(
+    problem_text: str,
+    retrieved: List[Dict],
+    required_tools: List[str],
+    topic: Optional[str] = None,
+    level: int = 0,
+) -> Dict:
     bound_tools = [t for t in available_tools if t.name in required_tools]
 
-    context_str = "\n\n".join(
-        f"{i}. {c['content']}" for i, c in enumerate(retrieved)
-    ) if retrieved else "No context."
+    # Rank, trim and dedupe retrieved items into the per-topic token budget
+    context_str, context_stats = pack_context(retrieved, topic=topic)
 
-    executor = create_solver_agent(bound_tools)
+    budget = current_budget()
+    executor = create_solver_agent(
+        bound_tools, level=level, max_execution_time=budget.remaining() if budget is not None else None
+    )
+    run_config = {"callbacks": [BudgetCallback(budget, "solve")]} if budget is not None else None
 
     try:
-        response = executor.invoke({
+        response = resilient_call("solver", Config.model_for("solver", level), executor.invoke, {
             "problem_text": problem_text,
             "retrieved_context": context_str
-        })
+        }, config=run_config)
         raw = response["output"]
         structured = parser.parse(raw)
         return {
             "answer": structured.get("answer", "No answer"),
             "steps": structured.get("steps", ["No steps"]),
-            "used_sources": structured.get("used_sources", [])
+            "used_sources": structured.get("used_sources", []),
+            "context_tokens": context_stats
         }
+    except BudgetExhausted:
+        raise
     except Exception as e:
+        if budget is not None and budget.exhausted:
+            raise BudgetExhausted(budget.exhausted, "solve")
         return {
-            "answer": "Solver execution failed",
+            "answer": SOLVER_FALLBACK_ANSWER,
             "steps": [f"Error: {str(e)}"],
-            "used_sources": []
-        }
\ No newline at end of file
+            "used_sources": [],
+            "context_tokens": context_stats
+        }
+
+def solver_is_certain(solution: Dict) -> bool:
+    """False when the solver hit its fallback path or returned no usable answer/steps."""
+    answer = str(solution.get("answer", "")).strip()
+    steps = solution.get("steps") or []
+    if answer in ("", "No answer", SOLVER_FALLBACK_ANSWER):
+        return False
+    return bool(steps) and steps != ["No steps"]
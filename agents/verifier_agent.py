@@ -15,25 +15,35 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
 
 from core.config import Config
+from core.deadline import BudgetExhausted
+from core.resilience import resilient_call
 from core.prompts import VERIFIER_PROMPT
 
-# Shared LLM
-llm = ChatGroq(
-    api_key=Config.GROQ_API_KEY,
-    model_name=Config.LLM_MODEL,
-    temperature=Config.LLM_TEMPERATURE,  # Low for consistent verification
-    max_tokens=Config.LLM_MAX_TOKENS,
-)
+# One LLM per cascade level (see Config.AGENT_MODEL_TIERS["verifier"])
+llms = [
+    ChatGroq(
+        api_key=Config.GROQ_API_KEY,
+        model_name=Config.model_for("verifier", level),
+        temperature=Config.LLM_TEMPERATURE,  # Low for consistent verification
+        max_tokens=Config.LLM_MAX_TOKENS,
+        timeout=Config.AGENT_RESILIENCE["verifier"]["timeout"],
+        max_retries=0,  # Retries and hedging are handled by core/resilience.py
+    )
+    for level in range(len(Config.AGENT_MODEL_TIERS["verifier"]))
+]
+llm = llms[0]
 
 # JSON parser for strict structured output
 json_parser = JsonOutputParser()
 
-# Verifier chain
-verifier_chain = VERIFIER_PROMPT | llm | json_parser
+# Verifier chains (index = cascade level)
+verifier_chains = [VERIFIER_PROMPT | tier_llm | json_parser for tier_llm in llms]
+verifier_chain = verifier_chains[0]
 
 def verify_solution(
     problem_text: str,
     solution: Dict,  # From solver_agent: {"answer": ..., "steps": [...]}
+    level: int = 0,  # Cascade level (0 = first tier in Config.AGENT_MODEL_TIERS["verifier"])
 ) -> Dict:
     """
     Run the Verifier Agent.
@@ -52,7 +62,8 @@ def verify_solution(
     steps_str = "\n".join(solution.get("steps", ["No steps provided"]))
     
     try:
-        verification_output = verifier_chain.invoke({
+        chain = verifier_chains[min(level, len(verifier_chains) - 1)]
+        verification_output = resilient_call("verifier", Config.model_for("verifier", level), chain.invoke, {
             "problem_text": problem_text,
             "solution_steps": steps_str,
             "final_answer": final_answer
@@ -75,6 +86,8 @@ def verify_solution(
         
         return verification_output
     
+    except BudgetExhausted:
+        raise
     except (OutputParserException, ValueError, KeyError) as e:
         # Fallback on parsing/validation error → low confidence, trigger HITL
         return {
@@ -1,91 +1,780 @@
-from fastapi import FastAPI, UploadFile, File
+import asyncio
+import functools
+
+from fastapi import FastAPI, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional
 
 # Your existing imports
-from core.multimodal import (
-    process_text_input,
-    process_image_input,
-    process_audio_input
-)
+from core.multimodal import process_text_input
+from core.model_workers import extract_image, extract_audio, streaming_transcriber
+from core.model_manager import model_manager
+from core.admission import admission, AdmissionRejected
+from core.config import Config
+from core.job_queue import JobQueue
+from core.incremental import StageRunner, fingerprint
+from core.resilience import resilient_caller
+from core.deadline import BudgetExhausted, RequestBudget, budget_metrics, use_budget
+from core.problem_segmentation import segment_problems
 from agents.parser_agent import parse_problem
 from agents.router_agent import route_problem
+from agents.parse_route_agent import parse_and_route
 from core.rag_hybrid import hybrid_retrieval
-from agents.solver_agent import solve_problem
+from agents.cascade import solve_and_verify, cascade_stats
 from agents.verifier_agent import verify_solution
 from agents.explainer_agent import explain_solution
+from agents.deferred_explainer import ExplanationFailed, explanation_store
+from memory.chat_memory import (
+    add_to_history,
+    get_conversation_history,
+    clear_current_problem_state,
+    store_current_problem_state,
+    get_current_problem_state
+)
+from memory.session_store import chunk_id
 
 app = FastAPI()
+job_queue = JobQueue()
 
 # -----------------------------
 # Request Schema
 # -----------------------------
 class TextRequest(BaseModel):
     problem: str
+    priority: str = "interactive"  # "interactive" | "batch"
+    profile: Optional[str] = None  # "fast" | "balanced" | "thorough" (default: Config.DEFAULT_PIPELINE_PROFILE)
+    session_id: Optional[str] = None  # Reuse stage outputs from earlier requests in this session
+    deadline_seconds: Optional[float] = None  # Shorter than Config.REQUEST_DEADLINE_SECONDS to cap work
+
+
+class BatchRequest(BaseModel):
+    problems: List[str]
+    profile: Optional[str] = None
+    deadline_seconds: Optional[float] = None  # Applies to each problem
+
+
+class ResubmitRequest(BaseModel):
+    session_id: str
+    raw_text: Optional[str] = None  # Edited extraction (default: the session's current text)
+    parsed: Optional[dict] = None   # Edited parse fields, merged over the session's parse
+    answer: Optional[str] = None    # Reviewer-corrected final answer
+    profile: Optional[str] = None
+    deadline_seconds: Optional[float] = None
+
+
+def resolve_profile(profile: Optional[str]) -> str:
+    profile = profile or Config.DEFAULT_PIPELINE_PROFILE
+    if profile not in Config.PIPELINE_PROFILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown profile '{profile}'. Choose one of: {', '.join(Config.PIPELINE_PROFILES)}"
+        )
+    return profile
 
 
 # -----------------------------
 # Core Pipeline Function
 # -----------------------------
-def run_pipeline(raw_text: str):
-    parsed = parse_problem(raw_text)
+def solver_problem_text(parsed: dict) -> str:
+    """Problem statement given to the solver/verifier, with parsed constraints spelled out."""
+    constraints = parsed.get("constraints") or []
+    if not constraints:
+        return parsed["problem_text"]
+    return parsed["problem_text"] + "\nConstraints: " + "; ".join(str(c) for c in constraints)
+
+
+def run_pipeline(
+    raw_text: str,
+    profile: str = Config.DEFAULT_PIPELINE_PROFILE,
+    session_id: Optional[str] = None,
+    parsed_override: Optional[dict] = None,
+    answer_override: Optional[str] = None,
+    budget: Optional[RequestBudget] = None
+):
+    """
+    Parse → route → retrieve → solve/verify → explain.
+
+    Every stage output is fingerprinted by its inputs (core/incremental.py). Within a
+    session, stages whose inputs are unchanged since the last run are reused, so a
+    HITL resubmission (edited text, edited parse via `parsed_override`, or a corrected
+    final answer via `answer_override`) only re-runs what is downstream of the edit.
+
+    With a `budget` (core/deadline.py), no stage starts after the deadline passes or
+    the client disconnects; the stages completed so far are returned as a partial
+    response and kept in the session, so a retry resumes from there.
+    """
+    prior = {}
+    if session_id:
+        add_to_history({"role": "user", "content": raw_text, "type": "text"}, session_id=session_id)
+        prior = get_current_problem_state(session_id=session_id)
+        if (prior.get("extraction") or {}).get("raw_text") != raw_text:
+            store_current_problem_state(extraction={"raw_text": raw_text}, session_id=session_id)
+
+    prior_outputs = dict(prior.get("stage_outputs") or {})
+    prior_outputs["retrieve"] = prior.get("retrieved") or None
+    runner = StageRunner(prior_outputs, prior.get("fingerprints"), budget=budget)
+
+    try:
+        with use_budget(budget):
+            result = _run_stages(runner, raw_text, profile, session_id, parsed_override, answer_override)
+    except BudgetExhausted as e:
+        return _partial_response(runner, e, profile, session_id)
+    if budget is not None:
+        budget_metrics.record_completed()
+    return result
+
+
+def _partial_response(runner: StageRunner, exhausted: BudgetExhausted, profile: str, session_id: Optional[str]) -> dict:
+    """Best-effort response from the stages that finished before the budget ran out."""
+    outputs = runner.outputs
+    parsed = outputs.get("parse") or (outputs.get("parse_route") or {}).get("parsed")
+    routing = outputs.get("route") or (outputs.get("parse_route") or {}).get("routing")
+    solved = outputs.get("solve") or {}
+    print(f"[deadline] {exhausted}; returning partial result after {runner.stages}")
+
+    if session_id and runner.executed:
+        # Keep finished stages so a retry within the session only runs what is left;
+        # an answer the cascade could not verify in time is returned but not kept
+        kept = {
+            stage: output for stage, output in outputs.items()
+            if stage != "retrieve" and not (stage == "solve" and (output.get("cascade") or {}).get("budget_exhausted"))
+        }
+        store_current_problem_state(
+            retrieved=outputs.get("retrieve"),
+            stage_outputs=kept,
+            fingerprints={stage: fp for stage, fp in runner.fingerprints.items() if stage in kept or stage == "retrieve"},
+            trace_entry=f"[{profile}] " + " → ".join(runner.stages) + f" (stopped: {exhausted.reason})",
+            session_id=session_id
+        )
+
+    return {
+        "status": "partial",
+        "reason": exhausted.reason,
+        "stopped_at": exhausted.stage,
+        "session_id": session_id,
+        "topic": (parsed or {}).get("topic"),
+        "parsed": parsed,
+        "routing": routing,
+        "retrieved": outputs.get("retrieve"),
+        "solution": solved.get("solution"),
+        "confidence": (solved.get("verification") or {}).get("confidence"),
+        "profile": profile,
+        "stages": runner.stages,
+        "reused_stages": runner.reused,
+        "stage_timings": runner.timings
+    }
+
+
+def _run_stages(
+    runner: StageRunner,
+    raw_text: str,
+    profile: str,
+    session_id: Optional[str],
+    parsed_override: Optional[dict],
+    answer_override: Optional[str]
+) -> dict:
+    settings = Config.PIPELINE_PROFILES[profile]
+    fused = Config.PARSE_ROUTE_MODE == "fused"
+
+    # Parse (+ route in fused mode)
+    routing = None
+    if parsed_override is not None:
+        parsed = parsed_override
+        runner.provide("parse", {"reviewed": parsed}, parsed)
+    elif fused:
+        fused_output = runner.run(
+            "parse_route",
+            {"raw_text": raw_text, "model": Config.model_for("parser")},
+            lambda: dict(zip(("parsed", "routing"), parse_and_route(raw_text)))
+        )
+        parsed, routing = fused_output["parsed"], fused_output["routing"]
+    else:
+        parsed = runner.run(
+            "parse",
+            {"raw_text": raw_text, "model": Config.model_for("parser")},
+            lambda: parse_problem(raw_text)
+        )
 
     if parsed.get("needs_clarification", False):
         return {
             "status": "clarification_needed",
-            "message": parsed.get("clarification_needed", "")
+            "message": parsed.get("clarification_needed", ""),
+            "profile": profile,
+            "stages": runner.stages,
+            "reused_stages": runner.reused
         }
 
-    routing = route_problem(parsed)
-    retrieved = hybrid_retrieval(parsed["problem_text"])
+    if routing is None:
+        routing = runner.run(
+            "route",
+            {"parsed": parsed, "model": Config.model_for("router")},
+            lambda: route_problem(parsed)
+        )
+
+    # Retrieval depends only on the problem statement, so constraint edits keep it
+    retrieved = runner.run(
+        "retrieve",
+        {"problem_text": parsed["problem_text"], "top_k": Config.TOP_K_RETRIEVAL},
+        lambda: hybrid_retrieval(parsed["problem_text"])
+    )
+
+    # Solver + verifier, escalating to larger model tiers only when needed
+    problem_text = solver_problem_text(parsed)
+    required_tools = routing.get("required_tools", [])
+    topic = routing.get("topic", parsed.get("topic"))
+    solved = runner.run(
+        "solve",
+        {
+            "problem_text": problem_text,
+            "retrieved": [chunk_id(item) for item in retrieved],
+            "required_tools": required_tools,
+            "topic": topic,
+            "verify": settings["verifier"],
+            "tiers": [Config.model_for("solver", level) for level in range(len(Config.AGENT_MODEL_TIERS["solver"]))],
+        },
+        lambda: dict(zip(
+            ("solution", "verification", "cascade"),
+            solve_and_verify(
+                problem_text=problem_text,
+                retrieved=retrieved,
+                required_tools=required_tools,
+                topic=topic,
+                verify=settings["verifier"]
+            )
+        ))
+    )
+    solution, verification = solved["solution"], solved["verification"]
+    cascade = solved["cascade"] if "solve" in runner.executed else {"attempts": [], "escalated": False}
+
+    # A reviewer-corrected answer only needs re-verification (top tier) and a new explanation
+    if answer_override is not None:
+        solution = {**solution, "answer": answer_override, "reviewer_edited": True}
+        top_level = len(Config.AGENT_MODEL_TIERS["verifier"]) - 1
+        verification = runner.run(
+            "verify",
+            {"problem_text": problem_text, "solution": solution, "model": Config.model_for("verifier", top_level)},
+            lambda: verify_solution(problem_text, solution, level=top_level)
+        )
 
-    solution = solve_problem(
-        problem_text=parsed["problem_text"],
-        retrieved=retrieved,
-        required_tools=routing.get("required_tools", [])
+    # Explanation is off the critical path unless EXPLANATION_MODE == "inline";
+    # every solution gets an id so clients can fetch it from /explanations/{id} later
+    def explain():
+        solution_id = explanation_store.register(problem_text, solution)
+        explanation = None
+        if settings["explainer"]:
+            if Config.EXPLANATION_MODE == "inline":
+                explanation = explain_solution(problem_text, solution)
+            elif Config.EXPLANATION_MODE == "background":
+                explanation_store.schedule(solution_id)
+        return {"solution_id": solution_id, "explanation": explanation}
+
+    explained = runner.run(
+        "explain",
+        {
+            "problem_text": problem_text,
+            "solution": solution,
+            "explainer": settings["explainer"],
+            "mode": Config.EXPLANATION_MODE,
+            "model": Config.model_for("explainer"),
+        },
+        explain
     )
+    solution_id = explained["solution_id"]
+    explanation = explained["explanation"] or explanation_store.peek(solution_id)
+    if "explain" in runner.reused and not explanation_store.exists(solution_id):
+        # Stored id has expired from the explanation store; register it again
+        explained = explain()
+        runner.reused.remove("explain")
+        runner.executed.append("explain")
+        solution_id, explanation = explained["solution_id"], explained["explanation"]
+        runner.outputs["explain"] = explained
 
-    verification = verify_solution(parsed["problem_text"], solution)
-    explanation = explain_solution(parsed["problem_text"], solution)
+    if session_id:
+        store_current_problem_state(
+            parsed=parsed,
+            routing=routing,
+            retrieved=retrieved,
+            solution=solution,
+            verification=verification or None,
+            explanation=explanation,
+            stage_outputs={stage: output for stage, output in runner.outputs.items() if stage != "retrieve"},
+            fingerprints=runner.fingerprints,
+            trace_entry=f"[{profile}] " + " → ".join(runner.stages),
+            session_id=session_id
+        )
+        add_to_history(
+            {"role": "assistant", "content": solution.get("answer"), "type": "solution"},
+            session_id=session_id
+        )
 
     return {
         "status": "success",
+        "solution_id": solution_id,
+        "session_id": session_id,
         "topic": parsed.get("topic"),
         "solution": solution,
         "explanation": explanation,
+        "explanation_url": f"/explanations/{solution_id}",
         "confidence": verification.get("confidence"),
         "issues": verification.get("issues", []),
-        "retrieved": retrieved
+        "retrieved": retrieved,
+        "profile": profile,
+        "stages": runner.stages,
+        "reused_stages": runner.reused,
+        "stage_timings": runner.timings,
+        "cascade": cascade
     }
 
 
+# -----------------------------
+# Admission-controlled execution
+# -----------------------------
+async def watch_disconnect(http_request: Request, budget: RequestBudget):
+    """Cancel the request's budget as soon as the client goes away."""
+    while not budget.cancelled:
+        if await http_request.is_disconnected():
+            budget.cancel("client_disconnected")
+            return
+        await asyncio.sleep(Config.DISCONNECT_POLL_SECONDS)
+
+
+async def run_admitted(
+    priority: str, fn, *args, http_request: Optional[Request] = None, budget: Optional[RequestBudget] = None
+) -> dict:
+    """Run fn(*args) through the admission layer; overload → 429 with Retry-After."""
+    if budget is not None:
+        fn = functools.partial(fn, budget=budget)
+    watcher = None
+    if http_request is not None and budget is not None:
+        watcher = asyncio.create_task(watch_disconnect(http_request, budget))
+    try:
+        result, timing = await admission.run(priority, fn, *args)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+    if budget is not None and result.get("status") == "partial":
+        budget_metrics.record_abandoned(budget, result.get("stages", []), delivered=not budget.cancelled)
+    result["timing"] = timing
+    return result
+
+
+def rejected_response(e: HTTPException) -> dict:
+    """Slot entry for one problem of a multi-problem request that admission shed (429)."""
+    return {"status": "rejected", "detail": e.detail, "retry_after": int((e.headers or {}).get("Retry-After", 1))}
+
+
+def solve_image_bytes(
+    content: bytes, profile: str, session_id: Optional[str] = None, budget: Optional[RequestBudget] = None
+) -> dict:
+    extraction = extract_image(content)
+    return run_pipeline(extraction["raw_text"], profile, session_id, budget=budget)
+
+
+def segment_worksheet_bytes(content: bytes) -> dict:
+    """OCR a worksheet page once and split it into numbered problems (core/problem_segmentation.py)."""
+    extraction = extract_image(content)
+    segmented = segment_problems(extraction.get("regions") or [])
+    if not segmented["problems"]:
+        segmented["problems"] = [
+            {"number": None, "text": extraction["raw_text"], "box": None, "confidence": 0.0, "lines": 0}
+        ]
+    return segmented
+
+
+def problem_session_id(session_id: Optional[str], position: int) -> Optional[str]:
+    """Each worksheet problem gets its own session, so its stages can be resubmitted independently."""
+    return f"{session_id}:{position}" if session_id else None
+
+
+def worksheet_response(segmented: dict, results: List[dict], profile: str, session_id: Optional[str]) -> dict:
+    statuses = {result.get("status") for result in results}
+    return {
+        "status": "success" if statuses == {"success"} else "partial",
+        "session_id": session_id,
+        "count": len(results),
+        "header": segmented["header"],
+        "problems": [
+            {
+                "position": position,
+                "number": problem["number"],
+                "box": problem["box"],  # [x0, y0, x1, y1] in uploaded-image pixels
+                "text": problem["text"],
+                "ocr_confidence": problem["confidence"],
+                "result": result,
+            }
+            for position, (problem, result) in enumerate(zip(segmented["problems"], results), start=1)
+        ],
+        "profile": profile,
+        "stages": [stage for result in results for stage in result.get("stages", [])],
+    }
+
+
+def solve_worksheet_bytes(
+    content: bytes, profile: str, session_id: Optional[str] = None, budget: Optional[RequestBudget] = None
+) -> dict:
+    """
+    Job-worker path for worksheets: segment the page, then solve up to
+    Config.WORKSHEET_MAX_PARALLEL problems at a time. The API endpoint instead
+    admits every problem separately (see solve_worksheet).
+    """
+    segmented = segment_worksheet_bytes(content)
+
+    def solve_one(position: int, problem: dict) -> dict:
+        problem_session = problem_session_id(session_id, position)
+        try:
+            return run_pipeline(problem["text"], profile, problem_session, budget=budget)
+        except Exception as e:
+            # One unreadable problem must not fail the whole page
+            print(f"[worksheet] problem {position} failed: {e}")
+            return {"status": "error", "error": str(e), "session_id": problem_session}
+
+    problems = segmented["problems"]
+    workers = max(1, min(Config.WORKSHEET_MAX_PARALLEL, len(problems)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worksheet") as pool:
+        results = list(pool.map(solve_one, range(1, len(problems) + 1), problems))
+    return worksheet_response(segmented, results, profile, session_id)
+
+
+def solve_audio_bytes(
+    content: bytes, profile: str, session_id: Optional[str] = None, budget: Optional[RequestBudget] = None
+) -> dict:
+    extraction = extract_audio(content)
+    return run_pipeline(extraction["raw_text"], profile, session_id, budget=budget)
+
+
 # -----------------------------
 # TEXT API
 # -----------------------------
 @app.post("/solve/text")
-def solve_text(request: TextRequest):
+async def solve_text(request: TextRequest, http_request: Request):
+    if request.priority not in ("interactive", "batch"):
+        raise HTTPException(status_code=422, detail="priority must be 'interactive' or 'batch'")
+    profile = resolve_profile(request.profile)
     extraction = process_text_input(request.problem)
-    return run_pipeline(extraction["raw_text"])
+    return await run_admitted(
+        request.priority, run_pipeline, extraction["raw_text"], profile, request.session_id,
+        http_request=http_request, budget=RequestBudget(request.deadline_seconds)
+    )
+
+
+@app.post("/solve/batch")
+async def solve_batch(request: BatchRequest, http_request: Request):
+    """
+    Solve several text problems in one round trip, at batch priority. Each problem is
+    admitted separately, so a shed problem is reported as "rejected" (with retry_after)
+    in its slot instead of failing the whole batch. Results keep the request order.
+    """
+    if not request.problems:
+        raise HTTPException(status_code=422, detail="'problems' must not be empty")
+    if len(request.problems) > Config.BATCH_MAX_PROBLEMS:
+        raise HTTPException(status_code=413, detail=f"At most {Config.BATCH_MAX_PROBLEMS} problems per batch")
+    profile = resolve_profile(request.profile)
+
+    async def solve_one(problem: str) -> dict:
+        extraction = process_text_input(problem)
+        try:
+            return await run_admitted(
+                "batch", run_pipeline, extraction["raw_text"], profile,
+                http_request=http_request, budget=RequestBudget(request.deadline_seconds)
+            )
+        except HTTPException as e:
+            return rejected_response(e)
+
+    results = await asyncio.gather(*(solve_one(problem) for problem in request.problems))
+    return {"count": len(results), "results": results}
+
+
+# -----------------------------
+# HITL RESUBMISSION
+# -----------------------------
+@app.post("/solve/resubmit")
+async def resubmit(request: ResubmitRequest, http_request: Request):
+    """Re-run a session's problem after reviewer edits; unchanged stages are reused."""
+    profile = resolve_profile(request.profile)
+    state = await run_in_threadpool(get_current_problem_state, request.session_id)
+    raw_text = request.raw_text or (state.get("extraction") or {}).get("raw_text")
+    if not raw_text:
+        raise HTTPException(status_code=404, detail="No problem stored for this session")
+
+    text_changed = bool(request.raw_text) and request.raw_text != (state.get("extraction") or {}).get("raw_text")
+    stored_parsed = state.get("parsed")
+    parsed_override = None
+    if request.parsed:
+        parsed_override = {**({} if text_changed else stored_parsed or {}), **request.parsed}
+        if not parsed_override.get("problem_text"):
+            raise HTTPException(status_code=422, detail="Edited parse must include problem_text")
+    elif (
+        not text_changed and stored_parsed
+        and (state.get("fingerprints") or {}).get("parse") == fingerprint("parse", {"reviewed": stored_parsed})
+    ):
+        # An earlier resubmission's reviewed parse stays in effect (e.g. for an answer-only edit)
+        parsed_override = stored_parsed
+
+    return await run_admitted(
+        "interactive", run_pipeline, raw_text, profile, request.session_id, parsed_override, request.answer,
+        http_request=http_request, budget=RequestBudget(request.deadline_seconds)
+    )
 
 
 # -----------------------------
 # IMAGE API
 # -----------------------------
 @app.post("/solve/image")
-async def solve_image(file: UploadFile = File(...)):
+async def solve_image(
+    http_request: Request,
+    file: UploadFile = File(...),
+    profile: Optional[str] = None,
+    session_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
+):
+    profile = resolve_profile(profile)
+    content = await file.read()
+    return await run_admitted(
+        "heavy", solve_image_bytes, content, profile, session_id,
+        http_request=http_request, budget=RequestBudget(deadline_seconds)
+    )
+
+
+@app.post("/solve/worksheet")
+async def solve_worksheet(
+    http_request: Request,
+    file: UploadFile = File(...),
+    profile: Optional[str] = None,
+    session_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
+):
+    """
+    Solve every numbered problem on a worksheet photo; results are returned per region.
+    OCR is admitted as one heavy request; each segmented problem is then admitted on its
+    own at batch priority (like /solve/batch), so a page cannot bypass the LLM rate limit.
+    Shed problems are reported as "rejected" in their slot.
+    """
+    profile = resolve_profile(profile)
     content = await file.read()
-    extraction = process_image_input(content)
-    return run_pipeline(extraction["raw_text"])
+    budget = RequestBudget(deadline_seconds)
+    try:
+        segmented, ocr_timing = await admission.run("heavy", segment_worksheet_bytes, content)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def solve_one(position: int, problem: dict) -> dict:
+        try:
+            return await run_admitted(
+                "batch", run_pipeline, problem["text"], profile, problem_session_id(session_id, position),
+                http_request=http_request, budget=budget
+            )
+        except HTTPException as e:
+            return rejected_response(e)
+        except Exception as e:
+            # One unreadable problem must not fail the whole page
+            print(f"[worksheet] problem {position} failed: {e}")
+            return {"status": "error", "error": str(e), "session_id": problem_session_id(session_id, position)}
+
+    results = await asyncio.gather(
+        *(solve_one(position, problem) for position, problem in enumerate(segmented["problems"], start=1))
+    )
+    response = worksheet_response(segmented, results, profile, session_id)
+    response["timing"] = {"ocr": ocr_timing}
+    return response
 
 
 # -----------------------------
 # AUDIO API
 # -----------------------------
 @app.post("/solve/audio")
-async def solve_audio(file: UploadFile = File(...)):
+async def solve_audio(
+    http_request: Request,
+    file: UploadFile = File(...),
+    profile: Optional[str] = None,
+    session_id: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
+):
+    profile = resolve_profile(profile)
     content = await file.read()
-    extraction = process_audio_input(content)
-    return run_pipeline(extraction["raw_text"])
+    return await run_admitted(
+        "heavy", solve_audio_bytes, content, profile, session_id,
+        http_request=http_request, budget=RequestBudget(deadline_seconds)
+    )
+
+
+# -----------------------------
+# STREAMING AUDIO API (WebSocket)
+# -----------------------------
+@app.websocket("/solve/audio/stream")
+async def solve_audio_stream(websocket: WebSocket, profile: Optional[str] = None):
+    """
+    Client sends binary frames of 16-bit mono PCM (Config.ASR_SAMPLE_RATE) while
+    the student speaks, and optionally a text frame "end" when done.
+
+    Server sends:
+      {"type": "partial", "text": ...}      for every utterance transcribed so far
+      {"type": "transcript", ...}           final extraction dict once speech ends
+      {"type": "result", ...}               the run_pipeline response
+    """
+    await websocket.accept()
+    profile = profile or Config.DEFAULT_PIPELINE_PROFILE
+    if profile not in Config.PIPELINE_PROFILES:
+        await websocket.send_json({"type": "error", "status": 422, "message": f"Unknown profile '{profile}'"})
+        await websocket.close()
+        return
+    transcriber = await run_in_threadpool(streaming_transcriber)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes") is not None:
+                completed = await run_in_threadpool(transcriber.add_chunk, message["bytes"])
+                for text in completed:
+                    await websocket.send_json({"type": "partial", "text": text})
+                # Student stopped talking → start parsing immediately
+                if transcriber.speech_ended:
+                    break
+            elif message.get("text") == "end":
+                break
+
+        extraction = await run_in_threadpool(transcriber.finish)
+        await websocket.send_json({"type": "transcript", **extraction})
+
+        try:
+            result, timing = await admission.run("interactive", run_pipeline, extraction["raw_text"], profile)
+        except AdmissionRejected as e:
+            await websocket.send_json({"type": "error", "status": 429, "message": str(e), "retry_after": e.retry_after})
+            await websocket.close()
+            return
+        await websocket.send_json({"type": "result", **result, "timing": timing})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+# -----------------------------
+# ASYNC JOB API (long image/audio solves)
+# -----------------------------
+@app.post("/jobs", status_code=202)
+async def create_job(
+    kind: str = Form(...),                    # "image" | "worksheet" | "audio" | "text"
+    file: Optional[UploadFile] = File(None),  # required for image/worksheet/audio
+    problem: Optional[str] = Form(None),      # required for text
+    profile: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None)
+):
+    profile = resolve_profile(profile)
+    if kind in ("image", "worksheet", "audio"):
+        if file is None:
+            raise HTTPException(status_code=422, detail=f"'file' is required for {kind} jobs")
+        payload = await file.read()
+    elif kind == "text":
+        if not problem:
+            raise HTTPException(status_code=422, detail="'problem' is required for text jobs")
+        payload = problem.encode("utf-8")
+    else:
+        raise HTTPException(status_code=422, detail="kind must be 'image', 'worksheet', 'audio' or 'text'")
+
+    job_id = await run_in_threadpool(
+        job_queue.enqueue, kind, payload, {"profile": profile, "session_id": session_id}
+    )
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_threadpool(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
+    return job
+
+
+# -----------------------------
+# SESSIONS
+# -----------------------------
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    state = await run_in_threadpool(get_current_problem_state, session_id)
+    history = await run_in_threadpool(get_conversation_history, session_id)
+    return {"session_id": session_id, "state": state, "history": history}
+
+
+# -----------------------------
+# DEFERRED EXPLANATIONS
+# -----------------------------
+@app.get("/explanations/{solution_id}")
+async def get_explanation(solution_id: str, wait: bool = True):
+    """
+    Fetch the explanation for a solution. With wait=true (default) this generates it
+    on demand or joins the in-flight background generation; otherwise it returns
+    status "pending" until the explanation is ready. A failed generation returns
+    status "failed" with `retryable`; a later wait=true request retries it.
+    """
+    if not explanation_store.exists(solution_id):
+        raise HTTPException(status_code=404, detail="Unknown solution_id")
+
+    explanation = explanation_store.peek(solution_id)
+    if explanation is None and wait:
+        try:
+            explanation = await run_in_threadpool(
+                explanation_store.get, solution_id, Config.EXPLANATION_WAIT_TIMEOUT
+            )
+        except FutureTimeoutError:
+            explanation = None
+        except ExplanationFailed:
+            pass
+
+    failure = explanation_store.failure(solution_id) if explanation is None else None
+    if failure is not None:
+        return {"solution_id": solution_id, "status": "failed", "explanation": None, **failure}
+
+    return {
+        "solution_id": solution_id,
+        "status": "ready" if explanation is not None else "pending",
+        "explanation": explanation
+    }
+
+
+# -----------------------------
+# ADMISSION STATS
+# -----------------------------
+@app.get("/admission")
+def admission_stats():
+    return admission.stats()
+
+
+# -----------------------------
+# MODEL CASCADE STATS
+# -----------------------------
+@app.get("/cascade")
+def cascade_report():
+    return cascade_stats.report()
+
+
+# -----------------------------
+# AGENT CALL RESILIENCE (timeouts, hedges, circuit breakers)
+# -----------------------------
+@app.get("/resilience")
+def resilience_report():
+    return resilient_caller.report()
+
+
+# -----------------------------
+# REQUEST DEADLINE BUDGETS (work spent on abandoned requests)
+# -----------------------------
+@app.get("/budget")
+def budget_report():
+    return budget_metrics.report()
+
+
+# -----------------------------
+# MODEL MEMORY REPORT
+# -----------------------------
+@app.get("/models")
+def models_report():
+    return model_manager.report()
 
 
 # -----------------------------
@@ -8,10 +8,21 @@ import (
 	"fmt"
 	"io"
 	"net/http"
+	"os"
+	"strings"
 	"time"
 )
 
-const groqAPIURL = "https://api.groq.com/openai/v1/chat/completions"
+// groqAPIURL is the chat completions endpoint. GROQ_API_BASE overrides the host
+// (same variable as the Python client), e.g. to point at a local stub LLM in benchmarks.
+var groqAPIURL = apiBase() + "/openai/v1/chat/completions"
+
+func apiBase() string {
+	if base := os.Getenv("GROQ_API_BASE"); base != "" {
+		return strings.TrimRight(base, "/")
+	}
+	return "https://api.groq.com"
+}
 
 // Client holds the API key and model settings needed to make Groq API calls.
 type Client struct {
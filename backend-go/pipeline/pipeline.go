@@ -3,6 +3,8 @@
 package pipeline
 
 import (
+	"time"
+
 	"github.com/math-mentor/backend/agents"
 	"github.com/math-mentor/backend/config"
 	"github.com/math-mentor/backend/groq"
@@ -20,6 +22,13 @@ type Result struct {
 	Confidence  float64             `json:"confidence,omitempty"`
 	Issues      []string            `json:"issues,omitempty"`
 	Retrieved   []rag.Result        `json:"retrieved,omitempty"`
+	// Wall time per stage in milliseconds (same keys as the Python stage_timings)
+	StageTimings map[string]float64 `json:"stage_timings,omitempty"`
+}
+
+// since returns the milliseconds elapsed since start.
+func since(start time.Time) float64 {
+	return float64(time.Since(start).Microseconds()) / 1000
 }
 
 // Runner holds the shared dependencies needed to execute the pipeline.
@@ -49,7 +58,10 @@ func New(cfg *config.Config, store *rag.Store) *Runner {
 func (r *Runner) Run(rawText string) Result {
 	// ── Step 1: Parse ──────────────────────────────────────────────────────────
 	// Convert raw (possibly noisy) text into a structured problem description.
+	timings := map[string]float64{}
+	start := time.Now()
 	parsed := agents.ParseProblem(r.llmLow, rawText)
+	timings["parse"] = since(start)
 
 	// If the parser flagged the problem as ambiguous, stop early and ask the
 	// user to clarify instead of producing a potentially wrong answer.
@@ -57,12 +69,15 @@ func (r *Runner) Run(rawText string) Result {
 		return Result{
 			Status:  "clarification_needed",
 			Message: parsed.ClarificationNeeded,
+			StageTimings: timings,
 		}
 	}
 
 	// ── Step 2: Route ──────────────────────────────────────────────────────────
 	// Determine which tools the solver needs and how deep to do RAG retrieval.
+	start = time.Now()
 	routing := agents.RouteProblem(r.llmLow, parsed)
+	timings["route"] = since(start)
 
 	// ── Step 3: Retrieve ───────────────────────────────────────────────────────
 	// Pull relevant knowledge chunks from the in-memory RAG store.
@@ -72,19 +87,27 @@ func (r *Runner) Run(rawText string) Result {
 	} else if routing.RAGDepth == "shallow" && topK > 3 {
 		topK = 3 // Limit to 3 chunks for shallow retrieval
 	}
+	start = time.Now()
 	retrieved := r.ragStore.Retrieve(parsed.ProblemText, topK)
+	timings["retrieve"] = since(start)
 
 	// ── Step 4: Solve ──────────────────────────────────────────────────────────
 	// Ask the LLM to solve the problem, grounded on the retrieved context.
+	start = time.Now()
 	solution := agents.SolveProblem(r.llmLow, parsed.ProblemText, retrieved)
+	timings["solve"] = since(start)
 
 	// ── Step 5: Verify ─────────────────────────────────────────────────────────
 	// Critically check the proposed solution and compute a confidence score.
+	start = time.Now()
 	verification := agents.VerifySolution(r.llmLow, parsed.ProblemText, solution)
+	timings["verify"] = since(start)
 
 	// ── Step 6: Explain ────────────────────────────────────────────────────────
 	// Produce a student-friendly, step-by-step explanation of the verified solution.
+	start = time.Now()
 	explanation := agents.ExplainSolution(r.llmHigh, parsed.ProblemText, solution)
+	timings["explain"] = since(start)
 
 	return Result{
 		Status:      "success",
@@ -94,5 +117,6 @@ func (r *Runner) Run(rawText string) Result {
 		Confidence:  verification.Confidence,
 		Issues:      verification.Issues,
 		Retrieved:   retrieved,
+		StageTimings: timings,
 	}
 }
@@ -0,0 +1,394 @@
+# File: benchmarks/cross_impl_benchmark.py
+"""
+Cross-implementation benchmark: Python app.py pipeline vs backend-go.
+
+Both servers are started against the same local stub LLM (an OpenAI-compatible
+/openai/v1/chat/completions endpoint, reached through GROQ_API_BASE). The stub
+answers every agent from the problem corpus after a fixed delay, so the numbers
+measure each implementation's own overhead and not the LLM. Both servers then
+solve the same problems.
+
+Usage (from the repo root; needs Go for backend-go):
+    python -m benchmarks.cross_impl_benchmark [--corpus benchmarks/problems.jsonl]
+        [--impl python go] [--llm-latency-ms 50] [--repeat 3] [--concurrency 8] [--json out.json]
+
+Reported per implementation:
+- startup time (spawn → health check OK) and RSS after startup / peak under load
+- request latency (mean / p50 / p95 / p99), sequential and under concurrency
+- throughput (requests/sec) at --concurrency
+- per-stage latency from each response's stage_timings. Python's "solve" covers
+  the solver + verifier cascade; Go reports "solve" and "verify" separately.
+- output agreement: status, topic and final answer per problem, compared across
+  implementations and against the corpus answer the stub serves
+
+The Python server runs with EXPLANATION_MODE=inline (the explanation is on the
+request path, as in Go). Admission limits are raised so they never throttle the run.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).parent / "problems.jsonl"
+IMPLEMENTATIONS = ("python", "go")
+
+# System-prompt markers identifying each agent (Python core/prompts.py, agents/*, backend-go/prompts)
+STAGE_MARKERS = [
+    ("parse_route", "combined Math Problem Parser and Intent Router"),
+    ("parse", "Math Problem Parser Agent"),
+    ("route", "Intent Router Agent"),
+    ("solve", "Math Solver Agent"),
+    ("verify", "Verifier/Critic Agent"),
+    ("explain", "Math Tutor Agent"),
+]
+
+
+def load_corpus(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(values: list) -> dict:
+    if not values:
+        return {}
+    return {
+        "mean": statistics.mean(values),
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "p99": _percentile(values, 99),
+    }
+
+
+# -----------------------------
+# Stub LLM
+# -----------------------------
+class StubLLM:
+    """Deterministic OpenAI-compatible chat endpoint that answers from the corpus."""
+
+    def __init__(self, problems: list, port: int, latency_ms: float):
+        self.problems = sorted(problems, key=lambda p: -len(p["problem"]))  # longest match first
+        self.latency = latency_ms / 1000
+        self.calls = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                content = stub.respond(body.get("messages", []))
+                payload = json.dumps({
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+    def _message_text(self, message) -> str:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return content
+
+    def respond(self, messages: list) -> str:
+        system = " ".join(self._message_text(m) for m in messages if m.get("role") == "system")
+        conversation = " ".join(self._message_text(m) for m in messages)
+        stage = next((name for name, marker in STAGE_MARKERS if marker in system), "unknown")
+        item = next((p for p in self.problems if p["problem"] in conversation), None)
+
+        with self._lock:
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+        time.sleep(self.latency)
+
+        problem = item["problem"] if item else ""
+        topic = item["topic"] if item else "algebra"
+        answer = item["answer"] if item else "unknown"
+        parsed = {
+            "problem_text": problem, "topic": topic, "variables": [], "constraints": [],
+            "needs_clarification": False, "clarification_needed": "",
+        }
+        routing = {"topic": topic, "required_tools": [], "rag_depth": "shallow"}
+        if stage == "parse":
+            return json.dumps(parsed)
+        if stage == "route":
+            return json.dumps(routing)
+        if stage == "parse_route":
+            return json.dumps({"parsed": parsed, "routing": routing})
+        if stage == "solve":
+            return json.dumps({"answer": answer, "steps": [f"Stub step for: {problem}", f"Answer: {answer}"], "used_sources": []})
+        if stage == "verify":
+            return json.dumps({"is_correct": True, "confidence": 0.95, "issues": [], "suggested_fix": ""})
+        return f"Step-by-step explanation: the answer is {answer}."
+
+
+# -----------------------------
+# Servers
+# -----------------------------
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class MemorySampler:
+    """Samples a process's RSS in the background and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb(self.pid))
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _http_json(method: str, url: str, payload: dict = None, timeout: float = 120.0):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def build_go(out_dir: Path) -> Path:
+    binary = out_dir / "math-mentor-go"
+    start = time.perf_counter()
+    subprocess.run(["go", "build", "-o", str(binary), "."], cwd=REPO_ROOT / "backend-go", check=True)
+    print(f"Built backend-go in {time.perf_counter() - start:.1f}s")
+    return binary
+
+
+def start_server(impl: str, port: int, stub_url: str, go_binary: Path, log_dir: Path, concurrency: int):
+    """Spawn a server and wait for its health check; returns (process, startup_seconds)."""
+    env = dict(os.environ, GROQ_API_KEY="stub-key", GROQ_API_BASE=stub_url, PORT=str(port))
+    if impl == "python":
+        env.update({
+            "EXPLANATION_MODE": "inline",
+            "ADMISSION_LLM_REQUESTS_PER_MINUTE": "1000000",
+            "ADMISSION_MAX_CONCURRENCY": str(max(concurrency, 8)),
+        })
+        command = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port)]
+        cwd = REPO_ROOT
+    else:
+        command = [str(go_binary)]
+        cwd = REPO_ROOT / "backend-go"
+
+    log_file = open(log_dir / f"{impl}.log", "w")
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    deadline = start + 600
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{impl} server exited during startup; see {log_dir / (impl + '.log')}")
+        try:
+            _http_json("GET", f"http://127.0.0.1:{port}/", timeout=2)
+            return process, time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{impl} server did not become healthy within 600s")
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _solve(port: int, problem: str):
+    start = time.perf_counter()
+    try:
+        result = _http_json("POST", f"http://127.0.0.1:{port}/solve/text", {"problem": problem})
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+    return time.perf_counter() - start, result
+
+
+def bench_implementation(impl: str, port: int, problems: list, repeat: int, concurrency: int,
+                         stub_url: str, go_binary: Path, log_dir: Path) -> dict:
+    process, startup = start_server(impl, port, stub_url, go_binary, log_dir, concurrency)
+    report = {"startup_s": startup, "rss_after_startup_mb": rss_mb(process.pid)}
+    try:
+        with MemorySampler(process.pid) as sampler:
+            _solve(port, problems[0]["problem"])  # warm-up
+
+            sequential, stage_times, outputs = [], {}, {}
+            for _ in range(repeat):
+                for item in problems:
+                    seconds, result = _solve(port, item["problem"])
+                    sequential.append(seconds)
+                    outputs[item["id"]] = result
+                    for stage, ms in (result.get("stage_timings") or {}).items():
+                        stage_times.setdefault(stage, []).append(ms)
+
+            load = [item["problem"] for item in problems] * max(1, repeat)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                concurrent = [seconds for seconds, _ in pool.map(lambda p: _solve(port, p), load)]
+            elapsed = time.perf_counter() - start
+
+        report.update({
+            "rss_peak_mb": sampler.peak,
+            "sequential_latency_s": _summary(sequential),
+            "concurrent_latency_s": _summary(concurrent),
+            "throughput_rps": len(load) / elapsed,
+            "stage_ms": {stage: _summary(values) for stage, values in stage_times.items()},
+            "outputs": outputs,
+        })
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return report
+
+
+def compare_outputs(problems: list, reports: dict) -> list:
+    """Per-problem agreement rows: status/topic/answer per implementation plus match flags."""
+    rows = []
+    for item in problems:
+        row = {"id": item["id"], "expected": item["answer"]}
+        for impl, report in reports.items():
+            result = report["outputs"].get(item["id"], {})
+            row[impl] = {
+                "status": result.get("status"),
+                "topic": result.get("topic"),
+                "answer": (result.get("solution") or {}).get("answer"),
+            }
+        impls = list(reports)
+        row["correct"] = {impl: row[impl]["answer"] == item["answer"] for impl in impls}
+        row["agree"] = all(row[impl] == row[impls[0]] for impl in impls)
+        rows.append(row)
+    return rows
+
+
+def print_report(reports: dict, agreement: list, stub: StubLLM):
+    print()
+    print("Startup / memory:")
+    for impl, r in reports.items():
+        print(f"  {impl:<7} startup {r['startup_s']:.2f}s  RSS {r['rss_after_startup_mb']:.0f} MB after startup, "
+              f"{r['rss_peak_mb']:.0f} MB peak")
+
+    print("Request latency (s):")
+    for impl, r in reports.items():
+        for label, key in (("sequential", "sequential_latency_s"), ("concurrent", "concurrent_latency_s")):
+            s = r[key]
+            print(f"  {impl:<7} {label:<10} mean {s['mean']:.3f}  p50 {s['p50']:.3f}  p95 {s['p95']:.3f}  p99 {s['p99']:.3f}")
+    print("Throughput:")
+    for impl, r in reports.items():
+        print(f"  {impl:<7} {r['throughput_rps']:.1f} req/s")
+
+    print("Per-stage latency (ms, mean / p95):")
+    stages = sorted({stage for r in reports.values() for stage in r["stage_ms"]})
+    for stage in stages:
+        cells = []
+        for impl, r in reports.items():
+            s = r["stage_ms"].get(stage)
+            cells.append(f"{impl} {s['mean']:8.1f} / {s['p95']:8.1f}" if s else f"{impl} {'-':>8} / {'-':>8}")
+        print(f"  {stage:<12} " + "   ".join(cells))
+
+    print(f"Stub LLM calls by agent: {stub.calls}")
+    disagreements = [row for row in agreement if not row["agree"]]
+    print(f"Output agreement: {len(agreement) - len(disagreements)}/{len(agreement)} problems identical across implementations")
+    for impl in reports:
+        correct = sum(row["correct"][impl] for row in agreement)
+        print(f"  {impl:<7} answers matching the served answer: {correct}/{len(agreement)}")
+    for row in disagreements:
+        details = "; ".join(f"{impl}={row[impl]}" for impl in reports)
+        print(f"  [{row['id']}] {details}")
+
+
+def run_benchmark(args) -> dict:
+    problems = load_corpus(args.corpus)
+    stub = StubLLM(problems, args.stub_port, args.llm_latency_ms)
+    stub.start()
+    reports = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(args.log_dir) if args.log_dir else Path(tmp)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        go_binary = build_go(Path(tmp)) if "go" in args.impl else None
+        ports = {"python": args.python_port, "go": args.go_port}
+        for impl in args.impl:
+            print(f"Benchmarking {impl}...")
+            reports[impl] = bench_implementation(
+                impl, ports[impl], problems, args.repeat, args.concurrency, stub.url, go_binary, log_dir
+            )
+    stub.stop()
+
+    agreement = compare_outputs(problems, reports)
+    print_report(reports, agreement, stub)
+    return {"reports": reports, "agreement": agreement, "stub_calls": stub.calls}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSONL with id, topic, problem, answer")
+    arg_parser.add_argument("--impl", nargs="+", choices=IMPLEMENTATIONS, default=list(IMPLEMENTATIONS))
+    arg_parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Stub LLM delay per call")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Sequential passes over the corpus")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients for the throughput pass")
+    arg_parser.add_argument("--python-port", type=int, default=8000)
+    arg_parser.add_argument("--go-port", type=int, default=8080)
+    arg_parser.add_argument("--stub-port", type=int, default=8090)
+    arg_parser.add_argument("--log-dir", help="Keep server logs here (default: temporary)")
+    arg_parser.add_argument("--json", type=Path, help="Also write the full report as JSON")
+    args = arg_parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
@@ -0,0 +1,146 @@
+# File: benchmarks/embedding_backends.py
+"""
+Parity and throughput check: torch (full precision) vs ONNX int8 embeddings.
+
+Usage (from the repo root):
+    python -m benchmarks.embedding_backends [--corpus benchmarks/problems.jsonl] [--k 5] [--min-top1 0.9]
+
+Documents are the knowledge/ markdown chunks (as indexed by core/rag_hybrid.py)
+plus every corpus problem. Queries are the corpus problems.
+
+Parity (per query, ranking all documents by cosine similarity with each backend):
+- top-1 agreement and mean top-k overlap between the two rankings
+- mean cosine similarity between the two backends' vectors for the same text
+The script exits non-zero when top-1 agreement falls below --min-top1.
+
+Performance:
+- document throughput (docs/sec) for embed_documents over the whole set
+- single-query latency (mean / p50 / p95)
+- concurrent query throughput with and without query micro-batching
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from core.config import Config
+from core.embeddings import BatchedQueryEmbeddings, load_embedding_backend
+from core.formula_index import split_markdown_sections
+
+DEFAULT_CORPUS = Path(__file__).parent / "problems.jsonl"
+BACKENDS = ("torch", "onnx")
+
+
+def load_corpus(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_documents(problems: list) -> list:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=Config.CHUNK_SIZE,
+        chunk_overlap=Config.CHUNK_OVERLAP,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    texts = []
+    for md_file in sorted(Config.KNOWLEDGE_BASE_DIR.rglob("*.md")):
+        for section in split_markdown_sections(md_file.read_text(encoding="utf-8"), md_file.name):
+            texts.extend(splitter.split_text(section["content"]))
+    return texts + [item["problem"] for item in problems]
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _concurrent_qps(embeddings, queries: list, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(embeddings.embed_query, queries))
+    return len(queries) / (time.perf_counter() - start)
+
+
+def run_benchmark(corpus_path: Path, k: int = 5, threads: int = 16, min_top1: float = 0.9) -> bool:
+    problems = load_corpus(corpus_path)
+    documents = load_documents(problems)
+    queries = [item["problem"] for item in problems]
+    print(f"Documents: {len(documents)}  Queries: {len(queries)}")
+
+    doc_vectors, query_vectors, report = {}, {}, {}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        embeddings = load_embedding_backend(backend, batch_queries=False)
+        load_seconds = time.perf_counter() - start
+        embeddings.embed_documents(documents[:8])  # warm-up
+
+        start = time.perf_counter()
+        doc_vectors[backend] = np.array(embeddings.embed_documents(documents))
+        docs_per_sec = len(documents) / (time.perf_counter() - start)
+
+        latencies = []
+        vectors = []
+        for query in queries:
+            start = time.perf_counter()
+            vectors.append(embeddings.embed_query(query))
+            latencies.append(time.perf_counter() - start)
+        query_vectors[backend] = np.array(vectors)
+
+        load_queries = queries * max(1, 256 // len(queries))
+        report[backend] = {
+            "load_s": load_seconds,
+            "docs_per_sec": docs_per_sec,
+            "query_mean_ms": statistics.mean(latencies) * 1000,
+            "query_p50_ms": _percentile(latencies, 50) * 1000,
+            "query_p95_ms": _percentile(latencies, 95) * 1000,
+            "qps_unbatched": _concurrent_qps(embeddings, load_queries, threads),
+            "qps_batched": _concurrent_qps(BatchedQueryEmbeddings(embeddings), load_queries, threads),
+        }
+
+    # Parity of retrieval rankings
+    rankings = {
+        backend: np.argsort(-(query_vectors[backend] @ doc_vectors[backend].T), axis=1)[:, :k]
+        for backend in BACKENDS
+    }
+    top1 = float(np.mean(rankings["torch"][:, 0] == rankings["onnx"][:, 0]))
+    overlap = statistics.mean(
+        len(set(a) & set(b)) / k for a, b in zip(rankings["torch"], rankings["onnx"])
+    )
+    vector_cosine = float(np.mean(np.sum(doc_vectors["torch"] * doc_vectors["onnx"], axis=1)))
+
+    print()
+    print("Parity (torch vs onnx):")
+    print(f"  top-1 agreement     {top1:.0%}")
+    print(f"  top-{k} overlap       {overlap:.0%}")
+    print(f"  mean vector cosine  {vector_cosine:.4f}")
+
+    print("Performance:")
+    for backend, r in report.items():
+        print(
+            f"  {backend:<6} load {r['load_s']:.1f}s  {r['docs_per_sec']:.1f} docs/s  "
+            f"query mean {r['query_mean_ms']:.1f}ms p50 {r['query_p50_ms']:.1f}ms p95 {r['query_p95_ms']:.1f}ms  "
+            f"{threads} threads: {r['qps_unbatched']:.1f} q/s unbatched, {r['qps_batched']:.1f} q/s batched"
+        )
+    print(f"  onnx speedup (docs/s): {report['onnx']['docs_per_sec'] / report['torch']['docs_per_sec']:.2f}x")
+
+    passed = top1 >= min_top1
+    print(f"\nParity {'PASSED' if passed else 'FAILED'} (top-1 agreement {top1:.0%}, required {min_top1:.0%})")
+    return passed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSONL with a 'problem' field per line")
+    arg_parser.add_argument("--k", type=int, default=5, help="Ranking depth compared for overlap")
+    arg_parser.add_argument("--threads", type=int, default=16, help="Concurrent callers for the q/s measurement")
+    arg_parser.add_argument("--min-top1", type=float, default=0.9, help="Required top-1 agreement")
+    args = arg_parser.parse_args()
+    sys.exit(0 if run_benchmark(args.corpus, k=args.k, threads=args.threads, min_top1=args.min_top1) else 1)
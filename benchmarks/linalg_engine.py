@@ -0,0 +1,100 @@
+# File: benchmarks/linalg_engine.py
+"""
+Benchmark: exact (sp.Matrix) vs numeric (NumPy) linear algebra across matrix sizes.
+
+Usage (from the repo root):
+    python -m benchmarks.linalg_engine [--sizes 2 3 4 6 8 12 16 32 64] [--max-exact 12] [--repeat 3]
+
+For each size, a random integer matrix with entries in [-9, 9] is used (fixed seed).
+Each operation (det, inverse, eigenvalues, solve) is timed with both engines of
+core/numeric_linalg.py. The exact engine is skipped above --max-exact, because
+sp.Matrix runtimes grow steeply.
+
+Reports the median latency per engine, the speedup, and whether the results
+agree: exact fractions must match exactly, and floats must match to within 1e-6
+relative. The auto-selected method is marked (Config.LINALG_EXACT_MAX_SIZE).
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import sympy as sp
+
+from core.config import Config
+from core.numeric_linalg import compute
+
+OPERATIONS = ("det", "inverse", "eigenvalues", "solve")
+
+
+def _matrix(size: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed + size)
+    while True:
+        a = rng.integers(-9, 10, (size, size))
+        if np.linalg.matrix_rank(a) == size:  # Invertible, so inverse/solve are defined
+            return a.tolist()
+
+
+def _time(fn, repeat: int):
+    latencies, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), result
+
+
+def _number(value) -> complex:
+    if isinstance(value, dict):  # {"re", "im"} from the numeric engine
+        return complex(_number(value["re"]).real, _number(value["im"]).real)
+    if isinstance(value, str):   # Fraction or SymPy expression
+        return complex(sp.N(sp.sympify(value)))
+    return complex(value)
+
+
+def _values(result) -> list:
+    """Flatten an engine result into complex numbers for comparison."""
+    if isinstance(result, dict) and not {"re", "im"} <= set(result):  # Exact eigenvalues: {value: multiplicity}
+        return [_number(k) for k, m in result.items() for _ in range(m)]
+    if isinstance(result, list):
+        return [z for item in result for z in _values(item)]
+    return [_number(result)]
+
+
+def _agree(exact, numeric, operation: str) -> bool:
+    a, b = _values(exact), _values(numeric)
+    if operation == "eigenvalues":
+        key = lambda z: (round(z.real, 6), round(z.imag, 6))
+        a, b = sorted(a, key=key), sorted(b, key=key)
+    return len(a) == len(b) and all(abs(x - y) <= 1e-6 * max(1.0, abs(x)) for x, y in zip(a, b))
+
+
+def run_benchmark(sizes: list, max_exact: int = 12, repeat: int = 3) -> None:
+    print(f"Auto mode: exact up to {Config.LINALG_EXACT_MAX_SIZE}×{Config.LINALG_EXACT_MAX_SIZE}, numeric above\n")
+    print(f"{'size':>5} {'operation':<12} {'exact_ms':>10} {'numeric_ms':>11} {'speedup':>8} {'agree':>6}  auto")
+    for size in sizes:
+        matrix = _matrix(size)
+        b = list(range(1, size + 1))
+        for operation in OPERATIONS:
+            kwargs = {"b": b} if operation == "solve" else {}
+            numeric_s, numeric = _time(lambda: compute(operation, matrix, method="numeric", **kwargs), repeat)
+            auto = "numeric" if size > Config.LINALG_EXACT_MAX_SIZE else "exact"
+            if size <= max_exact:
+                exact_s, exact = _time(lambda: compute(operation, matrix, method="exact", **kwargs), 1)
+                agree = "yes" if _agree(exact["result"], numeric["result"], operation) else "NO"
+                print(
+                    f"{size:>5} {operation:<12} {exact_s * 1000:>10.1f} {numeric_s * 1000:>11.2f} "
+                    f"{exact_s / numeric_s:>7.0f}x {agree:>6}  {auto}"
+                )
+            else:
+                print(f"{size:>5} {operation:<12} {'skipped':>10} {numeric_s * 1000:>11.2f} {'-':>8} {'-':>6}  {auto}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[2, 3, 4, 6, 8, 12, 16, 32, 64])
+    arg_parser.add_argument("--max-exact", type=int, default=12, help="Largest size timed with sp.Matrix")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per numeric measurement (median)")
+    args = arg_parser.parse_args()
+    run_benchmark(args.sizes, max_exact=args.max_exact, repeat=args.repeat)
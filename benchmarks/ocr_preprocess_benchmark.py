@@ -0,0 +1,78 @@
+# File: benchmarks/ocr_preprocess_benchmark.py
+"""
+Benchmark: EasyOCR latency and confidence with and without the
+preprocessing stage in core/image_preprocessing.py.
+
+Usage (from the repo root):
+    python -m benchmarks.ocr_preprocess_benchmark path/to/problem_photos [--repeat 3]
+
+Every .png/.jpg/.jpeg/.webp file in the directory is OCR'd once to warm up
+the model, then `--repeat` times per mode. Reports per-image and aggregate
+latency and mean OCR confidence. The extraction cache is bypassed, so every
+run is real OCR.
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from core.multimodal import _get_ocr_reader, process_image_input
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def _time_ocr(image_bytes: bytes, preprocess: bool, repeat: int) -> dict:
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = process_image_input(image_bytes, preprocess=preprocess, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "latency": statistics.median(latencies),
+        "confidence": result["confidence"],
+    }
+
+
+def run_benchmark(corpus_dir: Path, repeat: int = 3) -> None:
+    images = sorted(p for p in corpus_dir.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not images:
+        print(f"No images found in {corpus_dir}")
+        return
+
+    # Load the model outside of the timed region
+    _get_ocr_reader()
+
+    rows = []
+    for path in images:
+        data = path.read_bytes()
+        process_image_input(data, preprocess=False, use_cache=False)  # warm-up
+        before = _time_ocr(data, preprocess=False, repeat=repeat)
+        after = _time_ocr(data, preprocess=True, repeat=repeat)
+        rows.append((path.name, before, after))
+
+    print(f"{'image':<40} {'before(s)':>10} {'after(s)':>10} {'speedup':>8} {'conf before':>12} {'conf after':>11}")
+    for name, before, after in rows:
+        speedup = before["latency"] / after["latency"] if after["latency"] else float("inf")
+        print(
+            f"{name[:40]:<40} {before['latency']:>10.3f} {after['latency']:>10.3f} {speedup:>7.2f}x "
+            f"{before['confidence']:>12.3f} {after['confidence']:>11.3f}"
+        )
+
+    total_before = sum(r[1]["latency"] for r in rows)
+    total_after = sum(r[2]["latency"] for r in rows)
+    print()
+    print(f"Images: {len(rows)}")
+    print(f"Total latency: before {total_before:.2f}s, after {total_after:.2f}s "
+          f"({total_before / total_after if total_after else float('inf'):.2f}x)")
+    print(f"Mean confidence: before {statistics.mean(r[1]['confidence'] for r in rows):.3f}, "
+          f"after {statistics.mean(r[2]['confidence'] for r in rows):.3f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("corpus_dir", type=Path, help="Directory of sample problem photos")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per image and mode")
+    args = arg_parser.parse_args()
+    run_benchmark(args.corpus_dir, repeat=args.repeat)
@@ -0,0 +1,107 @@
+# File: benchmarks/parse_route_comparison.py
+"""
+Compare the two-call parse → route path with the fused parse+route agent.
+
+Usage (from the repo root, needs GROQ_API_KEY):
+    python -m benchmarks.parse_route_comparison [--corpus benchmarks/problems.jsonl] [--repeat 1]
+
+For every problem, both paths are run and compared on:
+- topic (parser and router), needs_clarification, required_tools, rag_depth
+Latency is reported as mean / p50 / p95 per path.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from agents.parser_agent import parse_problem
+from agents.router_agent import route_problem
+from agents.parse_route_agent import parse_and_route
+
+DEFAULT_CORPUS = Path(__file__).parent / "problems.jsonl"
+COMPARED_FIELDS = [
+    ("parsed", "topic"),
+    ("parsed", "needs_clarification"),
+    ("routing", "topic"),
+    ("routing", "required_tools"),
+    ("routing", "rag_depth"),
+]
+
+
+def load_corpus(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _two_call(raw_text: str):
+    parsed = parse_problem(raw_text)
+    routing = route_problem(parsed)
+    return parsed, routing
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _normalize(value):
+    return sorted(value) if isinstance(value, list) else value
+
+
+def run_comparison(corpus_path: Path, repeat: int = 1) -> None:
+    problems = load_corpus(corpus_path)
+    latencies = {"two_call": [], "fused": []}
+    agreement = {field: 0 for field in COMPARED_FIELDS}
+    total = 0
+
+    for item in problems:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            two_parsed, two_routing = _two_call(item["problem"])
+            latencies["two_call"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            fused_parsed, fused_routing = parse_and_route(item["problem"])
+            latencies["fused"].append(time.perf_counter() - start)
+
+            results = {
+                "two_call": {"parsed": two_parsed, "routing": two_routing},
+                "fused": {"parsed": fused_parsed, "routing": fused_routing},
+            }
+            total += 1
+            mismatches = []
+            for section, key in COMPARED_FIELDS:
+                a = _normalize(results["two_call"][section].get(key))
+                b = _normalize(results["fused"][section].get(key))
+                if a == b:
+                    agreement[(section, key)] += 1
+                else:
+                    mismatches.append(f"{section}.{key}: {a!r} vs {b!r}")
+            if mismatches:
+                print(f"[{item.get('id', '?')}] " + "; ".join(mismatches))
+
+    print()
+    print(f"Problems: {len(problems)} x {repeat} run(s)")
+    print("Agreement (two-call vs fused):")
+    for (section, key), count in agreement.items():
+        print(f"  {section}.{key:<22} {count}/{total} ({count / total:.0%})")
+
+    print("Latency (s):")
+    for path, values in latencies.items():
+        print(
+            f"  {path:<9} mean {statistics.mean(values):.3f}  p50 {_percentile(values, 50):.3f}  "
+            f"p95 {_percentile(values, 95):.3f}"
+        )
+    speedup = statistics.mean(latencies["two_call"]) / statistics.mean(latencies["fused"])
+    print(f"  fused speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSONL with a 'problem' field per line")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="Runs per problem and path")
+    args = arg_parser.parse_args()
+    run_comparison(args.corpus, repeat=args.repeat)
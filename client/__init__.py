@@ -0,0 +1,6 @@
+# File: client/__init__.py
+"""Python client SDK for the solve API (see client/solve_client.py and client/loadgen.py)."""
+
+from client.solve_client import AsyncSolveClient, SolveAPIError, SolveClient
+
+__all__ = ["AsyncSolveClient", "SolveAPIError", "SolveClient"]
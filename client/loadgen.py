@@ -0,0 +1,190 @@
+# File: client/loadgen.py
+"""
+Load generator for capacity testing, built on AsyncSolveClient.
+
+Usage (from the repo root, against a running API):
+    python -m client.loadgen [--url http://localhost:8000] [--corpus benchmarks/problems.jsonl]
+        [--concurrency 16 | --rate 5] [--duration 60 | --requests 200]
+        [--batch-size 1] [--priority interactive] [--profile fast] [--retries 0] [--json out.json]
+
+Modes:
+- closed loop (default): --concurrency workers each send the next problem as
+  soon as their previous one returns. This measures peak throughput.
+- open loop (--rate R): problems arrive as a Poisson process at R per second,
+  whether or not earlier ones have finished. This shows how latency and
+  shedding (429) behave at a given offered load.
+
+With --batch-size > 1, each unit of work is one POST /solve/batch of that many
+problems (closed loop only). Retries default to 0, so every 429 the admission
+layer returns is counted instead of being hidden by the client.
+
+Reports completed units, throughput, client latency (mean / p50 / p95 / p99),
+response statuses, server-reported queue wait and service time (response["timing"]),
+and the client's request/retry counters.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from collections import Counter
+
+from client.solve_client import DEFAULT_BASE_URL, AsyncSolveClient, SolveAPIError
+
+
+def _load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["problem"] for line in f if line.strip()]
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(values: list) -> dict:
+    if not values:
+        return {}
+    return {
+        "mean": statistics.mean(values),
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "p99": _percentile(values, 99),
+    }
+
+
+class LoadRecorder:
+    """Per-unit outcomes collected while the load runs."""
+
+    def __init__(self):
+        self.latencies, self.queue_wait_ms, self.service_ms = [], [], []
+        self.statuses = Counter()
+
+    def record(self, started: float, results: list):
+        self.latencies.append(time.perf_counter() - started)
+        for result in results:
+            self.statuses[result.get("status", "unknown")] += 1
+            timing = result.get("timing") or {}
+            if "queue_wait_ms" in timing:
+                self.queue_wait_ms.append(timing["queue_wait_ms"])
+                self.service_ms.append(timing["service_ms"])
+
+    def record_error(self, started: float, error: Exception, size: int):
+        self.latencies.append(time.perf_counter() - started)
+        status = f"http_{error.status_code}" if isinstance(error, SolveAPIError) else type(error).__name__
+        self.statuses[status] += size
+
+
+async def _send(client: AsyncSolveClient, problems: list, recorder: LoadRecorder, options: dict):
+    started = time.perf_counter()
+    try:
+        if len(problems) == 1:
+            results = [await client.solve(problems[0], fetch_explanation=False, **options)]
+        else:
+            results = await client.send_batch(problems, options)
+    except Exception as e:
+        recorder.record_error(started, e, len(problems))
+    else:
+        recorder.record(started, results)
+
+
+async def run_load(args) -> dict:
+    corpus = _load_corpus(args.corpus)
+    options = {"profile": args.profile, "priority": args.priority, "deadline_seconds": args.deadline}
+    recorder = LoadRecorder()
+    problems = itertools.cycle(corpus)
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    remaining = args.requests
+
+    def more() -> bool:
+        nonlocal remaining
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining is not None:
+            if remaining <= 0:
+                return False
+            remaining -= 1
+        return True
+
+    async with AsyncSolveClient(args.url, max_connections=args.connections, max_retries=args.retries) as client:
+        if args.batch_size > 1 and not await client.batch_supported():
+            print("Server has no /solve/batch endpoint; sending single problems")
+            args.batch_size = 1
+        started = time.perf_counter()
+
+        if args.rate:
+            # Open loop: arrivals do not wait for completions
+            tasks = []
+            while more():
+                tasks.append(asyncio.create_task(_send(client, [next(problems)], recorder, options)))
+                await asyncio.sleep(random.expovariate(args.rate))
+            await asyncio.gather(*tasks)
+        else:
+            async def worker():
+                while more():
+                    await _send(client, [next(problems) for _ in range(args.batch_size)], recorder, options)
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+        elapsed = time.perf_counter() - started
+        client_stats = dict(client.stats)
+
+    completed = sum(recorder.statuses.values())
+    return {
+        "mode": f"open loop @ {args.rate}/s" if args.rate else f"closed loop x{args.concurrency}",
+        "batch_size": args.batch_size,
+        "elapsed_s": elapsed,
+        "units": len(recorder.latencies),
+        "problems": completed,
+        "throughput_per_s": recorder.statuses.get("success", 0) / elapsed if elapsed else 0.0,
+        "latency_s": _summary(recorder.latencies),
+        "statuses": dict(recorder.statuses),
+        "server_queue_wait_ms": _summary(recorder.queue_wait_ms),
+        "server_service_ms": _summary(recorder.service_ms),
+        "client": client_stats,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{report['mode']}, batch size {report['batch_size']}: {report['units']} units, "
+          f"{report['problems']} problems in {report['elapsed_s']:.1f}s")
+    print(f"  throughput     {report['throughput_per_s']:.2f} successful problems/s")
+    for label, key, unit in (("latency", "latency_s", "s"), ("queue wait", "server_queue_wait_ms", "ms"),
+                             ("service", "server_service_ms", "ms")):
+        s = report[key]
+        if s:
+            print(f"  {label:<14} mean {s['mean']:.3f}  p50 {s['p50']:.3f}  p95 {s['p95']:.3f}  p99 {s['p99']:.3f} ({unit})")
+    print(f"  statuses       {report['statuses']}")
+    print(f"  client         {report['client']}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--url", default=DEFAULT_BASE_URL)
+    arg_parser.add_argument("--corpus", default="benchmarks/problems.jsonl")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop workers")
+    arg_parser.add_argument("--rate", type=float, default=None, help="Open-loop arrivals per second")
+    arg_parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run (0 = until --requests)")
+    arg_parser.add_argument("--requests", type=int, default=None, help="Stop after this many units")
+    arg_parser.add_argument("--batch-size", type=int, default=1, help="Problems per POST /solve/batch")
+    arg_parser.add_argument("--priority", default="interactive", choices=["interactive", "batch"])
+    arg_parser.add_argument("--profile", default=None)
+    arg_parser.add_argument("--deadline", type=float, default=None, help="deadline_seconds sent with each problem")
+    arg_parser.add_argument("--connections", type=int, default=64, help="Client connection pool size")
+    arg_parser.add_argument("--retries", type=int, default=0, help="Client retries (0 counts every 429)")
+    arg_parser.add_argument("--json", default=None, help="Also write the report to this file")
+    args = arg_parser.parse_args()
+    if args.rate and args.batch_size > 1:
+        arg_parser.error("--batch-size applies to closed-loop mode only")
+    if not args.duration and args.requests is None:
+        arg_parser.error("give --duration or --requests")
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
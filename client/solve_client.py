@@ -0,0 +1,388 @@
+# File: client/solve_client.py
+"""
+Pooled sync and asyncio clients for the solve API.
+
+Callers used to open a new connection with requests.post for every problem,
+which paid a TCP (and, in production, TLS) handshake on each click and had no
+retry behaviour at all. Both clients here share one httpx connection pool per
+instance, so create one client and reuse it (e.g. as a module-level singleton).
+
+- Keep-alive: idle connections stay open for KEEPALIVE_EXPIRY seconds
+- Retries: connection failures and 429/502/503/504 are retried with jittered
+  exponential backoff. A Retry-After header (sent by the admission layer) is
+  used instead of the backoff when present. A POST is re-sent after a transport
+  error only if the request never left the client (connect/pool errors),
+  because otherwise the server may still be solving the problem.
+- Batching: solve_batch() / iter_solve() send problems to POST /solve/batch in
+  chunks of `batch_size` when the server has that endpoint (checked once via
+  /openapi.json). Otherwise each problem goes to POST /solve/text. Problems the
+  server sheds inside a batch are resubmitted after their retry_after.
+- Streaming: iter_solve() (sync) and stream_solve() (async) yield
+  (index, result) pairs as chunks complete, so callers can render results
+  before the slowest problem finishes.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+DEFAULT_BASE_URL = os.getenv("SOLVE_API_URL", "http://localhost:8000")
+DEFAULT_TIMEOUT = 120.0            # Seconds; the server's own deadline is REQUEST_DEADLINE_SECONDS (90)
+CONNECT_TIMEOUT = 5.0
+MAX_CONNECTIONS = 16
+KEEPALIVE_EXPIRY = 60.0            # Seconds an idle pooled connection is kept open
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5                 # First retry waits up to this long; doubles per attempt
+BACKOFF_MAX = 30.0
+BATCH_SIZE = 8                     # Problems per POST /solve/batch (server limit: BATCH_MAX_PROBLEMS)
+RETRY_STATUSES = {429, 502, 503, 504}
+FILE_KINDS = ("image", "worksheet", "audio")
+
+
+class SolveAPIError(Exception):
+    """Non-2xx response (after retries) from the solve API."""
+
+    def __init__(self, status_code: int, detail, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _decode(response: httpx.Response) -> dict:
+    """JSON body of a successful response; SolveAPIError otherwise."""
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail")
+        except ValueError:
+            detail = response.text
+        raise SolveAPIError(response.status_code, detail, _retry_after(response))
+    return response.json()
+
+
+def _retryable_error(error: httpx.TransportError, method: str) -> bool:
+    # Only errors raised before the request was sent are safe for a POST: after that the
+    # server may already be solving it, and re-sending would solve the problem twice
+    return method == "GET" or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+class _SolveClientBase:
+    """Settings, request bodies and retry decisions shared by both clients."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+        max_retries: int = MAX_RETRIES,
+        batch_size: int = BATCH_SIZE,
+        profile: Optional[str] = None,
+        fetch_explanation: bool = False,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.batch_size = max(1, batch_size)
+        self.profile = profile
+        self.fetch_explanation = fetch_explanation
+        self._client_options = {
+            "base_url": self.base_url,
+            "timeout": httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            "headers": {"Accept": "application/json"},
+        }
+        self._batch_supported: Optional[bool] = None
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "batches": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Server-provided Retry-After if any, else full-jitter exponential backoff."""
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def _text_body(self, problem: str, **options) -> dict:
+        body = {"problem": problem, "profile": options.get("profile") or self.profile}
+        for key in ("priority", "session_id", "deadline_seconds"):
+            if options.get(key) is not None:
+                body[key] = options[key]
+        return {k: v for k, v in body.items() if v is not None}
+
+    def _batch_body(self, problems: Sequence[str], **options) -> dict:
+        body = {
+            "problems": list(problems),
+            "profile": options.get("profile") or self.profile,
+            "deadline_seconds": options.get("deadline_seconds"),
+        }
+        return {k: v for k, v in body.items() if v is not None}
+
+    def _chunks(self, count: int) -> List[List[int]]:
+        size = self.batch_size if self._batch_supported else 1
+        return [list(range(start, min(start + size, count))) for start in range(0, count, size)]
+
+    def _needs_explanation(self, result: dict, fetch: Optional[bool]) -> bool:
+        fetch = self.fetch_explanation if fetch is None else fetch
+        return bool(fetch and result.get("status") == "success" and not result.get("explanation")
+                    and result.get("solution_id"))
+
+    @staticmethod
+    def _file_payload(data: Union[bytes, str, Path], kind: str) -> Tuple[str, bytes]:
+        if kind not in FILE_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(FILE_KINDS)}")
+        if isinstance(data, (str, Path)):
+            return Path(data).name, Path(data).read_bytes()
+        return f"upload.{'wav' if kind == 'audio' else 'png'}", data
+
+
+class SolveClient(_SolveClientBase):
+    """
+    Thread-safe pooled client; share one instance across threads.
+
+        with SolveClient("http://localhost:8000") as client:
+            result = client.solve("Solve x^2 - 5x + 6 = 0")
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.Client(**self._client_options)
+
+    def close(self):
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            try:
+                response = self._http.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries or not _retryable_error(e, method):
+                    self._count("failures")
+                    raise
+                delay = self._delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    try:
+                        return _decode(response)
+                    except SolveAPIError:
+                        self._count("failures")
+                        raise
+                delay = self._delay(attempt, _retry_after(response))
+            self._count("retries")
+            time.sleep(delay)
+
+    def batch_supported(self) -> bool:
+        """Whether the server exposes POST /solve/batch (checked once per client)."""
+        if self._batch_supported is None:
+            try:
+                self._batch_supported = "/solve/batch" in self._request("GET", "/openapi.json").get("paths", {})
+            except (httpx.HTTPError, SolveAPIError, ValueError):
+                self._batch_supported = False
+        return self._batch_supported
+
+    def solve(self, problem: str, fetch_explanation: Optional[bool] = None, **options) -> dict:
+        """POST /solve/text. Options: profile, priority, session_id, deadline_seconds."""
+        result = self._request("POST", "/solve/text", json=self._text_body(problem, **options))
+        if self._needs_explanation(result, fetch_explanation):
+            result["explanation"] = self.explanation(result["solution_id"]).get("explanation") or ""
+        return result
+
+    def solve_file(self, data: Union[bytes, str, Path], kind: str = "image", **options) -> dict:
+        """POST /solve/{image|worksheet|audio}. Options: profile, session_id, deadline_seconds."""
+        filename, content = self._file_payload(data, kind)
+        params = {k: v for k, v in {**options, "profile": options.get("profile") or self.profile}.items() if v is not None}
+        return self._request("POST", f"/solve/{kind}", files={"file": (filename, content)}, params=params)
+
+    def explanation(self, solution_id: str, wait: bool = True) -> dict:
+        return self._request("GET", f"/explanations/{solution_id}", params={"wait": str(wait).lower()})
+
+    def send_batch(self, problems: List[str], options: dict) -> List[dict]:
+        """One POST /solve/batch (a plain /solve/text without the endpoint); shed problems are resubmitted."""
+        if len(problems) == 1 and not self._batch_supported:
+            return [self.solve(problems[0], **options)]
+
+        self._count("batches")
+        results = self._request("POST", "/solve/batch", json=self._batch_body(problems, **options))["results"]
+        # Resubmit only the problems the server shed, after the longest requested wait
+        for attempt in range(self.max_retries):
+            shed = [i for i, result in enumerate(results) if result.get("status") == "rejected"]
+            if not shed:
+                break
+            self._count("retries")
+            time.sleep(self._delay(attempt, max(results[i].get("retry_after", 0) for i in shed)))
+            retried = self._request("POST", "/solve/batch", json=self._batch_body([problems[i] for i in shed], **options))
+            for i, result in zip(shed, retried["results"]):
+                results[i] = result
+        return results
+
+    def iter_solve(
+        self, problems: Sequence[str], concurrency: Optional[int] = None, **options
+    ) -> Iterator[Tuple[int, dict]]:
+        """
+        Solve many problems, yielding (index, result) as each chunk completes.
+        A chunk that fails after retries yields {"status": "error", "error": ...} per problem.
+        """
+        if not problems:
+            return
+        self.batch_supported()
+        chunks = self._chunks(len(problems))
+        workers = max(1, min(concurrency or self.max_connections, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solve-client") as pool:
+            futures = {pool.submit(self.send_batch, [problems[i] for i in chunk], options): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except (httpx.HTTPError, SolveAPIError) as e:
+                    results = [{"status": "error", "error": str(e)}] * len(futures[future])
+                yield from zip(futures[future], results)
+
+    def solve_batch(self, problems: Sequence[str], concurrency: Optional[int] = None, **options) -> List[dict]:
+        """Solve many problems; results in input order."""
+        results = [None] * len(problems)
+        for index, result in self.iter_solve(problems, concurrency=concurrency, **options):
+            results[index] = result
+        return results
+
+
+class AsyncSolveClient(_SolveClientBase):
+    """
+    asyncio counterpart of SolveClient; use from a single event loop.
+
+        async with AsyncSolveClient() as client:
+            async for index, result in client.stream_solve(problems):
+                ...
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.AsyncClient(**self._client_options)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            try:
+                response = await self._http.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries or not _retryable_error(e, method):
+                    self._count("failures")
+                    raise
+                delay = self._delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    try:
+                        return _decode(response)
+                    except SolveAPIError:
+                        self._count("failures")
+                        raise
+                delay = self._delay(attempt, _retry_after(response))
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+    async def batch_supported(self) -> bool:
+        if self._batch_supported is None:
+            try:
+                paths = (await self._request("GET", "/openapi.json")).get("paths", {})
+                self._batch_supported = "/solve/batch" in paths
+            except (httpx.HTTPError, SolveAPIError, ValueError):
+                self._batch_supported = False
+        return self._batch_supported
+
+    async def solve(self, problem: str, fetch_explanation: Optional[bool] = None, **options) -> dict:
+        result = await self._request("POST", "/solve/text", json=self._text_body(problem, **options))
+        if self._needs_explanation(result, fetch_explanation):
+            result["explanation"] = (await self.explanation(result["solution_id"])).get("explanation") or ""
+        return result
+
+    async def solve_file(self, data: Union[bytes, str, Path], kind: str = "image", **options) -> dict:
+        filename, content = self._file_payload(data, kind)
+        params = {k: v for k, v in {**options, "profile": options.get("profile") or self.profile}.items() if v is not None}
+        return await self._request("POST", f"/solve/{kind}", files={"file": (filename, content)}, params=params)
+
+    async def explanation(self, solution_id: str, wait: bool = True) -> dict:
+        return await self._request("GET", f"/explanations/{solution_id}", params={"wait": str(wait).lower()})
+
+    async def send_batch(self, problems: List[str], options: dict) -> List[dict]:
+        if len(problems) == 1 and not self._batch_supported:
+            return [await self.solve(problems[0], **options)]
+
+        self._count("batches")
+        results = (await self._request("POST", "/solve/batch", json=self._batch_body(problems, **options)))["results"]
+        for attempt in range(self.max_retries):
+            shed = [i for i, result in enumerate(results) if result.get("status") == "rejected"]
+            if not shed:
+                break
+            self._count("retries")
+            await asyncio.sleep(self._delay(attempt, max(results[i].get("retry_after", 0) for i in shed)))
+            body = self._batch_body([problems[i] for i in shed], **options)
+            for i, result in zip(shed, (await self._request("POST", "/solve/batch", json=body))["results"]):
+                results[i] = result
+        return results
+
+    async def stream_solve(
+        self, problems: Sequence[str], concurrency: Optional[int] = None, **options
+    ) -> AsyncIterator[Tuple[int, dict]]:
+        """Solve many problems, yielding (index, result) as each chunk completes."""
+        if not problems:
+            return
+        await self.batch_supported()
+        chunks = self._chunks(len(problems))
+        semaphore = asyncio.Semaphore(max(1, min(concurrency or self.max_connections, len(chunks))))
+
+        async def run(chunk: List[int]) -> Tuple[List[int], List[dict]]:
+            async with semaphore:
+                try:
+                    return chunk, await self.send_batch([problems[i] for i in chunk], options)
+                except (httpx.HTTPError, SolveAPIError) as e:
+                    return chunk, [{"status": "error", "error": str(e)}] * len(chunk)
+
+        for next_done in asyncio.as_completed([run(chunk) for chunk in chunks]):
+            chunk, results = await next_done
+            for item in zip(chunk, results):
+                yield item
+
+    async def solve_batch(self, problems: Sequence[str], concurrency: Optional[int] = None, **options) -> List[dict]:
+        results: List[Optional[Dict]] = [None] * len(problems)
+        async for index, result in self.stream_solve(problems, concurrency=concurrency, **options):
+            results[index] = result
+        return results
+
+
+if __name__ == "__main__":
+    with SolveClient() as client:
+        print(client.solve("Solve the quadratic equation x^2 - 5x + 6 = 0."))
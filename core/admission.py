@@ -0,0 +1,209 @@
+# File: core/admission.py
+"""
+Admission control and priority scheduling in front of run_pipeline.
+
+Under load spikes every request used to go straight into the pipeline and
+pile up on upstream LLM rate limits, so everyone timed out. This layer:
+
+- Keeps a bounded queue per priority class:
+    interactive (text) > batch > heavy (image / audio)
+- Paces pipeline starts with a token bucket sized to the LLM quota
+  (Config.ADMISSION_LLM_REQUESTS_PER_MINUTE, one pipeline ≈ ADMISSION_LLM_CALLS_PER_REQUEST calls)
+- Rejects early (AdmissionRejected → HTTP 429 + Retry-After) when the queue is full
+  or the estimated wait exceeds Config.ADMISSION_MAX_WAIT_SECONDS
+- Reports queue wait time separately from service time
+
+All scheduling state lives on the event loop, so no locks are needed.
+The quota is per API process: divide the provider quota by the number of workers.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import Config
+
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1, "heavy": 2}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket; refills continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, amount: float) -> bool:
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def seconds_until(self, amount: float) -> float:
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+class AdmissionController:
+    """Bounded priority queue + concurrency limit + token-bucket pacing."""
+
+    def __init__(self):
+        self.cost = Config.ADMISSION_LLM_CALLS_PER_REQUEST
+        rate = Config.ADMISSION_LLM_REQUESTS_PER_MINUTE / 60.0
+        self.bucket = TokenBucket(rate=rate, capacity=max(self.cost, rate * Config.ADMISSION_BURST_SECONDS))
+        self.max_concurrency = Config.ADMISSION_MAX_CONCURRENCY
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._queued = {name: 0 for name in PRIORITY_CLASSES}
+        self._running = 0
+        self._wakeup = None
+
+        self._stats = {
+            name: {"admitted": 0, "rejected": 0, "queue_wait_s": 0.0, "service_s": 0.0, "completed": 0}
+            for name in PRIORITY_CLASSES
+        }
+
+    # -----------------------------
+    # Admission decision
+    # -----------------------------
+    def _estimated_wait(self, priority: int) -> float:
+        """Seconds until a new request of this priority would start, from the bucket rate."""
+        ahead = sum(1 for p, _, _, _ in self._heap if p <= priority)
+        return self.bucket.seconds_until(self.cost * (ahead + 1))
+
+    def _admit(self, priority_class: str) -> asyncio.Future:
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        priority = PRIORITY_CLASSES[priority_class]
+
+        estimated_wait = self._estimated_wait(priority)
+        queue_full = self._queued[priority_class] >= Config.ADMISSION_QUEUE_LIMITS[priority_class]
+        if queue_full or estimated_wait > Config.ADMISSION_MAX_WAIT_SECONDS:
+            self._stats[priority_class]["rejected"] += 1
+            retry_after = max(1, math.ceil(estimated_wait))
+            raise AdmissionRejected(
+                f"Server busy ({priority_class} queue: {self._queued[priority_class]}), "
+                f"retry in {retry_after}s",
+                retry_after=retry_after,
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._sequence), priority_class, future))
+        self._queued[priority_class] += 1
+        self._stats[priority_class]["admitted"] += 1
+        self._dispatch()
+        return future
+
+    # -----------------------------
+    # Dispatch
+    # -----------------------------
+    def _dispatch(self):
+        """Start as many queued requests as concurrency and tokens allow."""
+        while self._heap and self._running < self.max_concurrency:
+            _, _, priority_class, future = self._heap[0]
+            if future.cancelled():
+                heapq.heappop(self._heap)
+                self._queued[priority_class] -= 1
+                continue
+            if not self.bucket.try_take(self.cost):
+                self._schedule_wakeup(self.bucket.seconds_until(self.cost))
+                return
+            heapq.heappop(self._heap)
+            self._queued[priority_class] -= 1
+            self._running += 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float):
+        if self._wakeup is not None and not self._wakeup.cancelled():
+            return
+        loop = asyncio.get_running_loop()
+
+        def wake():
+            self._wakeup = None
+            self._dispatch()
+
+        self._wakeup = loop.call_later(delay, wake)
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    async def run(self, priority_class: str, fn: Callable, *args) -> Tuple[Any, Dict[str, float]]:
+        """
+        Queue `fn(*args)` (run in a worker thread) under admission control.
+        Returns (result, {"queue_wait_ms", "service_ms"}); raises AdmissionRejected on overload.
+        """
+        enqueued = time.perf_counter()
+        ticket = self._admit(priority_class)
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            # Client went away while queued; _dispatch skips cancelled tickets
+            if ticket.done() and not ticket.cancelled():
+                self._release()
+            raise
+
+        started = time.perf_counter()
+        try:
+            result = await run_in_threadpool(fn, *args)
+        finally:
+            self._release()
+        finished = time.perf_counter()
+
+        stats = self._stats[priority_class]
+        stats["completed"] += 1
+        stats["queue_wait_s"] += started - enqueued
+        stats["service_s"] += finished - started
+
+        return result, {
+            "queue_wait_ms": round((started - enqueued) * 1000, 1),
+            "service_ms": round((finished - started) * 1000, 1),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        per_class = {}
+        for name, s in self._stats.items():
+            completed = s["completed"] or 1
+            per_class[name] = {
+                "queued": self._queued[name],
+                "admitted": s["admitted"],
+                "rejected": s["rejected"],
+                "completed": s["completed"],
+                "avg_queue_wait_ms": round(s["queue_wait_s"] / completed * 1000, 1),
+                "avg_service_ms": round(s["service_s"] / completed * 1000, 1),
+            }
+        return {
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "classes": per_class,
+        }
+
+
+# One controller per API process
+admission = AdmissionController()
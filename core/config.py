@@ -31,10 +31,53 @@ class Config:
     LLM_TEMPERATURE: float = 0.2  # Low temperature for consistent, deterministic reasoning
     LLM_MAX_TOKENS: int = 2048
 
+    # Model cascade: tiers are tried in order per agent; later tiers are only used on escalation
+    # (solver fallback or verifier confidence below VERIFIER_CONFIDENCE_THRESHOLD)
+    MODEL_TIERS = {
+        "small": os.getenv("LLM_MODEL_SMALL", "llama-3.1-8b-instant"),
+        "large": LLM_MODEL,
+    }
+    AGENT_MODEL_TIERS = {
+        "parser": ["large"],
+        "router": ["large"],
+        "solver": ["small", "large"],
+        "verifier": ["small", "large"],
+        "explainer": ["large"],
+    }
+
+    # -----------------------------
+    # Agent LLM resilience (core/resilience.py)
+    # -----------------------------
+    # timeout: overall deadline per agent call, retries included
+    # hedge: send a duplicate request once a call runs longer than its recent p95
+    AGENT_RESILIENCE = {
+        "parser": {"timeout": 20.0, "retries": 2, "hedge": True},
+        "router": {"timeout": 15.0, "retries": 2, "hedge": True},
+        "solver": {"timeout": 60.0, "retries": 1, "hedge": False},  # Whole tool-calling loop; duplicates are expensive
+        "verifier": {"timeout": 20.0, "retries": 2, "hedge": True},
+        "explainer": {"timeout": 30.0, "retries": 1, "hedge": True},
+    }
+    RETRY_BACKOFF_BASE_SECONDS: float = 0.5     # Full-jitter backoff: uniform(0, base * 2^attempt)
+    RETRY_BACKOFF_MAX_SECONDS: float = 4.0
+    HEDGE_MIN_SAMPLES: int = 20                 # Successful calls observed before hedging starts
+    HEDGE_MIN_DELAY_SECONDS: float = 0.5        # Never hedge earlier than this
+    LATENCY_WINDOW: int = 200                   # Recent calls per agent/model used for the p95
+    CIRCUIT_FAILURE_THRESHOLD: int = 5          # Consecutive provider failures that open the circuit
+    CIRCUIT_OPEN_SECONDS: float = 30.0          # Serve fallbacks this long before a half-open probe
+    RESILIENCE_MAX_THREADS: int = 64            # Threads running (and hedging) LLM calls
+
     # -----------------------------
     # Embedding Model (local, no API key needed)
     # -----------------------------
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Small, fast, good for semantic similarity
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch" (sentence-transformers) | "onnx"
+    EMBEDDING_QUERY_BATCH_SIZE: int = 32          # Max concurrent queries fused into one forward pass
+    EMBEDDING_QUERY_BATCH_WINDOW_MS: float = float(os.getenv("EMBEDDING_QUERY_BATCH_WINDOW_MS", "0"))  # Extra wait to fill a batch (0 = only queries already queued)
+    ONNX_MODEL_DIR: Path = Path("data/onnx")      # Exported (and quantized) models, built on first use
+    ONNX_QUANTIZE: bool = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"  # Dynamic int8 weights
+    ONNX_MAX_SEQ_LENGTH: int = 256                # Same truncation as the sentence-transformers model
+    ONNX_BATCH_SIZE: int = 64                     # Documents per forward pass
+    ONNX_THREADS: int = int(os.getenv("ONNX_THREADS", "0"))  # Intra-op threads (0 = onnxruntime default)
 
     # -----------------------------
     # Thresholds for HITL triggers
@@ -44,6 +87,82 @@ class Config:
     PARSER_AMBIGUITY_THRESHOLD: float = 0.8  # Parser confidence below this → needs_clarification = True
     VERIFIER_CONFIDENCE_THRESHOLD: float = 0.85  # Below this → trigger HITL
 
+    # Monte Carlo cross-check for probability answers (core/probability_check.py)
+    PROB_CHECK_ENABLED: bool = os.getenv("PROB_CHECK_ENABLED", "true").lower() == "true"
+    PROB_CHECK_TRIALS: int = int(os.getenv("PROB_CHECK_TRIALS", 2_000_000))
+    PROB_CHECK_Z: float = 4.0              # Agreement half-width in standard errors (~1 in 15,000 false alarms)
+    PROB_CHECK_CONFIDENCE: float = 0.95    # Verifier confidence reported when the simulation agrees
+
+    # -----------------------------
+    # OCR Preprocessing (runs before EasyOCR)
+    # -----------------------------
+    OCR_PREPROCESS_ENABLED: bool = os.getenv("OCR_PREPROCESS_ENABLED", "true").lower() == "true"
+    OCR_TARGET_TEXT_HEIGHT: int = 32      # Median text line height (px) after downscaling
+    OCR_MAX_IMAGE_SIDE: int = 1600        # Hard cap on the longest side passed to OCR
+    OCR_ANALYSIS_MAX_SIDE: int = 800      # Working resolution for layout analysis (crop / line height)
+    OCR_CROP_PADDING: int = 12            # Margin (analysis px) kept around the detected text region
+    OCR_ROW_INK_DENSITY: float = 0.01     # Min fraction of ink pixels for a row/column to count as text
+
+    # Worksheet splitting (core/problem_segmentation.py, POST /solve/worksheet)
+    SEGMENT_MIN_GUTTER_LINES: float = 2.0   # Column gutter must be at least this many line heights wide
+    SEGMENT_MAX_PROBLEMS: int = 20          # Problems solved per upload (the rest are dropped)
+    SEGMENT_CUE_INDENT_LINES: float = 1.0   # A cue indented further than this from the column margin is a sub-item (MCQ option)
+    WORKSHEET_MAX_PARALLEL: int = int(os.getenv("WORKSHEET_MAX_PARALLEL", "4"))  # Pipelines run concurrently per page (job workers; the API admits each problem)
+
+    # -----------------------------
+    # Multimodal worker pool (python -m core.model_workers)
+    # -----------------------------
+    MULTIMODAL_WORKER_MODE: str = os.getenv("MULTIMODAL_WORKER_MODE", "local")  # "local" (in-process) | "pool"
+    MULTIMODAL_WORKERS: int = int(os.getenv("MULTIMODAL_WORKERS", "2"))        # Model worker processes per pod
+    MULTIMODAL_WORKER_HOST: str = os.getenv("MULTIMODAL_WORKER_HOST", "127.0.0.1")
+    MULTIMODAL_WORKER_PORT: int = int(os.getenv("MULTIMODAL_WORKER_PORT", "8765"))
+    MULTIMODAL_WORKER_AUTHKEY: bytes = os.getenv("MULTIMODAL_WORKER_AUTHKEY", "math-mentor").encode()
+    MULTIMODAL_PRELOAD = ["image", "audio", "embed"]  # Models each worker loads at startup
+    MULTIMODAL_CONCURRENCY = {"image": 8, "audio": 2, "embed": 32}  # Max in-flight jobs per modality
+    MULTIMODAL_SUPERVISE_SECONDS: float = 2.0  # How often dead worker processes are detected and replaced
+    MULTIMODAL_JOB_TIMEOUT: float = 120.0      # Seconds before a submitted job is abandoned
+
+    # -----------------------------
+    # Solved-problems memory service (python -m core.memory_service)
+    # -----------------------------
+    MEMORY_STORE_MODE: str = os.getenv("MEMORY_STORE_MODE", "local")  # "local" (in-process Chroma) | "service"
+    MEMORY_SERVICE_HOST: str = os.getenv("MEMORY_SERVICE_HOST", "127.0.0.1")
+    MEMORY_SERVICE_PORT: int = int(os.getenv("MEMORY_SERVICE_PORT", "8766"))
+    MEMORY_SERVICE_AUTHKEY: bytes = os.getenv("MEMORY_SERVICE_AUTHKEY", "math-mentor").encode()
+    MEMORY_SNAPSHOT_REFRESH_SECONDS: float = 2.0  # How often readers check the writer's version
+
+    # -----------------------------
+    # Admission control (core/admission.py), per API process
+    # -----------------------------
+    ADMISSION_LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("ADMISSION_LLM_REQUESTS_PER_MINUTE", "300"))
+    ADMISSION_LLM_CALLS_PER_REQUEST: int = 5      # Parser, router, solver, verifier, explainer
+    ADMISSION_BURST_SECONDS: float = 10.0         # Bucket capacity = this many seconds of quota
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+    ADMISSION_MAX_WAIT_SECONDS: float = 30.0      # Reject instead of queueing beyond this estimated wait
+    ADMISSION_QUEUE_LIMITS = {"interactive": 64, "batch": 32, "heavy": 16}
+    BATCH_MAX_PROBLEMS: int = 32                  # POST /solve/batch size limit (= batch queue limit)
+
+    # -----------------------------
+    # Request deadline budgets (core/deadline.py)
+    # -----------------------------
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "90"))  # Default and maximum per request
+    DISCONNECT_POLL_SECONDS: float = 0.25         # How often the API checks whether the client went away
+
+    # -----------------------------
+    # Model lifecycle (core/model_manager.py)
+    # -----------------------------
+    MODEL_IDLE_TTL_SECONDS: float = float(os.getenv("MODEL_IDLE_TTL_SECONDS", "900"))  # 0 = never unload
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))          # 0 = no budget
+    MODEL_REAPER_INTERVAL_SECONDS: float = 30.0
+
+    # -----------------------------
+    # Streaming ASR (/solve/audio/stream WebSocket)
+    # -----------------------------
+    ASR_SAMPLE_RATE: int = 16000               # Expected PCM rate (16-bit mono little-endian)
+    ASR_STREAM_MIN_SILENCE_MS: int = 500       # Pause that closes an utterance → transcribe it
+    ASR_STREAM_END_SILENCE_MS: int = 1200      # Pause after speech that means the student has stopped
+    ASR_STREAM_MAX_BUFFER_SECONDS: int = 20    # Force transcription if someone talks without pausing
+
     # -----------------------------
     # RAG Configuration
     # -----------------------------
@@ -54,6 +173,41 @@ class Config:
     CHUNK_OVERLAP: int = 200
     TOP_K_RETRIEVAL: int = 5
     TOP_K_MEMORY_RETRIEVAL: int = 3  # For similar solved problems
+    # Linear-algebra tool (core/numeric_linalg.py)
+    LINALG_EXACT_MAX_SIZE: int = int(os.getenv("LINALG_EXACT_MAX_SIZE", 6))  # Larger numeric matrices use NumPy
+    LINALG_RATIONALIZE_MAX_DENOMINATOR: int = 10_000
+    LINALG_RATIONALIZE_RTOL: float = 1e-9   # Widened by eps · cond(A) · n for ill-conditioned inputs
+    LINALG_RATIONALIZE_MAX_ENTRIES: int = 2500  # Larger numeric results are returned as floats
+
+    # Exact formula/construct lookup before the KB vector search (core/formula_index.py)
+    FORMULA_INDEX_ENABLED: bool = os.getenv("FORMULA_INDEX_ENABLED", "true").lower() == "true"
+    FORMULA_INDEX_MAX_RESULTS: int = 3
+    FORMULA_INDEX_VECTOR_K: int = 2       # KB vector results kept alongside exact formula-index hits
+
+    # Solver context packing (core/context_packer.py), in estimated tokens
+    CONTEXT_TOKEN_BUDGETS = {
+        "algebra": 500,
+        "probability": 700,      # Conditional/Bayes patterns need more worked context
+        "calculus": 500,
+        "linear_algebra": 500,
+    }
+    CONTEXT_TOKEN_BUDGET_DEFAULT: int = 600
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8    # Drop items whose 5-word shingles are ≥80% already included
+    CONTEXT_MIN_PARTIAL_TOKENS: int = 60    # Don't bother adding a truncated item smaller than this
+
+    # -----------------------------
+    # Pipeline profiles (selectable per request, enforced by run_pipeline)
+    # -----------------------------
+    # verifier: "always" | "on_low_certainty" (only when the solver fell back or produced no answer/steps)
+    PIPELINE_PROFILES = {
+        "fast": {"verifier": "on_low_certainty", "explainer": False},   # answer only, lowest latency
+        "balanced": {"verifier": "always", "explainer": False},         # verified answer, no tutoring text
+        "thorough": {"verifier": "always", "explainer": True},          # full pipeline
+    }
+    DEFAULT_PIPELINE_PROFILE: str = os.getenv("DEFAULT_PIPELINE_PROFILE", "thorough")
+
+    # "separate": parser and router are two LLM calls; "fused": one combined call (agents/parse_route_agent.py)
+    PARSE_ROUTE_MODE: str = os.getenv("PARSE_ROUTE_MODE", "separate")
 
     # -----------------------------
     # Topics supported (for routing and classification)
@@ -70,6 +224,55 @@ class Config:
     # -----------------------------
     DATA_DIR: Path = Path("data")
     SESSIONS_DIR: Path = DATA_DIR / "sessions"
+    SESSION_TTL_SECONDS: int = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+    SESSION_HISTORY_LIMIT: int = 50   # Messages kept per session
+
+    # -----------------------------
+    # Deferred explanations (agents/deferred_explainer.py, GET /explanations/{id})
+    # -----------------------------
+    EXPLANATION_MODE: str = os.getenv("EXPLANATION_MODE", "background")  # "inline" | "background" | "on_demand"
+    EXPLANATIONS_DIR: Path = DATA_DIR / "explanations"
+    EXPLANATION_WORKERS: int = 4
+    EXPLANATION_CACHE_SIZE: int = 500
+    EXPLANATION_TTL_SECONDS: int = 24 * 3600
+    EXPLANATION_WAIT_TIMEOUT: float = 60.0   # Max seconds GET /explanations/{id}?wait=true blocks
+    EXPLANATION_MAX_ATTEMPTS: int = 3        # Failed generations per solution before giving up
+
+    # -----------------------------
+    # Durable job queue (core/job_queue.py, python job_worker.py)
+    # -----------------------------
+    JOB_QUEUE_PATH: Path = DATA_DIR / "jobs.sqlite3"
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_RATE_PER_MINUTE: float = float(os.getenv("JOB_RATE_PER_MINUTE", "30"))  # Total job starts/min (0 = unpaced)
+    JOB_VISIBILITY_TIMEOUT: float = 600.0    # Lease length; an unfinished job is retried after this
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # Doubles on each failed attempt
+    JOB_RESULT_TTL_SECONDS: int = 24 * 3600
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # -----------------------------
+    # Multimodal extraction cache (skip OCR/ASR on repeated uploads)
+    # -----------------------------
+    EXTRACTION_CACHE_ENABLED: bool = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_PATH: Path = DATA_DIR / "extraction_cache.sqlite3"
+    EXTRACTION_CACHE_MAX_ENTRIES: int = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "2000"))
+    # Also match re-encoded images by perceptual hash. Off by default: same-layout worksheets
+    # with different problems can hash within a few bits of each other
+    EXTRACTION_CACHE_PHASH_ENABLED: bool = os.getenv("EXTRACTION_CACHE_PHASH_ENABLED", "false").lower() == "true"
+    EXTRACTION_CACHE_PHASH_MAX_DISTANCE: int = 2  # Max Hamming distance (of 512 bits, same pixel size required)
+
+    # -----------------------------
+    # Bulk import of pre-solved corpora (python -m memory.bulk_import)
+    # -----------------------------
+    BULK_IMPORT_WORKERS: int = int(os.getenv("BULK_IMPORT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    BULK_IMPORT_BATCH_SIZE: int = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "256"))  # Documents per embedding batch
+    BULK_IMPORT_CHECKPOINT_DIR: Path = DATA_DIR / "bulk_import"  # Resume offsets, one file per corpus
+
+    @classmethod
+    def model_for(cls, agent: str, level: int = 0) -> str:
+        """Model name for an agent at a cascade level (clamped to the agent's last tier)."""
+        tiers = cls.AGENT_MODEL_TIERS.get(agent, ["large"])
+        return cls.MODEL_TIERS[tiers[min(level, len(tiers) - 1)]]
 
     # Ensure required directories exist
     @classmethod
@@ -0,0 +1,136 @@
+# File: core/context_packer.py
+"""
+Token-budgeted context packing for the solver prompt.
+
+hybrid_retrieval() returns up to TOP_K_RETRIEVAL knowledge-base chunks plus
+TOP_K_MEMORY_RETRIEVAL full solved-problem documents (with steps, verifier
+issues and feedback). Joining all of it verbatim inflates every solver
+iteration, since the AgentExecutor resends the context on each tool step.
+
+The packer:
+1. Ranks retrieved items by relevance (Chroma returns distances: lower = closer)
+2. Trims solved-problem entries down to "Problem" + "Final answer"
+3. Drops items that mostly repeat already-selected text and strips the
+   chunk-overlap prefix shared with a neighbouring KB chunk
+4. Greedily fills a per-topic token budget (Config.CONTEXT_TOKEN_BUDGETS)
+
+Original item indices are kept in the rendered context so `used_sources`
+still refers to positions in the retrieved list.
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from core.config import Config
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/LaTeX-ish text)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _summarize_solved_problem(content: str) -> str:
+    """Keep only the problem statement and final answer of a memory document."""
+    problem = re.search(r"Problem:\s*(.+?)(?:\n[A-Z][\w ]*:|\Z)", content, re.S)
+    answer = re.search(r"Final answer:\s*(.+?)(?:\n[A-Z][\w ]*:|\Z)", content, re.S)
+    if not problem:
+        return content
+    summary = f"Similar solved problem: {problem.group(1).strip()}"
+    if answer:
+        summary += f"\nAnswer: {answer.group(1).strip()}"
+    return summary
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = re.findall(r"\w+|[^\w\s]", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _strip_overlap(previous: str, text: str, min_overlap: int = 40) -> str:
+    """Remove a prefix of `text` that repeats the end of `previous` (text-splitter overlap)."""
+    max_len = min(len(previous), len(text), Config.CHUNK_OVERLAP * 2)
+    for length in range(max_len, min_overlap - 1, -1):
+        if previous.endswith(text[:length]):
+            return text[length:].lstrip()
+    return text
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring a line boundary."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + " …"
+
+
+def pack_context(
+    retrieved: List[Dict],
+    topic: Optional[str] = None,
+    budget: Optional[int] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Build the solver's context string within the token budget.
+
+    Returns (context_str, stats) where stats has tokens_before / tokens_after /
+    items_before / items_kept.
+    """
+    if budget is None:
+        budget = Config.CONTEXT_TOKEN_BUDGETS.get(topic, Config.CONTEXT_TOKEN_BUDGET_DEFAULT)
+
+    unpacked = "\n\n".join(f"{i}. {c['content']}" for i, c in enumerate(retrieved))
+    stats = {
+        "tokens_before": estimate_tokens(unpacked),
+        "tokens_after": 0,
+        "items_before": len(retrieved),
+        "items_kept": 0,
+        "budget": budget,
+    }
+    if not retrieved:
+        return "No context.", stats
+
+    ranked = sorted(
+        enumerate(retrieved),
+        key=lambda pair: pair[1].get("relevance_score", float("inf")),
+    )
+
+    selected: List[Tuple[int, str]] = []
+    selected_shingles: set = set()
+    used_tokens = 0
+
+    for index, item in ranked:
+        text = item["content"].strip()
+        if item.get("type") == "solved_problem":
+            text = _summarize_solved_problem(text)
+
+        # Drop text the model would see twice
+        for _, kept in selected:
+            text = _strip_overlap(kept, text)
+        shingles = _shingles(text)
+        if not shingles:
+            continue
+        if len(shingles & selected_shingles) / len(shingles) >= Config.CONTEXT_DEDUP_THRESHOLD:
+            continue
+
+        entry_tokens = estimate_tokens(f"{index}. {text}")
+        remaining = budget - used_tokens
+        if entry_tokens > remaining:
+            if remaining < Config.CONTEXT_MIN_PARTIAL_TOKENS:
+                continue
+            text = _truncate_to_tokens(text, remaining)
+            entry_tokens = estimate_tokens(f"{index}. {text}")
+
+        selected.append((index, text))
+        selected_shingles |= shingles
+        used_tokens += entry_tokens
+
+    # Present in relevance order but keep original indices for used_sources
+    context_str = "\n\n".join(f"{i}. {text}" for i, text in selected) if selected else "No context."
+    stats["tokens_after"] = estimate_tokens(context_str)
+    stats["items_kept"] = len(selected)
+    return context_str, stats
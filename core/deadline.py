@@ -0,0 +1,171 @@
+# File: core/deadline.py
+"""
+Per-request deadline budgets.
+
+Before this, a client-side timeout did not stop the server: run_pipeline kept
+running the remaining agents, and the solver could loop for 12 tool iterations
+after the caller had gone. Each API request now carries a RequestBudget:
+
+- A deadline: Config.REQUEST_DEADLINE_SECONDS, or a shorter value chosen by the client.
+- A cancellation flag, set by the API when the client disconnects.
+
+The budget is shared by every stage. StageRunner checks it before each stage,
+resilient_call caps each LLM call at the time that remains, and the solver's
+AgentExecutor stops iterating once it runs out (BudgetCallback). When a stage
+hits an exhausted budget, BudgetExhausted is raised. run_pipeline turns it into
+a best-effort partial response.
+
+Time spent on requests that were abandoned or ran out of budget is counted in
+`budget_metrics` (GET /budget).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from core.config import Config
+
+
+class BudgetExhausted(Exception):
+    """Raised at a stage boundary when the request's deadline passed or it was cancelled."""
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"{reason} before stage '{stage}'")
+        self.reason = reason  # "deadline_exceeded" | "client_disconnected"
+        self.stage = stage
+
+
+class RequestBudget:
+    """Deadline + cancellation flag shared by all stages of one request."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        seconds = Config.REQUEST_DEADLINE_SECONDS if seconds is None else min(seconds, Config.REQUEST_DEADLINE_SECONDS)
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+        self._cancelled = threading.Event()
+        self.cancelled_at: Optional[float] = None
+        self.cancel_reason: Optional[str] = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "client_disconnected"):
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self.cancelled_at = time.monotonic()
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def exhausted(self) -> Optional[str]:
+        """Reason the budget is used up, or None while work may continue."""
+        if self.cancelled:
+            return self.cancel_reason
+        if time.monotonic() >= self.deadline:
+            return "deadline_exceeded"
+        return None
+
+    def check(self, stage: str):
+        reason = self.exhausted
+        if reason:
+            raise BudgetExhausted(reason, stage)
+
+
+# -----------------------------
+# Propagation to agents
+# -----------------------------
+_current_budget: ContextVar[Optional[RequestBudget]] = ContextVar("request_budget", default=None)
+
+
+def current_budget() -> Optional[RequestBudget]:
+    """Budget of the request being served by this thread, if any."""
+    return _current_budget.get()
+
+
+@contextmanager
+def use_budget(budget: Optional[RequestBudget]):
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+class BudgetCallback(BaseCallbackHandler):
+    """Stops a LangChain agent loop (before each LLM or tool call) once the budget is exhausted."""
+
+    raise_error = True
+
+    def __init__(self, budget: RequestBudget, stage: str):
+        self.budget = budget
+        self.stage = stage
+
+    def on_llm_start(self, *args, **kwargs):
+        self.budget.check(self.stage)
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self.budget.check(self.stage)
+
+    def on_tool_start(self, *args, **kwargs):
+        self.budget.check(self.stage)
+
+
+# -----------------------------
+# Wasted-work metrics
+# -----------------------------
+class BudgetMetrics:
+    """Counts requests cut short by their budget and the work spent on them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.by_reason: Dict[str, Dict[str, float]] = {}
+
+    def record_completed(self):
+        with self._lock:
+            self.completed += 1
+
+    def record_abandoned(self, budget: RequestBudget, executed_stages: List[str], delivered: bool):
+        """
+        delivered=False when nobody will read the response (client disconnected):
+        all service time is wasted. stop_lag is how long work continued after the
+        budget ran out.
+        """
+        reason = budget.exhausted or "deadline_exceeded"
+        now = time.monotonic()
+        cutoff = budget.cancelled_at if budget.cancelled else budget.deadline
+        with self._lock:
+            entry = self.by_reason.setdefault(reason, {
+                "requests": 0, "wasted_seconds": 0.0, "stages_executed": 0, "stop_lag_seconds": 0.0,
+            })
+            entry["requests"] += 1
+            entry["stages_executed"] += len(executed_stages)
+            entry["stop_lag_seconds"] += max(0.0, now - cutoff)
+            entry["wasted_seconds"] += (now - budget.started) if not delivered else max(0.0, now - cutoff)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "deadline_seconds": Config.REQUEST_DEADLINE_SECONDS,
+                "completed": self.completed,
+                "abandoned": {
+                    reason: {
+                        "requests": int(e["requests"]),
+                        "wasted_seconds": round(e["wasted_seconds"], 2),
+                        "stages_executed": int(e["stages_executed"]),
+                        "avg_stop_lag_seconds": round(e["stop_lag_seconds"] / e["requests"], 3),
+                    }
+                    for reason, e in self.by_reason.items()
+                },
+            }
+
+
+# Process-wide metrics (GET /budget)
+budget_metrics = BudgetMetrics()
@@ -0,0 +1,229 @@
+# File: core/embeddings.py
+"""
+Pluggable embedding backends for retrieval and memory.
+
+Config.EMBEDDING_BACKEND selects how Config.EMBEDDING_MODEL is run:
+- "torch": sentence-transformers / PyTorch in full precision (HuggingFaceEmbeddings)
+- "onnx":  the same model exported to ONNX and run with ONNX Runtime on CPU,
+           with int8 dynamic quantization of the weights (Config.ONNX_QUANTIZE)
+
+The export happens once, on first load, into Config.ONNX_MODEL_DIR.
+
+Both backends are wrapped in BatchedQueryEmbeddings. Concurrent embed_query()
+calls that arrive while a forward pass is running are grouped into the next
+pass, instead of each request running the model on its own.
+
+Parity and throughput against the torch backend: python -m benchmarks.embedding_backends
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from core.config import Config
+
+# Batcher threads exit after this long without queries (restarted on demand)
+_BATCHER_IDLE_SECONDS = 30.0
+
+
+def _hf_repo(model_name: str) -> str:
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+# -----------------------------
+# ONNX Runtime backend
+# -----------------------------
+def export_onnx_model(model_name: str = Config.EMBEDDING_MODEL, quantize: bool = Config.ONNX_QUANTIZE) -> Path:
+    """Export the transformer to ONNX (and quantize it) once; returns the .onnx path to load."""
+    export_dir = Config.ONNX_MODEL_DIR / model_name.replace("/", "__")
+    fp32_path = export_dir / "model.onnx"
+    int8_path = export_dir / "model_int8.onnx"
+
+    if not fp32_path.exists():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        print(f"Exporting {model_name} to ONNX...")
+        export_dir.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(_hf_repo(model_name))
+        model = AutoModel.from_pretrained(_hf_repo(model_name), torchscript=True).eval()
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+        tmp_path = fp32_path.with_suffix(".tmp")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+                opset_version=14,
+            )
+        tokenizer.save_pretrained(str(export_dir))
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {model_name} to int8...")
+        tmp_path = int8_path.with_suffix(".tmp")
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """Mean-pooled, L2-normalised sentence embeddings computed with ONNX Runtime."""
+
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL, quantize: bool = Config.ONNX_QUANTIZE):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = export_onnx_model(model_name, quantize)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_path.parent))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if Config.ONNX_THREADS:
+            options.intra_op_num_threads = Config.ONNX_THREADS
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _forward(self, texts: List[str]):
+        import numpy as np
+
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=Config.ONNX_MAX_SEQ_LENGTH, return_tensors="np"
+        )
+        feeds = {name: array.astype(np.int64) for name, array in encoded.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Sort by length so each forward pass pads to similar lengths, then restore order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [None] * len(texts)
+        for start in range(0, len(order), Config.ONNX_BATCH_SIZE):
+            chunk = order[start:start + Config.ONNX_BATCH_SIZE]
+            for i, vector in zip(chunk, self._forward([texts[i] for i in chunk])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# -----------------------------
+# Query micro-batching
+# -----------------------------
+class BatchedQueryEmbeddings(Embeddings):
+    """
+    Fuses concurrent embed_query() calls into one embed_documents() forward pass.
+
+    Queries that queue up while a pass is running go out together in the next one.
+    A non-zero Config.EMBEDDING_QUERY_BATCH_WINDOW_MS additionally waits that long
+    to fill a batch (trading latency for throughput).
+    """
+
+    def __init__(
+        self,
+        backend: Embeddings,
+        max_batch: int = Config.EMBEDDING_QUERY_BATCH_SIZE,
+        window_ms: float = Config.EMBEDDING_QUERY_BATCH_WINDOW_MS,
+    ):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = False
+        self.queries = 0
+        self.batches = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.backend.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        future: Future = Future()
+        self._queue.put((text, future))
+        self._ensure_batcher()
+        return future.result()
+
+    def _ensure_batcher(self):
+        with self._lock:
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=_BATCHER_IDLE_SECONDS)]
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._running = False
+                        return
+                continue
+
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.backend.embed_documents(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.queries += len(batch)
+            self.batches += 1
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+# -----------------------------
+# Backend selection
+# -----------------------------
+def _load_torch_backend() -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=Config.EMBEDDING_MODEL)
+
+
+def _load_onnx_backend() -> Embeddings:
+    return OnnxEmbeddings(Config.EMBEDDING_MODEL, Config.ONNX_QUANTIZE)
+
+
+EMBEDDING_BACKENDS = {
+    "torch": _load_torch_backend,
+    "onnx": _load_onnx_backend,
+}
+
+
+def load_embedding_backend(backend: str = None, batch_queries: bool = True) -> Embeddings:
+    """Loader for the "embedding" model registered with core.model_manager."""
+    backend = backend or Config.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Choose one of: {', '.join(EMBEDDING_BACKENDS)}")
+    embeddings = EMBEDDING_BACKENDS[backend]()
+    return BatchedQueryEmbeddings(embeddings) if batch_queries else embeddings
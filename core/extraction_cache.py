@@ -0,0 +1,171 @@
+# File: core/extraction_cache.py
+"""
+Content-hash cache for multimodal extraction results.
+
+Students often re-upload the same screenshot or voice note when retrying.
+Each entry maps a SHA-256 of the uploaded bytes to the extraction dict
+({"raw_text", "confidence", "source", ...}) so the repeat skips OCR/ASR entirely.
+
+Optionally (Config.EXTRACTION_CACHE_PHASH_ENABLED, off by default), images also
+store a 512-bit difference hash (dHash) and their pixel size, so the same picture
+re-encoded (e.g. PNG → JPEG) still hits the cache. A match requires the same
+width and height and at most EXTRACTION_CACHE_PHASH_MAX_DISTANCE differing bits.
+Worksheets that share a layout can hash very closely (one changed sign is only a
+few bits), so a looser match would return another problem's text.
+
+The cache is bounded (least-recently-used eviction) and stored in SQLite under
+Config.DATA_DIR, like the job queue and session store: every API process shares
+it safely, and an insert writes one row instead of rewriting the whole cache.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+from core.config import Config
+
+# dHash grid: 32 comparisons per row × 16 rows = 512 bits
+_HASH_WIDTH, _HASH_HEIGHT = 32, 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    key         TEXT PRIMARY KEY,
+    variant     TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    phash       TEXT,
+    width       INTEGER,
+    height      INTEGER,
+    last_used   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extractions_size ON extractions (variant, width, height);
+CREATE INDEX IF NOT EXISTS idx_extractions_lru ON extractions (last_used);
+"""
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw upload bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    512-bit difference hash (dHash): compare neighbouring pixels of a 33x16
+    grayscale thumbnail. Robust to re-encoding and mild compression.
+    """
+    thumb = np.asarray(
+        image.convert("L").resize((_HASH_WIDTH + 1, _HASH_HEIGHT), Image.BILINEAR), dtype=np.int16
+    )
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ExtractionCache:
+    """Bounded, SQLite-backed LRU cache of extraction results; safe across threads and processes."""
+
+    def __init__(
+        self,
+        path: Path = Config.EXTRACTION_CACHE_PATH,
+        max_entries: int = Config.EXTRACTION_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # -----------------------------
+    # Lookup / insert
+    # -----------------------------
+    @staticmethod
+    def _key(digest: str, variant: str) -> str:
+        return f"{variant}:{digest}"
+
+    def _hit(self, conn, key: str, result: str) -> Dict:
+        conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(result)
+
+    def get(self, data: bytes, variant: str) -> Optional[Dict]:
+        """Exact lookup by content hash. `variant` separates modalities/settings (e.g. "image:lines:pre")."""
+        key = self._key(content_hash(data), variant)
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT result FROM extractions WHERE key = ?", (key,)).fetchone()
+                return self._hit(conn, key, row[0]) if row else None
+        except sqlite3.Error as e:
+            print(f"Warning: extraction cache lookup failed: {e}")
+            return None
+
+    def get_similar_image(self, image: Image.Image, variant: str) -> Optional[Dict]:
+        """Perceptual lookup: nearest same-size image within EXTRACTION_CACHE_PHASH_MAX_DISTANCE bits."""
+        target = perceptual_hash(image)
+        best_key, best_result, best_distance = None, None, Config.EXTRACTION_CACHE_PHASH_MAX_DISTANCE + 1
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, result, phash FROM extractions "
+                    "WHERE variant = ? AND width = ? AND height = ? AND phash IS NOT NULL",
+                    (variant, image.width, image.height),
+                ).fetchall()
+                for key, result, phash in rows:
+                    distance = _hamming(target, int(phash, 16))
+                    if distance < best_distance:
+                        best_key, best_result, best_distance = key, result, distance
+                return self._hit(conn, best_key, best_result) if best_key else None
+        except sqlite3.Error as e:
+            print(f"Warning: extraction cache lookup failed: {e}")
+            return None
+
+    def put(self, data: bytes, variant: str, result: Dict, image: Optional[Image.Image] = None):
+        """Store an extraction result; evicts least-recently-used entries beyond max_entries."""
+        phash = width = height = None
+        if image is not None and Config.EXTRACTION_CACHE_PHASH_ENABLED:
+            phash, width, height = format(perceptual_hash(image), "x"), image.width, image.height
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extractions (key, variant, result, phash, width, height, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self._key(content_hash(data), variant), variant, json.dumps(result, default=str),
+                     phash, width, height, time.time()),
+                )
+                conn.execute(
+                    "DELETE FROM extractions WHERE key IN (SELECT key FROM extractions "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: could not persist extraction cache: {e}")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM extractions")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+
+# Shared cache instance used by core/multimodal.py
+extraction_cache = ExtractionCache()
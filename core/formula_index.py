@@ -0,0 +1,309 @@
+# File: core/formula_index.py
+"""
+Exact lookup index for the formulas and named constructs in knowledge/.
+
+Asking for "the formula for nCr" or "Bayes' theorem" used to run an
+approximate embedding search over 1000-character chunks. That returned several
+loosely related chunks, and sometimes missed the one line that mattered. When
+the KB is loaded, this index:
+
+- splits every markdown file on its headings (split_markdown_sections, also
+  used for the vector-store chunks in core/rag_hybrid.py)
+- keys sections by their heading, and formula lines by their construct label
+  ("- Bayes' theorem: ...") or notation (C(n,r) → combination); query-side
+  aliases map nCr, "choose", ... onto those names
+- keys formula lines by the SymPy signature of each whole side of the formula,
+  so "n(n+1)/2" and "n*(n + 1)/2" resolve to the same entry
+- skips common-mistake, pitfall and example sections, and worked-example lines
+  with only numbers on the right-hand side: they describe one specific problem,
+  so they are misleading as a lookup result for another
+
+At query time, the word n-grams and formula fragments of the query are looked
+up in these dictionaries. hybrid_retrieval() puts the hits (the formula line with
+its heading, or the section) ahead of the KB vector-search results.
+"""
+
+import re
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    convert_xor,
+    implicit_multiplication_application,
+    parse_expr,
+    standard_transformations,
+)
+
+from core.config import Config
+
+_TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+
+# Query phrasings → canonical keys present in the index
+CONSTRUCT_ALIASES = {
+    "ncr": "combination",
+    "n c r": "combination",
+    "choose": "combination",
+    "binomial coefficient": "combination",
+    "npr": "permutation",
+    "n p r": "permutation",
+    "bayes rule": "bayes theorem",
+    "bayes formula": "bayes theorem",
+    "ap": "arithmetic progression",
+    "gp": "geometric progression",
+    "root of quadratic": "quadratic formula",
+    "sridharacharya formula": "quadratic formula",
+    "total probability": "total probability rule",
+    "law of total probability": "total probability rule",
+}
+
+# Notation in formula lines that names a construct
+_NOTATION_KEYS = [
+    (re.compile(r"\bC\(\s*n\s*,\s*[rk]\s*\)"), "combination"),
+    (re.compile(r"\bP\(\s*n\s*,\s*r\s*\)"), "permutation"),
+    (re.compile(r"P\(\s*A\s*\|\s*B\s*\)"), "conditional probability"),
+]
+
+# Labels too generic to identify a section
+_GENERIC_KEYS = {
+    "formula", "example", "step", "steps", "method", "approach", "when to use", "key property",
+    "key insight", "definition", "interpretation", "given information", "find", "verification",
+    "understanding the formula", "common variation", "common variations", "step by step approach",
+    "extended form", "standard form", "when not to use this pattern",
+}
+
+# Sections (by heading or any parent heading) that are not indexed
+_SKIPPED_SECTIONS = re.compile(r"mistake|pitfall|example|error", re.I)
+
+_SUPERSCRIPTS = str.maketrans({"²": "**2", "³": "**3", "ⁿ": "**n", "ᵏ": "**k", "ˣ": "**x"})
+_FORMULA_CHARS = re.compile(r"[A-Za-z0-9\s+\-*/^()²³ⁿᵏˣ·×√.]+")
+_KNOWN_FUNCTIONS = {"sin", "cos", "tan", "log", "ln", "exp", "sqrt"}
+_PROSE_WORD = re.compile(r"\b(?!(?:sin|cos|tan|log|exp|sqrt)\b)[A-Za-z]{3,}\b")
+
+
+# -----------------------------
+# Markdown sections
+# -----------------------------
+def split_markdown_sections(text: str, source: str) -> List[Dict]:
+    """
+    Split a markdown document on headings (outside code fences).
+    Each section: {"source", "heading", "path" (parent headings), "level", "content"}.
+    """
+    sections, path = [], []
+    current = {"source": source, "heading": "", "path": [], "level": 0, "lines": []}
+    in_fence = False
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else re.match(r"^(#{1,6})\s+(.+?)\s*#*\s*$", line)
+        if match:
+            sections.append(current)
+            level, heading = len(match.group(1)), match.group(2).strip()
+            path = [h for h in path if h[0] < level] + [(level, heading)]
+            current = {"source": source, "heading": heading, "path": [h for _, h in path[:-1]], "level": level, "lines": []}
+        current["lines"].append(line)
+
+    sections.append(current)
+    result = []
+    for section in sections:
+        content = "\n".join(section.pop("lines")).strip()
+        # Skip empty sections and headings without a body
+        if content and content.lstrip("#").strip() != section["heading"]:
+            result.append({**section, "content": content})
+    return result
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def normalize_key(text: str) -> str:
+    """Lowercase ASCII words without punctuation or trailing plural 's' ("Bayes' Theorems" → "baye theorem")."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    text = re.sub(r"['’]", "", text)
+    words = re.findall(r"[a-z0-9]+", text)
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words)
+
+
+def _label_keys(text: str) -> List[str]:
+    """Construct-name keys for a heading or a "Label: formula" line (the label only)."""
+    # "Pattern 4: Bayes' Theorem (Reversing ...)" → "Bayes' Theorem"
+    heading = re.sub(r"^(solution pattern|pattern \d+)\s*:\s*", "", text.strip(), flags=re.I)
+    heading = re.sub(r"^[-*\d.\s]+", "", heading)
+    label = re.split(r"[:→=]", heading, maxsplit=1)[0]
+
+    keys = []
+    key = normalize_key(re.sub(r"\(.*?\)", "", label).replace("*", ""))
+    # Single words ("probability", "algebra") would match nearly every query
+    if key and 2 <= len(key.split()) <= 6 and key not in _GENERIC_KEYS:
+        keys.append(key)
+    # Notation names the construct only on the label side ("C(n,r) = ..."), not
+    # inside another formula ("Binomial probability: P(X=k) = C(n,k)·...")
+    for pattern, key in _NOTATION_KEYS:
+        if pattern.search(label):
+            keys.append(key)
+    return keys
+
+
+def _parse_formula(fragment: str) -> Optional[sp.Expr]:
+    fragment = fragment.strip().strip(".")
+    if len(fragment) > 80 or not re.search(r"[+\-*/^²³ⁿᵏˣ·×√]", fragment):
+        return None
+    # Words other than known functions mean this is prose, not a formula
+    if any(len(w) > 2 and w.lower() not in _KNOWN_FUNCTIONS for w in re.findall(r"[A-Za-z]+", fragment)):
+        return None
+    if re.search(r"\.[A-Za-z_]", fragment):
+        return None
+    text = fragment.translate(_SUPERSCRIPTS).replace("·", "*").replace("×", "*")
+    text = re.sub(r"√\s*\(", "sqrt(", text)
+    text = re.sub(r"√\s*([A-Za-z0-9]+)", r"sqrt(\1)", text)
+    try:
+        expr = parse_expr(text, transformations=_TRANSFORMATIONS, evaluate=False)
+    except Exception:
+        return None
+    return expr if _is_formula(expr) else None
+
+
+def _is_formula(expr) -> bool:
+    # At least two operations: "x - 2" or "-b" are too common to identify anything
+    return isinstance(expr, sp.Expr) and bool(expr.free_symbols) and sp.count_ops(expr) >= 2
+
+
+def formula_signature(fragment: str) -> Optional[str]:
+    """Canonical SymPy form of a formula fragment, or None if it isn't one."""
+    expr = _parse_formula(fragment)
+    return sp.srepr(expr) if expr is not None else None
+
+
+def formula_signatures(text: str) -> List[str]:
+    """
+    Signatures of every formula-like run in a line of text (split at '=', '→', ':').
+    Only whole runs are keyed: nested pieces such as "2n+1" are too generic to
+    identify the formula that contains them.
+    """
+    signatures = []
+    for part in re.split(r"[=→:,?]", text):
+        for run in _FORMULA_CHARS.findall(part):
+            # Prose words split a run ("Evaluate n(n+1)/2 for n" → "n(n+1)/2")
+            for fragment in _PROSE_WORD.split(run):
+                signature = formula_signature(fragment)
+                if signature is not None and signature not in signatures:
+                    signatures.append(signature)
+    return signatures
+
+
+def _is_worked_example(line: str) -> bool:
+    """A line like "P(both red) = (3/5) × (2/4) = 3/10": only numbers after the first '=' / '→'."""
+    parts = re.split(r"[=→]", line, maxsplit=1)
+    return len(parts) == 2 and not re.search(r"[A-Za-z]", parts[1])
+
+
+def _query_ngrams(words: List[str], max_n: int = 6):
+    for n in range(min(max_n, len(words)), 0, -1):
+        for i in range(len(words) - n + 1):
+            yield " ".join(words[i:i + n])
+
+
+# -----------------------------
+# Index
+# -----------------------------
+class FormulaIndex:
+    """Keyword and SymPy-signature dictionaries over KB sections and formula lines."""
+
+    def __init__(self):
+        self.entries: List[Dict] = []
+        self.by_key: Dict[str, List[int]] = {}
+        self.by_signature: Dict[str, List[int]] = {}
+
+    @classmethod
+    def build(cls, kb_dir: Path = Config.KNOWLEDGE_BASE_DIR) -> "FormulaIndex":
+        index = cls()
+        for md_file in sorted(kb_dir.rglob("*.md")):
+            source = str(md_file.relative_to(kb_dir))
+            for section in split_markdown_sections(md_file.read_text(encoding="utf-8"), source):
+                index._add_section(section)
+        print(
+            f"Formula index: {len(index.entries)} entries, {len(index.by_key)} keys, "
+            f"{len(index.by_signature)} formula signatures"
+        )
+        return index
+
+    def _add(self, entry: Dict, keys: List[str], signatures: List[str]) -> int:
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        for key in keys:
+            ids = self.by_key.setdefault(key, [])
+            if entry_id not in ids:
+                ids.append(entry_id)
+        for signature in signatures:
+            self.by_signature.setdefault(signature, []).append(entry_id)
+        return entry_id
+
+    def _add_section(self, section: Dict):
+        # Mistakes, pitfalls and examples describe specific problems, not constructs
+        if any(_SKIPPED_SECTIONS.search(h) for h in section["path"] + [section["heading"]]):
+            return
+        heading_line = " > ".join(section["path"] + [section["heading"]]) if section["heading"] else ""
+        self._add(
+            {"source": section["source"], "heading": heading_line, "content": section["content"], "kind": "section"},
+            _label_keys(section["heading"]) if section["heading"] else [],
+            [],
+        )
+        # Formula lines ("- Label: formula") become their own, smaller entries
+        for line in section["content"].splitlines():
+            stripped = line.strip()
+            if not re.match(r"^([-*]|\d+\.)\s|^\*\*Formula", stripped):
+                continue
+            if not re.search(r"[=→]", stripped) or _is_worked_example(stripped):
+                continue
+            keys, signatures = _label_keys(stripped), formula_signatures(stripped)
+            if keys or signatures:
+                content = f"{heading_line}\n{stripped}" if heading_line else stripped
+                self._add({"source": section["source"], "heading": heading_line, "content": content, "kind": "formula"},
+                          keys, signatures)
+
+    def lookup(self, query: str, limit: int = Config.FORMULA_INDEX_MAX_RESULTS) -> List[Dict]:
+        """
+        Entries whose key or formula signature appears in the query, most specific first
+        (longer keyword matches before shorter ones, formula lines before whole sections).
+        """
+        matches: "OrderedDict[int, Tuple[int, str]]" = OrderedDict()
+
+        for signature in formula_signatures(query):
+            for entry_id in self.by_signature.get(signature, []):
+                matches.setdefault(entry_id, (100, "formula"))
+
+        for pattern, key in _NOTATION_KEYS:
+            if pattern.search(query):
+                for entry_id in self.by_key.get(key, []):
+                    matches.setdefault(entry_id, (len(key.split()), key))
+
+        words = normalize_key(query).split()
+        for gram in _query_ngrams(words):
+            key = CONSTRUCT_ALIASES.get(gram, gram)
+            for entry_id in self.by_key.get(key, []):
+                matches.setdefault(entry_id, (len(key.split()), key))
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (-item[1][0], self.entries[item[0]]["kind"] != "formula", item[0]),
+        )
+        results, seen_content = [], set()
+        for entry_id, (_, matched) in ranked:
+            entry = self.entries[entry_id]
+            if entry["content"] in seen_content:
+                continue
+            seen_content.add(entry["content"])
+            results.append({**entry, "matched": matched})
+            if len(results) >= limit:
+                break
+        return results
+
+
+if __name__ == "__main__":
+    index = FormulaIndex.build()
+    for q in ["What is the formula for nCr?", "State Bayes' theorem", "Evaluate n(n+1)/2 for n = 10", "Find x"]:
+        print(f"\n{q}")
+        for hit in index.lookup(q):
+            print(f"  [{hit['matched']}] {hit['source']}: {hit['content'][:100]!r}")
@@ -0,0 +1,72 @@
+# File: core/incremental.py
+"""
+Incremental stage execution.
+
+Each pipeline stage's output is stored with a fingerprint of the inputs that
+produced it (plus the model/config that ran it). When a request is re-run —
+a follow-up in the same session or a HITL resubmission after a reviewer edit —
+a stage whose input fingerprint is unchanged reuses its stored output, and
+only stages downstream of an actual change are executed again.
+
+Examples:
+- editing a constraint re-runs route and solve but keeps retrieval (same problem_text)
+- editing only the final answer re-runs just the verifier and explainer
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of JSON-serialisable inputs."""
+    canonical = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class StageRunner:
+    """Runs named stages, reusing prior outputs whose input fingerprints match."""
+
+    def __init__(
+        self,
+        prior_outputs: Optional[Dict[str, Any]] = None,
+        prior_fingerprints: Optional[Dict[str, str]] = None,
+        budget=None,  # core.deadline.RequestBudget, checked before every executed stage
+    ):
+        self.prior_outputs = prior_outputs or {}
+        self.budget = budget
+        self.prior_fingerprints = prior_fingerprints or {}
+        self.outputs: Dict[str, Any] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.executed: List[str] = []
+        self.reused: List[str] = []
+        self.timings: Dict[str, float] = {}  # Wall time per stage in ms (≈0 when reused)
+
+    def run(self, stage: str, inputs: Any, compute: Callable[[], Any]) -> Any:
+        fp = fingerprint(stage, inputs)
+        start = time.perf_counter()
+        if self.prior_fingerprints.get(stage) == fp and self.prior_outputs.get(stage) is not None:
+            output = self.prior_outputs[stage]
+            self.reused.append(stage)
+        else:
+            if self.budget is not None:
+                self.budget.check(stage)
+            # Agents raise BudgetExhausted instead of falling back when cut short, so an
+            # output that comes back is a real result, even if the budget ran out meanwhile
+            output = compute()
+            self.executed.append(stage)
+        self.timings[stage] = round((time.perf_counter() - start) * 1000, 2)
+        self.outputs[stage] = output
+        self.fingerprints[stage] = fp
+        return output
+
+    def provide(self, stage: str, inputs: Any, output: Any):
+        """Record an externally supplied output (e.g. a reviewer's edited parse) as a stage result."""
+        self.outputs[stage] = output
+        self.fingerprints[stage] = fingerprint(stage, inputs)
+
+    @property
+    def stages(self) -> List[str]:
+        """Stage log in execution order, reused stages suffixed with ':cached'."""
+        return [stage if stage in self.executed else f"{stage}:cached" for stage in self.outputs]
@@ -0,0 +1,216 @@
+# File: core/job_queue.py
+"""
+Durable local job queue backed by SQLite.
+
+Large image/audio solves can take longer than the load balancer's 60 s
+connection limit. POST /jobs stores the upload here and returns an id at once;
+worker processes (python job_worker.py) claim jobs, run them and store the
+result for GET /jobs/{id}. Jobs survive client disconnects and API restarts.
+
+Semantics:
+- Claiming sets a lease (visibility timeout); if a worker dies, the job
+  becomes visible again once the lease expires
+- Failed attempts are retried with exponential backoff up to JOB_MAX_ATTEMPTS;
+  a job whose lease expires on its last attempt (worker crash/OOM) is failed
+- The attempt number doubles as the lease token: complete()/fail() from a
+  worker whose lease was taken over by a newer attempt are ignored
+- Finished jobs keep their result for JOB_RESULT_TTL_SECONDS, then are deleted
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from core.config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    payload     BLOB,
+    params      TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    visible_at  REAL NOT NULL,
+    expires_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, visible_at);
+"""
+
+
+class JobQueue:
+    """SQLite-backed queue; safe to use from multiple processes."""
+
+    def __init__(self, path: Path = Config.JOB_QUEUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            yield conn
+        finally:
+            conn.close()
+
+    # -----------------------------
+    # Producer side (API)
+    # -----------------------------
+    def enqueue(self, kind: str, payload: bytes, params: Optional[Dict] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, params, status, created, updated, visible_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, payload, json.dumps(params or {}), now, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, attempts, result, error, created, updated FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    # -----------------------------
+    # Consumer side (workers)
+    # -----------------------------
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the next visible job and lease it for JOB_VISIBILITY_TIMEOUT seconds."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A lease that expired on the last attempt means the job keeps killing its worker
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', payload = NULL, updated = ?, expires_at = ?, "
+                    "error = COALESCE(error, 'Worker lost the job (lease expired) on every attempt') "
+                    "WHERE status = 'running' AND visible_at <= ? AND attempts >= ?",
+                    (now, now + Config.JOB_RESULT_TTL_SECONDS, now, Config.JOB_MAX_ATTEMPTS),
+                )
+                row = conn.execute(
+                    "SELECT id, kind, payload, params, attempts FROM jobs "
+                    "WHERE status IN ('queued', 'running') AND visible_at <= ? AND attempts < ? "
+                    "ORDER BY visible_at LIMIT 1",
+                    (now, Config.JOB_MAX_ATTEMPTS),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ?, visible_at = ? "
+                    "WHERE id = ?",
+                    (now, now + Config.JOB_VISIBILITY_TIMEOUT, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: str, attempts: int, result: Dict) -> bool:
+        """Store the result of lease `attempts`; False if a newer attempt owns the job."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, payload = NULL, error = NULL, "
+                "updated = ?, expires_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                (json.dumps(result, default=str), now, now + Config.JOB_RESULT_TTL_SECONDS, job_id, attempts),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, attempts: int, error: str) -> bool:
+        """
+        Schedule a retry with exponential backoff, or mark failed after the last attempt.
+        False if a newer attempt owns the job.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if attempts < Config.JOB_MAX_ATTEMPTS:
+                delay = Config.JOB_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1))
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, updated = ?, visible_at = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (error, now, now + delay, job_id, attempts),
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, payload = NULL, updated = ?, expires_at = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (error, now, now + Config.JOB_RESULT_TTL_SECONDS, job_id, attempts),
+                )
+        return cursor.rowcount == 1
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            return cursor.rowcount
+
+
+def run_worker(
+    handler: Callable[[str, bytes, Dict], Dict], queue: Optional[JobQueue] = None, workers: int = Config.JOB_WORKERS
+):
+    """
+    Worker loop: claim → handler(kind, payload, params) → complete/fail.
+    `workers` is the number of worker processes sharing the queue; each is paced so
+    together they never start more than JOB_RATE_PER_MINUTE jobs per minute.
+    """
+    queue = queue or JobQueue()
+    min_interval = 60.0 * max(1, workers) / Config.JOB_RATE_PER_MINUTE if Config.JOB_RATE_PER_MINUTE else 0.0
+    last_start = 0.0
+    last_purge = 0.0
+
+    while True:
+        now = time.monotonic()
+        if now - last_purge > 300:
+            queue.purge_expired()
+            last_purge = now
+
+        wait = last_start + min_interval - now
+        if wait > 0:
+            time.sleep(wait)
+
+        job = queue.claim()
+        if job is None:
+            time.sleep(Config.JOB_POLL_INTERVAL_SECONDS)
+            continue
+
+        last_start = time.monotonic()
+        try:
+            result = handler(job["kind"], job["payload"], job["params"])
+            stored = queue.complete(job["id"], job["attempts"], result)
+        except Exception as e:
+            stored = queue.fail(job["id"], job["attempts"], f"{type(e).__name__}: {e}")
+        if not stored:
+            print(f"[jobs] lease on {job['id']} (attempt {job['attempts']}) expired; result discarded")
@@ -0,0 +1,240 @@
+# File: core/memory_service.py
+"""
+Single-writer service for the solved_problems memory.
+
+With several uvicorn/gunicorn workers, every process used to open the same
+Chroma persist_directory and call persist() on its own. The result was lock
+contention and stale reads. In service mode (Config.MEMORY_STORE_MODE = "service")
+the index has a single owner:
+
+- One writer process owns the persistent Chroma collection and is the only
+  process that writes to it. Every write bumps a version number.
+- API workers keep an in-memory snapshot (vectors + documents) and search it
+  locally. They ask the writer for its version at most every
+  Config.MEMORY_SNAPSHOT_REFRESH_SECONDS, and only pull the entries that
+  changed since their own version.
+- Each refresh swaps in a complete new snapshot, so a search never sees a
+  half-applied update. A worker's own writes invalidate its snapshot
+  immediately (read-your-writes).
+
+Run once per pod:
+    python -m core.memory_service
+
+Then start the API with MEMORY_STORE_MODE=service.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import Config
+
+
+class _MemoryManager(BaseManager):
+    pass
+
+
+# -----------------------------
+# Writer (owns the persistent index)
+# -----------------------------
+class MemoryStoreService:
+    """The only process that writes the solved_problems collection."""
+
+    def __init__(self):
+        from core.rag_hybrid import embedding_model, open_memory_vectorstore
+
+        self._embeddings = embedding_model
+        self._store = open_memory_vectorstore()
+        self._lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex  # Changes on restart, so readers reload in full
+        self._seq = 0
+        self._entries: "OrderedDict[str, Tuple[int, str, Dict, np.ndarray]]" = OrderedDict()
+
+        existing = self._store._collection.get(include=["embeddings", "documents", "metadatas"])
+        for doc_id, embedding, document, metadata in zip(
+            existing["ids"], existing["embeddings"], existing["documents"], existing["metadatas"]
+        ):
+            self._record(doc_id, document, metadata, embedding)
+        print(f"Memory store loaded with {len(self._entries)} documents")
+
+    def _record(self, doc_id: str, document: str, metadata: Dict, embedding):
+        self._seq += 1
+        self._entries[doc_id] = (self._seq, document, metadata, np.asarray(embedding, dtype=np.float32))
+        self._entries.move_to_end(doc_id)
+
+    def version(self) -> Tuple[str, int]:
+        return self.epoch, self._seq
+
+    def add(self, document: str, metadata: Dict) -> str:
+        """Embed and store one document; returns its id."""
+        doc_id = uuid.uuid4().hex
+        embedding = self._embeddings.embed_documents([document])[0]
+        self.upsert([doc_id], [embedding], [document], [metadata])
+        return doc_id
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict]) -> int:
+        """Write pre-embedded documents (bulk import); returns the new version."""
+        embeddings = [[float(x) for x in embedding] for embedding in embeddings]
+        with self._lock:
+            self._store._collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+            self._store.persist()
+            for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+                self._record(doc_id, document, metadata, embedding)
+            return self._seq
+
+    def changes_since(self, epoch: Optional[str], version: int) -> Dict:
+        """Entries written after `version` (everything if the epoch differs)."""
+        with self._lock:
+            if epoch != self.epoch:
+                version = 0
+            changed = []
+            for doc_id in reversed(self._entries):
+                seq, document, metadata, embedding = self._entries[doc_id]
+                if seq <= version:
+                    break
+                changed.append((doc_id, document, metadata, embedding))
+            changed.reverse()
+            return {
+                "epoch": self.epoch,
+                "version": self._seq,
+                "full": version == 0,
+                "ids": [c[0] for c in changed],
+                "documents": [c[1] for c in changed],
+                "metadatas": [c[2] for c in changed],
+                "embeddings": np.stack([c[3] for c in changed]) if changed else None,
+            }
+
+
+_service = None
+
+
+def _get_service():
+    return _service
+
+
+def serve():
+    """Open the memory index and serve it to API workers. Blocks forever."""
+    global _service
+    _service = MemoryStoreService()
+
+    _MemoryManager.register("get_store", callable=_get_service)
+    manager = _MemoryManager(
+        address=(Config.MEMORY_SERVICE_HOST, Config.MEMORY_SERVICE_PORT),
+        authkey=Config.MEMORY_SERVICE_AUTHKEY,
+    )
+    server = manager.get_server()
+    print(f"Memory store service listening on {Config.MEMORY_SERVICE_HOST}:{Config.MEMORY_SERVICE_PORT}")
+    server.serve_forever()
+
+
+# -----------------------------
+# Readers (API workers)
+# -----------------------------
+_client_store = None
+_client_lock = threading.Lock()
+
+
+def remote_memory_store():
+    global _client_store
+    if _client_store is None:
+        with _client_lock:
+            if _client_store is None:
+                _MemoryManager.register("get_store")
+                manager = _MemoryManager(
+                    address=(Config.MEMORY_SERVICE_HOST, Config.MEMORY_SERVICE_PORT),
+                    authkey=Config.MEMORY_SERVICE_AUTHKEY,
+                )
+                manager.connect()
+                _client_store = manager.get_store()
+    return _client_store
+
+
+class MemorySnapshot:
+    """Read-only, process-local copy of the memory index, refreshed on version bumps."""
+
+    def __init__(self):
+        self._refresh_lock = threading.Lock()
+        self._epoch: Optional[str] = None
+        self._version = 0
+        self._next_check = 0.0
+        # (ids, documents, metadatas, matrix, squared norms), swapped as a whole
+        self._state = ([], [], [], None, None)
+
+    def invalidate(self):
+        """Force a version check on the next search (after this process wrote)."""
+        self._next_check = 0.0
+
+    def refresh(self):
+        if time.monotonic() < self._next_check:
+            return
+        with self._refresh_lock:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + Config.MEMORY_SNAPSHOT_REFRESH_SECONDS
+            try:
+                store = remote_memory_store()
+                if store.version() == (self._epoch, self._version):
+                    return
+                self._apply(store.changes_since(self._epoch, self._version))
+            except Exception as e:
+                print(f"Memory snapshot refresh failed, serving version {self._version}: {e}")
+
+    def _apply(self, delta: Dict):
+        if delta["full"]:
+            ids, documents, metadatas, matrix = [], [], [], None
+        else:
+            ids, documents, metadatas, matrix, _ = self._state
+            ids, documents, metadatas = list(ids), list(documents), list(metadatas)
+            matrix = None if matrix is None else matrix.copy()
+
+        positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        new_rows = []
+        for i, doc_id in enumerate(delta["ids"]):
+            vector = delta["embeddings"][i]
+            if doc_id in positions:
+                row = positions[doc_id]
+                documents[row], metadatas[row] = delta["documents"][i], delta["metadatas"][i]
+                matrix[row] = vector
+            else:
+                positions[doc_id] = len(ids)
+                ids.append(doc_id)
+                documents.append(delta["documents"][i])
+                metadatas.append(delta["metadatas"][i])
+                new_rows.append(vector)
+        if new_rows:
+            new_rows = np.stack(new_rows).astype(np.float32)
+            matrix = new_rows if matrix is None else np.vstack([matrix, new_rows])
+
+        norms = None if matrix is None else np.einsum("ij,ij->i", matrix, matrix)
+        self._state = (ids, documents, metadatas, matrix, norms)
+        self._epoch, self._version = delta["epoch"], delta["version"]
+
+    def count(self) -> int:
+        self.refresh()
+        return len(self._state[1])
+
+    def search(self, query_vector: List[float], k: int) -> List[Tuple[str, Dict, float]]:
+        """(document, metadata, distance) for the k nearest entries; distance is squared L2 like Chroma's default."""
+        self.refresh()
+        _, documents, metadatas, matrix, norms = self._state
+        if matrix is None or not documents:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        distances = np.maximum(norms + query @ query - 2 * (matrix @ query), 0.0)
+        k = min(k, len(documents))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [(documents[i], metadatas[i], float(distances[i])) for i in top]
+
+
+# Per-process snapshot used by core/rag_hybrid.py in service mode
+memory_snapshot = MemorySnapshot()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,240 @@
+# File: core/model_manager.py
+"""
+Model lifecycle manager.
+
+EasyOCR (torch), faster-whisper and sentence-transformers otherwise stay
+resident forever once touched. The manager owns every heavy model instance:
+
+- Models are loaded lazily on first use (one loader call, even under concurrency)
+- Models idle for longer than Config.MODEL_IDLE_TTL_SECONDS are unloaded by a background reaper
+- If process RSS exceeds Config.MODEL_MEMORY_BUDGET_MB, least-recently-used idle models are evicted
+- Pinned models (pin(), e.g. the models a worker-pool process preloads) are never unloaded automatically
+- Load/unload events and the resident memory attributed to each model are reported via report()
+
+Use `with model_manager.use("ocr") as reader:` so a model is never evicted mid-call.
+"""
+
+import ctypes
+import gc
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from core.config import Config
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc, falls back to peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _release_memory():
+    """Give freed memory back to the OS where possible."""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class _ManagedModel:
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.instance = None
+        self.rss_bytes = 0
+        self.last_used = 0.0
+        self.in_use = 0
+        self.pinned = False
+        self.loads = 0
+        self.unloads = 0
+        self.lock = threading.Lock()
+
+
+class ModelManager:
+    """Registry of lazily loaded, unloadable models with idle TTL and an RSS budget."""
+
+    def __init__(
+        self,
+        idle_ttl: float = Config.MODEL_IDLE_TTL_SECONDS,
+        budget_mb: int = Config.MODEL_MEMORY_BUDGET_MB,
+    ):
+        self.idle_ttl = idle_ttl
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self._models: Dict[str, _ManagedModel] = {}
+        self._registry_lock = threading.Lock()
+        self._events: deque = deque(maxlen=200)
+        self._reaper_started = False
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        with self._registry_lock:
+            if name not in self._models:
+                self._models[name] = _ManagedModel(name, loader)
+
+    def pin(self, name: str):
+        """Exempt a model from idle-TTL and memory-budget eviction (it stays loaded once loaded)."""
+        self._models[name].pinned = True
+
+    # -----------------------------
+    # Access
+    # -----------------------------
+    def get(self, name: str) -> Any:
+        """Return the model instance, loading it if needed. Prefer use() for long calls."""
+        model = self._models[name]
+        with model.lock:
+            if model.instance is None:
+                self._load(model)
+            model.last_used = time.monotonic()
+            instance = model.instance
+
+        self._enforce_budget(keep=name)
+        self._start_reaper()
+        return instance
+
+    @contextmanager
+    def use(self, name: str):
+        """Context manager that pins the model (no eviction) for the duration of the block."""
+        model = self._models[name]
+        with model.lock:
+            model.in_use += 1
+        try:
+            yield self.get(name)
+        finally:
+            with model.lock:
+                model.in_use -= 1
+                model.last_used = time.monotonic()
+
+    # -----------------------------
+    # Load / unload
+    # -----------------------------
+    def _record(self, event: str, model: _ManagedModel, **details):
+        entry = {"time": time.time(), "event": event, "model": model.name, **details}
+        self._events.append(entry)
+        print(f"[model_manager] {event} {model.name} {details}")
+
+    def _load(self, model: _ManagedModel):
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        model.instance = model.loader()
+        model.rss_bytes = max(0, current_rss_bytes() - rss_before)
+        model.loads += 1
+        self._record(
+            "load", model,
+            seconds=round(time.perf_counter() - start, 2),
+            rss_mb=round(model.rss_bytes / 2**20, 1),
+        )
+
+    def unload(self, name: str, reason: str = "manual") -> bool:
+        model = self._models[name]
+        with model.lock:
+            if model.instance is None or model.in_use:
+                return False
+            model.instance = None
+            model.unloads += 1
+
+        rss_before = current_rss_bytes()
+        _release_memory()
+        freed = max(0, rss_before - current_rss_bytes())
+        self._record("unload", model, reason=reason, freed_mb=round(freed / 2**20, 1))
+        model.rss_bytes = 0
+        return True
+
+    def _loaded_idle_models(self, exclude: str = None) -> List[_ManagedModel]:
+        return [
+            m for m in self._models.values()
+            if m.instance is not None and not m.in_use and not m.pinned and m.name != exclude
+        ]
+
+    def _enforce_budget(self, keep: str = None):
+        """Evict least-recently-used idle models while process RSS exceeds the budget."""
+        if not self.budget_bytes:
+            return
+        while current_rss_bytes() > self.budget_bytes:
+            candidates = sorted(self._loaded_idle_models(exclude=keep), key=lambda m: m.last_used)
+            if not candidates:
+                break
+            self.unload(candidates[0].name, reason="memory_budget")
+
+    def unload_idle(self):
+        """Unload every model idle for longer than the TTL."""
+        if not self.idle_ttl:
+            return
+        now = time.monotonic()
+        for model in self._loaded_idle_models():
+            if now - model.last_used > self.idle_ttl:
+                self.unload(model.name, reason="idle_ttl")
+
+    def _start_reaper(self):
+        if self._reaper_started or not self.idle_ttl:
+            return
+        with self._registry_lock:
+            if self._reaper_started:
+                return
+            self._reaper_started = True
+
+        def reap():
+            while True:
+                time.sleep(Config.MODEL_REAPER_INTERVAL_SECONDS)
+                self.unload_idle()
+
+        threading.Thread(target=reap, daemon=True).start()
+
+    # -----------------------------
+    # Reporting
+    # -----------------------------
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "process_rss_mb": round(current_rss_bytes() / 2**20, 1),
+            "budget_mb": round(self.budget_bytes / 2**20, 1) if self.budget_bytes else None,
+            "idle_ttl_seconds": self.idle_ttl,
+            "models": {
+                m.name: {
+                    "loaded": m.instance is not None,
+                    "rss_mb": round(m.rss_bytes / 2**20, 1),
+                    "idle_seconds": round(now - m.last_used, 1) if m.instance is not None else None,
+                    "in_use": m.in_use,
+                    "loads": m.loads,
+                    "unloads": m.unloads,
+                }
+                for m in self._models.values()
+            },
+            "events": list(self._events)[-50:],
+        }
+
+
+class ManagedEmbeddings(Embeddings):
+    """LangChain embeddings adapter whose underlying model is owned by the manager."""
+
+    def __init__(self, manager: "ModelManager", name: str):
+        self.manager = manager
+        self.name = name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.manager.use(self.name) as model:
+            return model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.manager.use(self.name) as model:
+            return model.embed_query(text)
+
+
+# Process-wide manager shared by core/multimodal.py and core/rag_hybrid.py
+model_manager = ModelManager()
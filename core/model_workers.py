@@ -0,0 +1,287 @@
+# File: core/model_workers.py
+"""
+Dedicated OCR / ASR / embedding worker pool.
+
+Without this, every uvicorn worker lazily loads its own EasyOCR reader,
+Whisper "small" model and MiniLM embedder, so memory grows with the number of
+API workers. In pool mode a single model server per pod owns a fixed number
+of worker processes, each loading its models exactly once at startup; API
+workers only hold a lightweight client.
+
+Run once per pod:
+    python -m core.model_workers
+
+Then start the API with MULTIMODAL_WORKER_MODE=pool.
+
+Server-side behaviour:
+- Per-modality concurrency limits (Config.MULTIMODAL_CONCURRENCY): excess callers wait
+- One job per task, so concurrent uploads are spread over all workers (EasyOCR's
+  readtext has no multi-image batch call, so grouping images would only serialise them)
+- Extraction cache lookups happen in the server, before a job reaches a worker
+- A worker process that dies is replaced, and the job it was running fails straight away
+- Preloaded models are pinned, so the model manager's idle reaper never unloads them
+- Live-stream utterances (StreamingTranscriber) are transcribed on the pool too
+"""
+
+import multiprocessing as mp
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from core.config import Config
+
+MODALITIES = ("image", "audio", "audio_stream", "embed")
+# Stream utterances share the audio concurrency limit
+_LIMIT_GROUPS = {"audio_stream": "audio"}
+
+
+# -----------------------------
+# Worker process
+# -----------------------------
+def _worker_main(current_job, task_queue, result_queue):
+    """
+    Load models once, then process (job_id, modality, payload) tasks until a None sentinel.
+    `current_job` (shared memory, written synchronously) tells the pool which job a dead worker held.
+    """
+    from core import multimodal
+    from core.embeddings import load_embedding_backend
+    from core.model_manager import ManagedEmbeddings, model_manager
+
+    model_manager.register("embedding", lambda: load_embedding_backend(batch_queries=False))
+    embedder = ManagedEmbeddings(model_manager, "embedding")
+
+    # Preloaded models stay resident for the life of the worker
+    for modality, model in (("image", "ocr"), ("audio", "asr"), ("embed", "embedding")):
+        if modality in Config.MULTIMODAL_PRELOAD:
+            model_manager.pin(model)
+            model_manager.get(model)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        job_id, modality, payload = task
+        current_job.value = job_id.encode()
+        try:
+            if modality == "image":
+                result = multimodal.process_image_input(payload, use_cache=False)
+            elif modality == "audio":
+                result = multimodal.process_audio_input(payload, use_cache=False)
+            elif modality == "audio_stream":
+                result = multimodal.transcribe_samples(payload)
+            elif modality == "embed":
+                result = embedder.embed_documents(payload)
+            else:
+                raise ValueError(f"Unknown modality: {modality}")
+            result_queue.put((job_id, True, result))
+        except Exception as e:
+            result_queue.put((job_id, False, f"{type(e).__name__}: {e}"))
+        current_job.value = b""
+
+
+# -----------------------------
+# Pool (lives in the model server process)
+# -----------------------------
+class ModelWorkerPool:
+    """Fixed set of model worker processes fed by a shared task queue."""
+
+    def __init__(self, num_workers: int = Config.MULTIMODAL_WORKERS):
+        ctx = mp.get_context("spawn")  # never fork a process holding torch state
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._limits = {
+            modality: threading.BoundedSemaphore(Config.MULTIMODAL_CONCURRENCY[modality])
+            for modality in MODALITIES if modality not in _LIMIT_GROUPS
+        }
+        self._ctx = ctx
+        self._shutting_down = False
+        self.restarts = 0
+
+        self._current_jobs = [ctx.Array("c", 32) for _ in range(num_workers)]  # uuid4 hex per worker
+        self._workers = [self._start_worker(index) for index in range(num_workers)]
+
+        threading.Thread(target=self._collect_results, daemon=True).start()
+        threading.Thread(target=self._supervise, daemon=True).start()
+
+    def _start_worker(self, index: int):
+        self._current_jobs[index].value = b""
+        worker = self._ctx.Process(
+            target=_worker_main, args=(self._current_jobs[index], self._tasks, self._results), daemon=True
+        )
+        worker.start()
+        return worker
+
+    def _collect_results(self):
+        while True:
+            job_id, ok, payload = self._results.get()
+            with self._pending_lock:
+                future = self._pending.pop(job_id, None)
+            if future is None:
+                continue  # caller already timed out
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _supervise(self):
+        """Replace worker processes that died (OOM kill, segfault in a native library)."""
+        while not self._shutting_down:
+            time.sleep(Config.MULTIMODAL_SUPERVISE_SECONDS)
+            for index, worker in enumerate(self._workers):
+                if worker.is_alive() or self._shutting_down:
+                    continue
+                job_id = self._current_jobs[index].value.decode()
+                with self._pending_lock:
+                    future = self._pending.pop(job_id, None) if job_id else None
+                if future is not None:
+                    future.set_exception(RuntimeError(f"Model worker {index} died (exit code {worker.exitcode})"))
+                print(f"[model_workers] worker {index} exited with code {worker.exitcode}; restarting")
+                self._workers[index] = self._start_worker(index)
+                self.restarts += 1
+
+    def submit(self, modality: str, payload: Any) -> Any:
+        """Run one job on the pool and block until its result is ready."""
+        if modality not in MODALITIES:
+            raise ValueError(f"Unknown modality: {modality}")
+
+        if modality in ("image", "audio") and Config.EXTRACTION_CACHE_ENABLED:
+            from core.multimodal import lookup_cached_extraction
+            cached = lookup_cached_extraction(payload, modality)
+            if cached is not None:
+                return cached
+
+        with self._limits[_LIMIT_GROUPS.get(modality, modality)]:
+            job_id = uuid.uuid4().hex
+            future = Future()
+            with self._pending_lock:
+                self._pending[job_id] = future
+            self._tasks.put((job_id, modality, payload))
+
+            try:
+                result = future.result(timeout=Config.MULTIMODAL_JOB_TIMEOUT)
+            finally:
+                with self._pending_lock:
+                    self._pending.pop(job_id, None)
+
+        if modality in ("image", "audio") and Config.EXTRACTION_CACHE_ENABLED:
+            from core.multimodal import store_cached_extraction
+            store_cached_extraction(payload, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "alive": sum(w.is_alive() for w in self._workers),
+            "restarts": self.restarts,
+            "pending": len(self._pending),
+        }
+
+    def shutdown(self):
+        self._shutting_down = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+
+
+# -----------------------------
+# Manager (exposes the pool over a local socket)
+# -----------------------------
+class _PoolManager(BaseManager):
+    pass
+
+
+_server_pool = None
+
+
+def _get_server_pool():
+    return _server_pool
+
+
+def serve():
+    """Start the worker pool and serve it to API workers. Blocks forever."""
+    global _server_pool
+    _server_pool = ModelWorkerPool()
+
+    _PoolManager.register("get_pool", callable=_get_server_pool)
+    manager = _PoolManager(
+        address=(Config.MULTIMODAL_WORKER_HOST, Config.MULTIMODAL_WORKER_PORT),
+        authkey=Config.MULTIMODAL_WORKER_AUTHKEY,
+    )
+    server = manager.get_server()
+    print(
+        f"Model worker pool ({Config.MULTIMODAL_WORKERS} workers) listening on "
+        f"{Config.MULTIMODAL_WORKER_HOST}:{Config.MULTIMODAL_WORKER_PORT}"
+    )
+    try:
+        server.serve_forever()
+    finally:
+        _server_pool.shutdown()
+
+
+# -----------------------------
+# Client (used by API workers)
+# -----------------------------
+_client_pool = None
+_client_lock = threading.Lock()
+
+
+def _remote_pool():
+    global _client_pool
+    if _client_pool is None:
+        with _client_lock:
+            if _client_pool is None:
+                _PoolManager.register("get_pool")
+                manager = _PoolManager(
+                    address=(Config.MULTIMODAL_WORKER_HOST, Config.MULTIMODAL_WORKER_PORT),
+                    authkey=Config.MULTIMODAL_WORKER_AUTHKEY,
+                )
+                manager.connect()
+                _client_pool = manager.get_pool()
+    return _client_pool
+
+
+def extract_image(data: bytes) -> dict:
+    """OCR an uploaded image, on the worker pool in pool mode or in-process otherwise."""
+    if Config.MULTIMODAL_WORKER_MODE == "pool":
+        return _remote_pool().submit("image", data)
+    from core.multimodal import process_image_input
+    return process_image_input(data)
+
+
+def extract_audio(data: bytes) -> dict:
+    """Transcribe an uploaded audio clip, on the worker pool in pool mode or in-process otherwise."""
+    if Config.MULTIMODAL_WORKER_MODE == "pool":
+        return _remote_pool().submit("audio", data)
+    from core.multimodal import process_audio_input
+    return process_audio_input(data)
+
+
+def streaming_transcriber():
+    """StreamingTranscriber for a live audio stream; utterances go to the worker pool in pool mode."""
+    from core.multimodal import StreamingTranscriber
+    if Config.MULTIMODAL_WORKER_MODE == "pool":
+        return StreamingTranscriber(transcribe=lambda samples: tuple(_remote_pool().submit("audio_stream", samples)))
+    return StreamingTranscriber()
+
+
+class PooledEmbeddings(Embeddings):
+    """LangChain embeddings adapter that runs MiniLM on the worker pool."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return _remote_pool().submit("embed", list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return _remote_pool().submit("embed", [text])[0]
+
+
+if __name__ == "__main__":
+    serve()
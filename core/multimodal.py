@@ -5,101 +5,273 @@ Handles text, image (OCR with EasyOCR), and audio (ASR with faster-whisper).
 """
 
 import io
-import tempfile
 from pathlib import Path
-from typing import Union
+from typing import Callable, List, Optional, Tuple, Union
 
 import easyocr
 import numpy as np
 from faster_whisper import WhisperModel
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 from PIL import Image
 
 from core.config import Config
+from core.extraction_cache import extraction_cache
+from core.image_preprocessing import preprocess_for_ocr, to_original_box
+from core.model_manager import model_manager
+from core.problem_segmentation import reading_order
 
-# Lazy-loaded global models
-_ocr_reader = None
-_asr_model = None
+# Heavy models are owned by the lifecycle manager (lazy load, idle unload, memory budget)
+model_manager.register("ocr", lambda: easyocr.Reader(["en"], gpu=True))  # GPU if available, else CPU
+model_manager.register("asr", lambda: WhisperModel("small", device="cpu", compute_type="int8"))
 
 
 def _get_ocr_reader():
-    global _ocr_reader
-    if _ocr_reader is None:
-        _ocr_reader = easyocr.Reader(["en"], gpu=True)  # GPU if available, else CPU
-    return _ocr_reader
+    return model_manager.get("ocr")
 
 
 def _get_asr_model():
-    global _asr_model
-    if _asr_model is None:
-        _asr_model = WhisperModel("small", device="cpu", compute_type="int8")
-    return _asr_model
+    return model_manager.get("asr")
+
+
+def _image_cache_variant(preprocess: bool) -> str:
+    # "lines": extractions carry line-level "regions" (older paragraph-mode entries do not)
+    return "image:lines:pre" if preprocess else "image:lines:raw"
+
+
+def lookup_cached_extraction(
+    data: Optional[bytes],
+    source: str,
+    image: Optional[Image.Image] = None,
+    preprocess: bool = Config.OCR_PREPROCESS_ENABLED,
+) -> Optional[dict]:
+    """
+    Look up a previous extraction of the same upload.
+    Images: exact byte match first, then perceptual match for re-encoded copies.
+    """
+    if source == "audio":
+        return extraction_cache.get(data, "audio")
+
+    variant = _image_cache_variant(preprocess)
+    cached = extraction_cache.get(data, variant) if data is not None else None
+    if cached is None and Config.EXTRACTION_CACHE_PHASH_ENABLED:
+        if image is None:
+            image = Image.open(io.BytesIO(data))
+        cached = extraction_cache.get_similar_image(image, variant)
+    return cached
+
+
+def store_cached_extraction(
+    data: bytes,
+    result: dict,
+    image: Optional[Image.Image] = None,
+    preprocess: bool = Config.OCR_PREPROCESS_ENABLED,
+):
+    """Remember an extraction result for future identical (or re-encoded) uploads."""
+    if result["source"] == "audio":
+        extraction_cache.put(data, "audio", result)
+        return
+
+    if image is None and Config.EXTRACTION_CACHE_PHASH_ENABLED:
+        image = Image.open(io.BytesIO(data))
+    extraction_cache.put(data, _image_cache_variant(preprocess), result, image=image)
+
+
+def _transcribe(model, audio) -> Tuple[str, float]:
+    """
+    Transcribe audio (file-like object or float32 16 kHz array) in a single pass
+    over the lazy `segments` generator, collecting text and confidence together.
+    """
+    segments, _ = model.transcribe(audio, beam_size=5, language="en")
+
+    raw_text_parts = []
+    confidences = []
+    for seg in segments:
+        raw_text_parts.append(seg.text.strip())
+        if getattr(seg, "avg_logprob", None) is not None:
+            confidences.append(np.exp(seg.avg_logprob))
+
+    raw_text = " ".join(part for part in raw_text_parts if part).strip()
+    confidence = float(np.mean(confidences)) if confidences else 0.8
+    return raw_text, confidence
+
+
+def transcribe_samples(samples: np.ndarray) -> Tuple[str, float]:
+    """Transcribe one float32 16 kHz utterance with the managed Whisper model."""
+    with model_manager.use("asr") as model:
+        return _transcribe(model, samples)
 
 
 def process_text_input(text: str) -> dict:
     return {"raw_text": text.strip(), "confidence": 1.0, "source": "text"}
 
 
-def process_image_input(image: Union[Image.Image, bytes, Path, str]) -> dict:
+def process_image_input(
+    image: Union[Image.Image, bytes, Path, str],
+    preprocess: bool = Config.OCR_PREPROCESS_ENABLED,
+    use_cache: bool = Config.EXTRACTION_CACHE_ENABLED,
+) -> dict:
+    data = None
     if isinstance(image, (str, Path)):
-        image = Image.open(image)
+        data = Path(image).read_bytes()
     elif isinstance(image, bytes):
-        image = Image.open(io.BytesIO(image))
+        data = image
+    if data is not None:
+        image = Image.open(io.BytesIO(data))
+
+    if use_cache:
+        cached = lookup_cached_extraction(data, "image", image=image, preprocess=preprocess)
+        if cached is not None:
+            return cached
+    original_image = image
 
-    if image.mode != "RGB":
+    transform = (0, 0, 1.0)
+    if preprocess:
+        # Rotate, grayscale, crop and downscale before OCR (see core/image_preprocessing.py)
+        image, transform = preprocess_for_ocr(image, with_transform=True)
+    elif image.mode != "RGB":
         image = image.convert("RGB")
 
-    reader = _get_ocr_reader()
-    results = reader.readtext(np.array(image), detail=1, paragraph=True)
+    # Line-level results: paragraph mode merges neighbouring problems and drops confidences
+    with model_manager.use("ocr") as reader:
+        results = reader.readtext(np.array(image), detail=1, paragraph=False)
 
-    # Safe text extraction
-    raw_text_parts = []
-    confidences = []
+    # Safe text extraction; boxes are mapped back to the uploaded image's pixels
+    regions = []
     for res in results:
-        if len(res) >= 2:
-            raw_text_parts.append(res[1])
-        if len(res) >= 3 and isinstance(res[2], (int, float)):
-            confidences.append(res[2])
+        if len(res) < 2 or not str(res[1]).strip():
+            continue
+        regions.append({
+            "text": str(res[1]).strip(),
+            "box": to_original_box(res[0], transform),
+            "confidence": round(float(res[2]), 3) if len(res) >= 3 and isinstance(res[2], (int, float)) else 0.0,
+        })
+    regions = reading_order(regions)
 
-    raw_text = " ".join(raw_text_parts) if raw_text_parts else "(No text detected)"
-    confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    raw_text = " ".join(r["text"] for r in regions) if regions else "(No text detected)"
+    confidence = sum(r["confidence"] for r in regions) / len(regions) if regions else 0.0
 
-    return {
+    result = {
         "raw_text": raw_text.strip(),
         "confidence": round(float(confidence), 3),
         "source": "image",
+        "regions": regions,
     }
 
+    if use_cache and data is not None:
+        store_cached_extraction(data, result, image=original_image, preprocess=preprocess)
 
-def process_audio_input(audio: Union[bytes, Path, str]) -> dict:
-    model = _get_asr_model()
+    return result
 
-    if isinstance(audio, bytes):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            tmp.write(audio)
-            audio_path = tmp.name
-    else:
-        audio_path = str(audio)
 
-    segments, _ = model.transcribe(audio_path, beam_size=5, language="en")
+def process_audio_input(
+    audio: Union[bytes, Path, str],
+    use_cache: bool = Config.EXTRACTION_CACHE_ENABLED,
+) -> dict:
+    data = audio if isinstance(audio, bytes) else Path(audio).read_bytes()
+    if use_cache:
+        cached = lookup_cached_extraction(data, "audio")
+        if cached is not None:
+            return cached
 
-    raw_text_parts = [seg.text.strip() for seg in segments]
-    raw_text = " ".join(raw_text_parts)
+    # faster-whisper decodes file-like objects in memory (PyAV), so no temp file is needed
+    with model_manager.use("asr") as model:
+        raw_text, confidence = _transcribe(model, io.BytesIO(data))
 
-    confidences = []
-    for seg in segments:
-        if hasattr(seg, "avg_logprob") and seg.avg_logprob is not None:
-            confidences.append(np.exp(seg.avg_logprob))
-
-    confidence = float(np.mean(confidences)) if confidences else 0.8
-
-    if isinstance(audio, bytes):
-        try:
-            Path(audio_path).unlink(missing_ok=True)
-        except Exception:
-            pass  # ignore cleanup errors
-
-    return {
-        "raw_text": raw_text.strip() if raw_text else "(No audio detected)",
+    result = {
+        "raw_text": raw_text if raw_text else "(No audio detected)",
         "confidence": round(confidence, 3),
         "source": "audio",
     }
+
+    if use_cache:
+        store_cached_extraction(data, result)
+
+    return result
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a live audio stream.
+
+    Feed raw 16-bit little-endian mono PCM at Config.ASR_SAMPLE_RATE via add_chunk().
+    Silero VAD (bundled with faster-whisper) finds utterance boundaries; each
+    utterance is transcribed as soon as it is followed by a short pause, so text
+    is available while the student is still speaking. `speech_ended` turns True
+    once a longer pause follows recognised speech, i.e. the student has stopped.
+
+    `transcribe` turns an utterance into (text, confidence); it defaults to the
+    in-process Whisper model (core/model_workers.py passes the worker pool instead).
+    """
+
+    def __init__(self, transcribe: Optional[Callable[[np.ndarray], Tuple[str, float]]] = None):
+        if transcribe is None:
+            _get_asr_model()  # load up front so the first utterance is not delayed
+            transcribe = transcribe_samples
+        self._transcribe = transcribe
+        self.sample_rate = Config.ASR_SAMPLE_RATE
+        self.vad_options = VadOptions(min_silence_duration_ms=Config.ASR_STREAM_MIN_SILENCE_MS)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._odd_byte = b""  # a frame may split a 16-bit sample; its first byte waits for the next frame
+        self._text_parts: List[str] = []
+        self._confidences: List[float] = []
+        self._trailing_silence = 0  # samples of silence since the last detected speech
+        self.speech_ended = False
+
+    def _ms_to_samples(self, ms: int) -> int:
+        return int(self.sample_rate * ms / 1000)
+
+    def _commit(self, audio: np.ndarray):
+        text, confidence = self._transcribe(audio)
+        if text:
+            self._text_parts.append(text)
+            self._confidences.append(confidence)
+        return text
+
+    def add_chunk(self, pcm_bytes: bytes) -> List[str]:
+        """Append a PCM chunk; returns the text of any utterances completed by it."""
+        pcm_bytes = self._odd_byte + pcm_bytes
+        whole = len(pcm_bytes) - len(pcm_bytes) % 2
+        pcm_bytes, self._odd_byte = pcm_bytes[:whole], pcm_bytes[whole:]
+        samples = np.frombuffer(pcm_bytes, dtype="<i2").astype(np.float32) / 32768.0
+        self._buffer = np.concatenate([self._buffer, samples])
+
+        if len(self._buffer) < self._ms_to_samples(Config.ASR_STREAM_MIN_SILENCE_MS):
+            return []
+
+        speech = get_speech_timestamps(self._buffer, self.vad_options)
+        completed = []
+
+        if not speech:
+            # Pure silence: keep only a short tail so the buffer never grows unbounded
+            self._trailing_silence += len(samples)
+            self._buffer = self._buffer[-self._ms_to_samples(Config.ASR_STREAM_MIN_SILENCE_MS):]
+        else:
+            last_end = speech[-1]["end"]
+            self._trailing_silence = len(self._buffer) - last_end
+            buffer_full = len(self._buffer) >= Config.ASR_STREAM_MAX_BUFFER_SECONDS * self.sample_rate
+
+            if self._trailing_silence >= self._ms_to_samples(Config.ASR_STREAM_MIN_SILENCE_MS) or buffer_full:
+                cut = len(self._buffer) if buffer_full else last_end
+                text = self._commit(self._buffer[:cut])
+                if text:
+                    completed.append(text)
+                self._buffer = self._buffer[cut:]
+
+        if self._text_parts and self._trailing_silence >= self._ms_to_samples(Config.ASR_STREAM_END_SILENCE_MS):
+            self.speech_ended = True
+
+        return completed
+
+    def finish(self) -> dict:
+        """Transcribe any remaining buffered audio and return the usual extraction dict."""
+        if len(self._buffer) and get_speech_timestamps(self._buffer, self.vad_options):
+            self._commit(self._buffer)
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+        raw_text = " ".join(self._text_parts).strip()
+        confidence = float(np.mean(self._confidences)) if self._confidences else 0.8
+        return {
+            "raw_text": raw_text if raw_text else "(No audio detected)",
+            "confidence": round(confidence, 3),
+            "source": "audio",
+        }
@@ -0,0 +1,208 @@
+# File: core/numeric_linalg.py
+"""
+Linear-algebra engine behind the `linear_algebra_calculator` tool.
+
+sympy_calculator computes determinants, inverses and eigenvalues exactly with
+sp.Matrix. That is fine for the 2×2 and 3×3 matrices most problems use, but
+the cost grows very quickly with size: an 8×8 inverse or eigenvalue problem
+can stall the solver for a long time. This engine:
+
+- stays exact (SymPy) for matrices up to Config.LINALG_EXACT_MAX_SIZE, and for
+  any matrix with symbolic entries
+- switches to vectorized NumPy (LAPACK) above that size
+- rationalizes numeric results when the input is rational: a value is shown as
+  p/q (q ≤ Config.LINALG_RATIONALIZE_MAX_DENOMINATOR) only when it agrees with
+  the float within a tolerance. That tolerance grows with the matrix's
+  condition number, because ill-conditioned inputs lose more digits.
+  Irrational eigenvalues stay as floats, and so do results with more than
+  Config.LINALG_RATIONALIZE_MAX_ENTRIES entries.
+
+Operations: det, inverse, eigenvalues, solve (A x = b), rank.
+"""
+
+import json
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import sympy as sp
+
+from core.config import Config
+
+OPERATIONS = ("det", "inverse", "eigenvalues", "solve", "rank")
+METHODS = ("auto", "exact", "numeric")
+
+
+# -----------------------------
+# Input handling
+# -----------------------------
+def _to_sympy_matrix(rows: List[List[Any]]) -> sp.Matrix:
+    return sp.Matrix([[sp.nsimplify(v) if isinstance(v, float) else sp.sympify(v) for v in row] for row in rows])
+
+
+def _plain_numbers(rows: List[List[Any]]) -> bool:
+    """True when every entry is already an int/float (no SymPy parsing needed for NumPy)."""
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for row in rows for v in row)
+
+
+def _is_numeric(matrix: sp.Matrix) -> bool:
+    return all(entry.is_number for entry in matrix)
+
+
+def _is_rational(matrix: sp.Matrix) -> bool:
+    return all(entry.is_Rational for entry in matrix)
+
+
+def _check_shape(matrix: sp.Matrix, operation: str):
+    if operation in ("det", "inverse", "eigenvalues", "solve") and matrix.rows != matrix.cols:
+        raise ValueError(f"'{operation}' needs a square matrix, got {matrix.rows}×{matrix.cols}")
+
+
+# -----------------------------
+# Rationalization
+# -----------------------------
+def rationalize(value: float, atol: float, max_denominator: int = Config.LINALG_RATIONALIZE_MAX_DENOMINATOR) -> Any:
+    """p/q as a string if it matches `value` within atol, else the float itself."""
+    if not np.isfinite(value):
+        return float(value)
+    fraction = Fraction(float(value)).limit_denominator(max_denominator)
+    if abs(float(fraction) - value) <= atol:
+        return str(fraction)
+    return float(value)
+
+
+def _rationalize_array(values: np.ndarray, rtol: float) -> Any:
+    """
+    Rationalize every entry. The tolerance is relative to the largest entry of the
+    result, so round-off noise in an inverse snaps to 0 while a genuinely tiny
+    determinant (e.g. of a Hilbert matrix) is kept as a float.
+    """
+    scale = float(np.max(np.abs(values))) if values.size else 0.0
+    atol = rtol * scale
+    if np.iscomplexobj(values):
+        if np.all(np.abs(values.imag) <= atol):
+            values = values.real
+        else:
+            return [{"re": rationalize(v.real, atol), "im": rationalize(v.imag, atol)} for v in np.ravel(values)]
+    if values.ndim == 0:
+        return rationalize(float(values), atol)
+    return [rationalize(float(v), atol) if np.ndim(v) == 0 else [rationalize(float(x), atol) for x in v] for v in values]
+
+
+def _tolerance(a: np.ndarray) -> float:
+    """Relative tolerance for accepting p/q: configured floor, widened by the condition number."""
+    if a.shape[0] != a.shape[1]:
+        return Config.LINALG_RATIONALIZE_RTOL
+    cond = np.linalg.cond(a)
+    if not np.isfinite(cond):
+        return Config.LINALG_RATIONALIZE_RTOL
+    return max(Config.LINALG_RATIONALIZE_RTOL, np.finfo(float).eps * cond * a.shape[0])
+
+
+# -----------------------------
+# Engines
+# -----------------------------
+def _exact(matrix: sp.Matrix, operation: str, b: Optional[List[Any]]) -> Any:
+    if operation == "det":
+        return str(sp.simplify(matrix.det()))
+    if operation == "inverse":
+        return [[str(sp.simplify(v)) for v in row] for row in matrix.inv().tolist()]
+    if operation == "eigenvalues":
+        return {str(k): int(m) for k, m in matrix.eigenvals().items()}
+    if operation == "solve":
+        rhs = sp.Matrix([sp.sympify(v) for v in b])
+        return [str(sp.simplify(v)) for v in matrix.LUsolve(rhs)]
+    return int(matrix.rank())
+
+
+def _numeric(a: np.ndarray, operation: str, b: Optional[List[Any]], rational_input: bool) -> Any:
+    if operation == "rank":
+        return int(np.linalg.matrix_rank(a))
+    rtol = _tolerance(a) if rational_input else None
+    if operation == "det":
+        sign, logdet = np.linalg.slogdet(a)
+        if np.isfinite(logdet) and logdet > np.log(np.finfo(float).max):
+            # Too large for a float; report it in log form instead of inf
+            return {"sign": int(sign), "log10_abs": float(logdet / np.log(10))}
+        result = np.asarray(sign * np.exp(logdet))
+    elif operation == "inverse":
+        result = np.linalg.inv(a)
+    elif operation == "eigenvalues":
+        result = np.linalg.eigvals(a)
+        # Sorted for stable output: by real part, then imaginary part
+        result = result[np.lexsort((result.imag, result.real))]
+    else:
+        result = np.linalg.solve(a, np.asarray(b, dtype=float))
+
+    # Nobody reads a 100×100 inverse as fractions; skip the per-entry work there
+    if rational_input and result.size <= Config.LINALG_RATIONALIZE_MAX_ENTRIES:
+        return _rationalize_array(result, rtol)
+    if np.iscomplexobj(result):
+        return [{"re": float(v.real), "im": float(v.imag)} for v in np.ravel(result)]
+    return result.tolist()
+
+
+def compute(operation: str, matrix: List[List[Any]], b: Optional[List[Any]] = None, method: str = "auto") -> Dict:
+    """
+    Run a linear-algebra operation. method: "auto" (exact up to LINALG_EXACT_MAX_SIZE),
+    "exact" or "numeric". Returns {"operation", "method", "size", "result"}.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}'. Choose one of: {', '.join(OPERATIONS)}")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Choose one of: {', '.join(METHODS)}")
+    if operation == "solve" and b is None:
+        raise ValueError("'solve' needs a right-hand side 'b'")
+
+    size = max(len(matrix), max((len(row) for row in matrix), default=0))
+    if method == "auto" and size > Config.LINALG_EXACT_MAX_SIZE and _plain_numbers(matrix):
+        method = "numeric"
+
+    if method != "numeric" or not _plain_numbers(matrix):
+        sym = _to_sympy_matrix(matrix)
+        _check_shape(sym, operation)
+        numeric_ok = _is_numeric(sym)
+        if method == "auto":
+            method = "numeric" if numeric_ok and size > Config.LINALG_EXACT_MAX_SIZE else "exact"
+        if method == "numeric" and not numeric_ok:
+            raise ValueError("Matrix has symbolic entries; only the exact method applies")
+        if method == "exact":
+            result = _exact(sym, operation, b)
+            return {"operation": operation, "method": method, "size": size, "result": result}
+        a, rational_input = np.array(sym.evalf().tolist(), dtype=float), _is_rational(sym)
+    else:
+        # Plain numbers go straight to NumPy; integer input is exact, so its results can be rationalized
+        a = np.array(matrix, dtype=float)
+        if a.ndim != 2:
+            raise ValueError("'matrix' must be a list of equal-length rows")
+        if operation != "rank" and a.shape[0] != a.shape[1]:
+            raise ValueError(f"'{operation}' needs a square matrix, got {a.shape[0]}×{a.shape[1]}")
+        rational_input = all(isinstance(v, int) for row in matrix for v in row)
+
+    result = _numeric(a, operation, b, rational_input=rational_input)
+    return {"operation": operation, "method": "numeric", "size": size, "result": result}
+
+
+def run_tool(tool_input: str) -> str:
+    """Tool entry point: JSON in, JSON out (errors are returned as text for the agent to read)."""
+    try:
+        request = json.loads(tool_input)
+        result = compute(
+            request["operation"],
+            request["matrix"],
+            b=request.get("b"),
+            method=request.get("method", "auto"),
+        )
+        return json.dumps(result)
+    except np.linalg.LinAlgError as e:
+        return f"Error: matrix is singular or the computation did not converge ({e})"
+    except (ValueError, KeyError, TypeError, sp.SympifyError) as e:
+        return f"Error: {e}"
+
+
+if __name__ == "__main__":
+    print(run_tool(json.dumps({"operation": "det", "matrix": [[2, 1], [1, 3]]})))
+    print(run_tool(json.dumps({"operation": "inverse", "matrix": [[4, 7], [2, 6]], "method": "numeric"})))
+    print(run_tool(json.dumps({"operation": "eigenvalues", "matrix": [[2, 0, 0], [0, 3, 4], [0, 4, 9]]})))
+    hilbert = [[1 / (i + j + 1) for j in range(8)] for i in range(8)]
+    print(run_tool(json.dumps({"operation": "det", "matrix": hilbert})))
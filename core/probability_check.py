@@ -0,0 +1,380 @@
+# File: core/probability_check.py
+"""
+Monte Carlo cross-check for probability answers.
+
+Before this, verify_solution() relied entirely on the LLM for probability
+problems, and these are easy to get wrong (see
+knowledge/solution_patterns/probability_conditional.md). This checker
+recognises the common textbook setups:
+
+- coins:  "three coins are tossed", "a coin is flipped 5 times"
+- dice:   "two dice are rolled", "a die is thrown twice"
+- cards:  "two cards are drawn from a standard deck" (with/without replacement)
+- urns:   "a bag contains 3 red and 2 blue balls; two balls are drawn"
+
+It also recognises the event asked about (exactly / at least / at most k of
+something, all / none, sums, doubles, even / odd). The count and its noun must
+make up the whole clause ("exactly two heads", "both are red"), so "at least one
+red ace" or "two heads and one tail" is not read as a simpler event. The setup is simulated with
+Config.PROB_CHECK_TRIALS trials in a single vectorized NumPy pass, which takes
+milliseconds. Each draw is one array of uniforms over all trials; without
+replacement, the success probability of a draw depends on the earlier ones.
+The solver's answer agrees when it lies within Config.PROB_CHECK_Z standard
+errors of the estimate, widened by the rounding of a decimal answer.
+
+Anything else returns None: conditional ("given that") problems, and events with
+"or", "or more" / "or less", "not", "neither", "same", an order ("first ...
+second") or two conditions joined by "and" ("at least one 6 and the sum is 8";
+"one red and one blue" is a single count), which the patterns above would read
+as a different event. Those go to the LLM verifier as before; an agreeing
+result replaces the verifier call (agents/cascade.py).
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from core.config import Config
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "single": 1, "two": 2, "both": 2, "pair": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+_TIMES_WORDS = {"once": 1, "twice": 2, "thrice": 3}
+_NUM = r"(\d+|a|an|one|single|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)"
+
+# Unsupported: conditioning, sequences of different experiments, unfair coins/dice
+_UNSUPPORTED = re.compile(r"\bgiven\b|\bconditional\b|\bknown that\b|\bbiased\b|\bunfair\b|\bloaded\b|\bif it is\b", re.I)
+# Unsupported events: unions, complements, ties between outcomes, ordered outcomes
+_UNSUPPORTED_EVENT = re.compile(
+    r"\bor\b|\bnot\b|n't\b|\bneither\b|\bnor\b|\bsame\b|\bfirst\b.*\bsecond\b", re.I
+)
+
+# The event asked about: what follows the last "probability" (or the last sentence)
+_EVENT_START = re.compile(r".*\bprobability\b|.*[.?!]\s+(?=\S)", re.S)
+_ONE_AND_ONE = re.compile(r"\b(?:one|1)\s+\w+\s+and\s+one\s+\w+")
+
+# What may follow a count noun before the clause ends ("2 red balls are drawn")
+_CLAUSE_TAIL = re.compile(
+    r"\s*(?:balls?|marbles?|cards?)?\s*(?:(?:are|is|were)\s+)?"
+    r"(?:drawn|obtained|selected|picked|chosen|shown|appears?|occurs?|(?:come|comes|turn|turns|show|shows)\s+up)?\s*"
+    r"(?:$|[.,;:?!)]|\b(?:when|if|in|from|on|with|without)\b)"
+)
+
+_CARD_CATEGORIES = {
+    "ace": 4, "king": 4, "queen": 4, "jack": 4, "face card": 12, "picture card": 12,
+    "heart": 13, "diamond": 13, "club": 13, "spade": 13, "red card": 26, "black card": 26,
+    "red": 26, "black": 26,
+}
+_COLOURS = r"(red|blue|green|white|black|yellow|orange|purple|pink)"
+
+# (comparison words, operator) for "exactly 2 heads", "at least one ace", ...
+_COMPARISONS = [
+    (r"exactly", lambda c, k: c == k),
+    (r"at least", lambda c, k: c >= k),
+    (r"at most|no more than", lambda c, k: c <= k),
+    (r"more than|greater than|over", lambda c, k: c > k),
+    (r"fewer than|less than|under", lambda c, k: c < k),
+]
+
+
+def _number(word: str) -> Optional[int]:
+    word = word.lower()
+    if word.isdigit():
+        return int(word)
+    return _NUMBER_WORDS.get(word)
+
+
+# -----------------------------
+# Answer parsing
+# -----------------------------
+def parse_probability(answer: str) -> Tuple[Optional[float], float]:
+    """
+    (value, rounding tolerance) from a solver answer such as "3/8", "0.375",
+    "\\boxed{\\frac{3}{8}}" or "37.5%". (None, 0) when no single probability is found.
+    """
+    text = str(answer).replace("\\dfrac", "\\frac").replace(" ", "")
+    text = re.sub(r"\\frac\{(\d+)\}\{(\d+)\}", r"\1/\2", text)
+    fractions = re.findall(r"(\d+)/(\d+)", text)
+    if fractions:
+        num, den = fractions[-1]
+        value = int(num) / int(den) if int(den) else None
+        return (value, 0.0) if value is not None and 0 <= value <= 1 else (None, 0.0)
+
+    decimals = re.findall(r"(\d*\.\d+|\d+)(%?)", text)
+    if not decimals:
+        return None, 0.0
+    digits, percent = decimals[-1]
+    value = float(digits) / (100 if percent else 1)
+    places = len(digits.split(".")[1]) if "." in digits else 0
+    rounding = 0.5 * 10 ** -places / (100 if percent else 1)
+    if not 0 <= value <= 1 or (not percent and "." not in digits and value not in (0, 1)):
+        return None, 0.0
+    return value, rounding
+
+
+# -----------------------------
+# Events on a count of successes
+# -----------------------------
+def _compound_event(text: str) -> bool:
+    """True when the event has more than one condition joined by "and"."""
+    match = _EVENT_START.match(text)
+    event = text[match.end():] if match else text
+    return bool(re.search(r"\band\b", _ONE_AND_ONE.sub("", event)))
+
+
+def _ends_clause(text: str, match) -> bool:
+    """True when nothing but filler ("balls", "are drawn") follows the match before the clause ends."""
+    return _CLAUSE_TAIL.match(text, match.end()) is not None
+
+
+def _search_clause(pattern: str, text: str):
+    """First match of `pattern` that ends its clause."""
+    return next((m for m in re.finditer(pattern, text) if _ends_clause(text, m)), None)
+
+
+def _count_event(text: str, noun: str, draws: int) -> Optional[Tuple[str, Callable]]:
+    """Predicate on the number of `noun` outcomes (noun is a regex), with a description."""
+    plural = rf"(?:{noun})(?:e?s)?"
+    for words, op in _COMPARISONS:
+        match = _search_clause(rf"\b(?:{words})\s+{_NUM}\s+{plural}\b", text)
+        if match and _number(match.group(1)) is not None:
+            k = _number(match.group(1))
+            return f"{match.group(0)}", lambda c, k=k, op=op: op(c, k)
+    match = _search_clause(rf"\b(?:both|all)\b(?:\s+(?:of\s+them|\d+|\w+))?\s+(?:are\s+)?{plural}\b", text)
+    if match:
+        return match.group(0), lambda c: c == draws
+    match = _search_clause(rf"\bno\s+{plural}\b|\bnone\s+(?:of\s+them\s+)?(?:are\s+|is\s+)?{plural}\b", text)
+    if match:
+        return match.group(0), lambda c: c == 0
+    match = _search_clause(rf"\b(?:one|1)\s+{plural}\s+and\s+one\s+\w+", text)
+    if match and draws == 2:
+        return match.group(0), lambda c: c == 1
+    if draws == 1 and _search_clause(rf"\b(?:a|an|the)\s+{plural}\b", text):
+        return f"a {noun}", lambda c: c == 1
+    return None
+
+
+# -----------------------------
+# Vectorized draws (one float32 uniform array per draw; faster than rng.binomial/hypergeometric)
+# -----------------------------
+def _successes(rng, draws: int, good: int, total: int, replace: bool, trials: int) -> np.ndarray:
+    """Number of 'good' items in `draws` draws from `total` items, for every trial."""
+    counts = np.zeros(trials, dtype=np.int16)
+    for i in range(draws):
+        if replace:
+            p = np.float32(good / total)
+        else:
+            p = ((good - counts) / np.float32(total - i)).astype(np.float32)
+        counts += rng.random(trials, dtype=np.float32) < p
+    return counts
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+def _coins(text: str, rng, trials: int):
+    # "a coin is tossed 5 times" before "a coin is tossed"
+    match = (
+        re.search(rf"coin\s+is\s+(?:tossed|flipped)\s+{_NUM}\s+times", text)
+        or re.search(rf"{_NUM}\s+(?:fair\s+)?coins?\s+(?:are|is)?\s*(?:tossed|flipped)", text)
+    )
+    if match:
+        n = _number(match.group(1))
+    else:
+        match = re.search(r"coin\s+is\s+(?:tossed|flipped)\s+(once|twice|thrice)", text)
+        n = _TIMES_WORDS[match.group(1)] if match else None
+    if not n:
+        return None
+    event = _count_event(text, "head", n)
+    target = "heads"
+    if event is None:
+        event, target = _count_event(text, "tail", n), "tails"
+    if event is None:
+        return None
+    heads = _successes(rng, n, 1, 2, True, trials)
+    counts = heads if target == "heads" else n - heads
+    return f"{n} fair coin toss(es), {event[0]}", event[1](counts)
+
+
+def _dice(text: str, rng, trials: int):
+    match = (
+        re.search(rf"{_NUM}\s+(?:fair\s+)?(?:six-sided\s+)?dice\s+(?:are\s+)?(?:rolled|thrown|tossed)", text)
+        or re.search(rf"(?:die|dice)\s+is\s+(?:rolled|thrown|tossed)\s+{_NUM}\s+times", text)
+    )
+    if match:
+        n = _number(match.group(1))
+    elif re.search(r"pair\s+of\s+dice", text):
+        n = 2
+    else:
+        match = re.search(r"die\s+is\s+(?:rolled|thrown|tossed)(?:\s+(once|twice|thrice))?", text)
+        n = (_TIMES_WORDS[match.group(1)] if match.group(1) else 1) if match else None
+    if not n:
+        return None
+
+    # One row per die: reductions across dice become element-wise adds over contiguous rows
+    faces = rng.integers(1, 7, size=(n, trials), dtype=np.int8)
+    total = faces.sum(axis=0, dtype=np.int16)
+
+    match = _search_clause(r"sum\b(?:\s+of\s+(?:the\s+)?\w+)?\s+(?:is\s+|equals?\s+|of\s+)?(?:(exactly|at least|at most|greater than|more than|less than|fewer than)\s+)?(?:to\s+)?(\d+)\b", text)
+    if match:
+        k = int(match.group(2))
+        op = next((op for words, op in _COMPARISONS if match.group(1) and re.fullmatch(words, match.group(1))), None)
+        return f"{n} dice, {match.group(0)}", (op(total, k) if op else total == k)
+    match = re.search(r"sum\b.{0,20}?\b(even|odd)\b", text)
+    if match:
+        return f"{n} dice, sum is {match.group(1)}", (total % 2 == 0) if match.group(1) == "even" else (total % 2 == 1)
+    if n == 2 and re.search(r"\bdoubles?\b", text):
+        return "2 dice, doubles", faces[0] == faces[1]
+    match = re.search(r"product\b.{0,20}?\b(even|odd)\b", text)
+    if match:
+        odd = np.all(faces % 2 == 1, axis=0)
+        return f"{n} dice, product is {match.group(1)}", ~odd if match.group(1) == "even" else odd
+
+    for face, word in ((6, "six"), (5, "five"), (4, "four"), (3, "three"), (2, "two"), (1, "one")):
+        event = _count_event(text, rf"{word}|{face}", n)
+        if event is not None and re.search(rf"\b(?:{word}e?s|{face}s|{word}|{face})\b", event[0]):
+            return f"{n} dice, {event[0]}", event[1]((faces == face).sum(axis=0, dtype=np.int16))
+
+    if n == 1:
+        value = faces[0]
+        match = re.search(r"\b(even|odd|prime)\s+number\b", text)
+        if match:
+            kind = match.group(1)
+            hit = value % 2 == 0 if kind == "even" else value % 2 == 1 if kind == "odd" else (value == 2) | (value == 3) | (value == 5)
+            return f"1 die, {kind} number", hit
+        match = _search_clause(r"\b(greater than|more than|less than|at least|at most)\s+(\d+)\b", text)
+        if match:
+            op = next(op for words, op in _COMPARISONS if re.fullmatch(words, match.group(1)))
+            return f"1 die, {match.group(0)}", op(value, int(match.group(2)))
+    return None
+
+
+def _cards(text: str, rng, trials: int):
+    if not re.search(r"\b(?:deck|pack)\b", text):
+        return None
+    match = re.search(rf"{_NUM}\s+cards?\s+(?:are\s+|is\s+)?(?:drawn|dealt|selected|picked|chosen)", text)
+    n = _number(match.group(1)) if match else None
+    if not n or n > 52:
+        return None
+    for category, good in sorted(_CARD_CATEGORIES.items(), key=lambda item: -len(item[0])):
+        event = _count_event(text, category.replace(" ", r"\s+"), n)
+        if event is None:
+            continue
+        replace = bool(re.search(r"\bwith\s+replacement\b", text))
+        counts = _successes(rng, n, good, 52, replace, trials)
+        return f"{n} card(s) {'with' if replace else 'without'} replacement, {event[0]}", event[1](counts)
+    return None
+
+
+def _urn(text: str, rng, trials: int):
+    match = re.search(r"\b(?:bag|urn|box|jar)\s+(?:contains|has)\s+(.+?)\b(?:balls|marbles)\b", text)
+    if not match:
+        return None
+    colours = {colour: int(count) for count, colour in re.findall(rf"(\d+)\s+{_COLOURS}", match.group(1))}
+    if len(colours) < 2:
+        return None
+    total = sum(colours.values())
+    match = re.search(rf"{_NUM}\s+(?:balls?|marbles?)\s+(?:are\s+|is\s+)?(?:drawn|selected|picked|taken|chosen)", text)
+    n = _number(match.group(1)) if match else None
+    if not n or n > total:
+        return None
+    for colour, good in colours.items():
+        event = _count_event(text, colour, n)
+        if event is None:
+            continue
+        replace = bool(re.search(r"\bwith\s+replacement\b", text))
+        counts = _successes(rng, n, good, total, replace, trials)
+        return f"urn {colours}, {n} draw(s) {'with' if replace else 'without'} replacement, {event[0]}", event[1](counts)
+    return None
+
+
+_SCENARIOS = (_cards, _urn, _dice, _coins)
+
+
+# -----------------------------
+# Check
+# -----------------------------
+class ProbabilityCheckStats:
+    """Counts of checks by outcome (reported with the cascade stats)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"agreed": 0, "disagreed": 0, "unsupported": 0}
+        self.total_ms = 0.0
+
+    def record(self, outcome: str, ms: float = 0.0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.total_ms += ms
+
+    def report(self) -> Dict:
+        with self._lock:
+            checked = self.counts["agreed"] + self.counts["disagreed"]
+            return {
+                **self.counts,
+                "avg_check_ms": round(self.total_ms / checked, 2) if checked else 0.0,
+            }
+
+
+probability_check_stats = ProbabilityCheckStats()
+
+
+def check_probability_answer(problem_text: str, answer: str, trials: int = Config.PROB_CHECK_TRIALS) -> Optional[Dict]:
+    """
+    Simulate the problem and compare with the answer.
+    Returns None when the setup or the answer isn't recognised.
+    """
+    start = time.perf_counter()
+    value, rounding = parse_probability(answer)
+    text = problem_text.lower()
+    if value is None or _UNSUPPORTED.search(text) or _UNSUPPORTED_EVENT.search(text) or _compound_event(text):
+        probability_check_stats.record("unsupported")
+        return None
+
+    rng = np.random.default_rng()
+    for scenario in _SCENARIOS:
+        simulated = scenario(text, rng, trials)
+        if simulated is not None:
+            break
+    else:
+        probability_check_stats.record("unsupported")
+        return None
+
+    description, hits = simulated
+    estimate = float(np.count_nonzero(hits)) / trials
+    stderr = max((estimate * (1 - estimate) / trials) ** 0.5, 1 / trials)
+    margin = Config.PROB_CHECK_Z * stderr + rounding
+    agrees = abs(value - estimate) <= margin
+    ms = (time.perf_counter() - start) * 1000
+    probability_check_stats.record("agreed" if agrees else "disagreed", ms)
+    return {
+        "scenario": description,
+        "trials": trials,
+        "estimate": round(estimate, 6),
+        "interval": [round(max(0.0, estimate - margin), 6), round(min(1.0, estimate + margin), 6)],
+        "answer": value,
+        "agrees": agrees,
+        "ms": round(ms, 2),
+    }
+
+
+if __name__ == "__main__":
+    examples = [
+        ("Three fair coins are tossed. Find the probability of getting exactly two heads.", "3/8"),
+        ("Two dice are rolled. What is the probability that the sum is 7?", "\\frac{1}{6}"),
+        ("Two dice are thrown. Find the probability of getting at least one six.", "0.31"),
+        ("Two cards are drawn from a standard deck without replacement. Find the probability both are aces.", "1/221"),
+        ("A bag contains 3 red and 2 blue balls. Two balls are drawn without replacement. Find P(both red).", "3/10"),
+        ("A bag contains 3 red and 2 blue balls. Two balls are drawn. Find the probability both are red.", "9/25"),
+        ("A card is drawn from a deck. Given that it is red, find the probability it is an ace.", "1/13"),
+        ("Two dice are rolled. What is the probability that the sum is 7 or 11?", "2/9"),
+        ("Three coins are tossed. Find the probability of not getting exactly two heads.", "5/8"),
+        ("Two dice are rolled. Find the probability that at least one die shows 6 and the sum is 8.", "1/18"),
+    ]
+    for problem, answer in examples:
+        print(problem, "->", answer)
+        print("   ", check_probability_answer(problem, answer))
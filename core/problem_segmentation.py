@@ -0,0 +1,168 @@
+# File: core/problem_segmentation.py
+"""
+Split an OCR'd worksheet page into separate problems.
+
+process_image_input() used to return one raw_text for the whole page, so a photo of a
+worksheet with several numbered problems reached the parser as a single jumble,
+and the parser usually asked for clarification. This stage uses the
+line-level EasyOCR boxes (extraction["regions"]) and numbering cues instead:
+
+1. Reading order: lines are grouped into columns, split at a vertical gutter
+   that no line crosses. Within a column, lines are sorted top to bottom, then
+   left to right within a text row.
+2. Numbering cues: a line that starts with "1.", "2)", "(3)", "Q4", "Q.5" or
+   "Question 6" starts a new problem when it continues the numbering of the
+   problem above (next number, same cue style) and is not indented from the
+   column margin. Other lines, including MCQ options such as "(1) 2" under
+   "1. If x^2 = 4 ...", belong to the problem above them.
+3. Lines before the first cue (titles, instructions) are reported as the header
+   and are not solved.
+
+Each problem keeps the union of its line boxes (original image pixels), so
+clients can highlight which region of the page a result belongs to. A page
+with fewer than two numbered problems is treated as a single problem.
+"""
+
+import re
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+from core.config import Config
+
+_NUMBER_CUE = re.compile(
+    r"^\s*(?:(?:Q(?:uestion)?|Problem|Prob|Ex)\s*\.?\s*(\d{1,2})\s*[.):\-]?|(\()?(\d{1,2})\s*([.)\]:]))\s+",
+    re.I,
+)
+
+
+def _cue(text: str) -> Optional[Tuple[int, str]]:
+    """(number, style) for a numbering cue; the style is "word" (Q3, Question 3) or the punctuation ("(.)", ".")."""
+    match = _NUMBER_CUE.match(text)
+    if not match:
+        return None
+    if match.group(1):
+        return int(match.group(1)), "word"
+    return int(match.group(3)), (match.group(2) or "") + match.group(4)
+
+
+def numbering_cue(text: str) -> Optional[int]:
+    """Problem number if the line starts with a numbering cue ("3.", "(3)", "Q3", "Question 3:")."""
+    cue = _cue(text)
+    return cue[0] if cue else None
+
+
+def _union(boxes: List[List[int]]) -> List[int]:
+    return [
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    ]
+
+
+def _columns(regions: List[Dict]) -> List[List[Dict]]:
+    """Split regions at vertical gutters that no region crosses (multi-column worksheets)."""
+    spans = sorted((r["box"][0], r["box"][2]) for r in regions)
+    line_height = statistics.median(r["box"][3] - r["box"][1] for r in regions)
+    gutters, reach = [], spans[0][1]
+    for left, right in spans[1:]:
+        if left - reach >= line_height * Config.SEGMENT_MIN_GUTTER_LINES:
+            gutters.append((reach + left) / 2)
+        reach = max(reach, right)
+
+    columns = [[] for _ in range(len(gutters) + 1)]
+    for region in regions:
+        index = sum(region["box"][0] > gutter for gutter in gutters)
+        columns[index].append(region)
+    # A "column" without its own numbering is more likely a right-aligned answer
+    # blank or margin note than a second column of problems
+    if len(columns) > 1 and sum(any(numbering_cue(r["text"]) is not None for r in c) for c in columns) < 2:
+        return [regions]
+    return columns
+
+
+def _ordered_columns(regions: List[Dict]) -> List[List[Dict]]:
+    """Columns left to right, each sorted top to bottom, left to right within a text row."""
+    if not regions:
+        return []
+    ordered_columns = []
+    for column in _columns(regions):
+        line_height = statistics.median(r["box"][3] - r["box"][1] for r in column)
+        rows, ordered = [], []
+        for region in sorted(column, key=lambda r: (r["box"][1], r["box"][0])):
+            center = (region["box"][1] + region["box"][3]) / 2
+            if rows and abs(center - rows[-1]["center"]) <= line_height / 2:
+                rows[-1]["regions"].append(region)
+            else:
+                rows.append({"center": center, "regions": [region]})
+        for row in rows:
+            ordered.extend(sorted(row["regions"], key=lambda r: r["box"][0]))
+        ordered_columns.append(ordered)
+    return ordered_columns
+
+
+def reading_order(regions: List[Dict]) -> List[Dict]:
+    """Regions sorted column by column, top to bottom, left to right within a text row."""
+    return [region for column in _ordered_columns(regions) for region in column]
+
+
+def segment_problems(regions: List[Dict]) -> Dict:
+    """
+    Group OCR line regions into problems.
+
+    Returns {"problems": [{"number", "text", "box", "confidence", "lines"}], "header": str}.
+    With fewer than two numbered problems, "problems" holds the whole page as one entry.
+    """
+    columns = _ordered_columns(regions)
+    ordered = [region for column in columns for region in column]
+    problems, header = [], []
+    if ordered:
+        max_indent = statistics.median(r["box"][3] - r["box"][1] for r in ordered) * Config.SEGMENT_CUE_INDENT_LINES
+    for column in columns:
+        margin = min(r["box"][0] for r in column)
+        for region in column:
+            cue = _cue(region["text"])
+            starts = (
+                cue is not None
+                and region["box"][0] - margin <= max_indent
+                and (not problems or (cue[0] == problems[-1]["number"] + 1 and cue[1] == problems[-1]["style"]))
+            )
+            if starts:
+                problems.append({"number": cue[0], "style": cue[1], "regions": [region]})
+            elif problems:
+                problems[-1]["regions"].append(region)
+            else:
+                header.append(region)
+
+    if len(problems) < 2:
+        problems = [{"number": None, "regions": ordered}] if ordered else []
+        header = []
+
+    return {
+        "problems": [
+            {
+                "number": problem["number"],
+                "text": " ".join(r["text"] for r in problem["regions"]).strip(),
+                "box": _union([r["box"] for r in problem["regions"]]),
+                "confidence": round(statistics.mean(r.get("confidence", 0.0) for r in problem["regions"]), 3),
+                "lines": len(problem["regions"]),
+            }
+            for problem in problems[:Config.SEGMENT_MAX_PROBLEMS]
+        ],
+        "header": " ".join(r["text"] for r in header).strip(),
+    }
+
+
+if __name__ == "__main__":
+    page = [
+        {"text": "Worksheet 4: Mixed practice", "box": [40, 10, 600, 40]},
+        {"text": "1. If x^2 = 4 and x < 0, then x is", "box": [40, 60, 400, 90]},
+        {"text": "(1) 2", "box": [80, 95, 160, 125]},
+        {"text": "(2) -2", "box": [80, 130, 160, 160]},
+        {"text": "2. Two dice are rolled. Find the", "box": [40, 180, 420, 210]},
+        {"text": "probability that the sum is 7.", "box": [60, 215, 380, 245]},
+        {"text": "3. Find the determinant of [[1, 2], [3, 4]].", "box": [700, 60, 1150, 90]},
+        {"text": "4. Differentiate x sin x.", "box": [700, 120, 1100, 150]},
+    ]
+    for problem in segment_problems(page)["problems"]:
+        print(problem)
@@ -53,7 +53,8 @@ You are an Intent Router Agent for a Math Mentor system.
 
 Given a structured math problem, your job is to:
 - Confirm the topic (must be one of: {topics})
-- Decide which tools the solver might need (e.g., sympy_calculator for symbolic math)
+- Decide which tools the solver might need (e.g., sympy_calculator for symbolic math,
+  linear_algebra_calculator for determinants, inverses, eigenvalues or linear systems of explicit matrices)
 - Suggest RAG depth: "deep" if complex formulas needed, "shallow" if basic, "none" if straightforward
 
 Output strictly in JSON:
@@ -74,6 +75,56 @@ ROUTER_PROMPT = ChatPromptTemplate.from_messages([
     topics=", ".join(Config.SUPPORTED_TOPICS)
 )
 
+# -----------------------------
+# Fused Parser + Router Prompt (one LLM call instead of two)
+# -----------------------------
+PARSE_ROUTE_SYSTEM_PROMPT = """
+You are a combined Math Problem Parser and Intent Router for a Math Mentor system.
+Your task is to take raw extracted text from OCR, ASR, or direct text input, convert it into a clean,
+structured math problem, and then route it.
+
+Parsing steps:
+1. Clean up noise: Fix common OCR/ASR errors (e.g., "l" → "1", "O" → "0", "rn" → "m", etc.).
+2. Identify the full problem statement.
+3. Classify the main topic: only one of {topics}.
+4. Extract key variables mentioned.
+5. Extract any constraints (inequalities, domains, etc.).
+6. Detect if the problem is ambiguous or missing information (e.g., unclear variables, incomplete question).
+   - If ambiguous → set needs_clarification = true and explain why.
+
+Routing steps (based on your parsed problem):
+- Confirm the topic (must be one of: {topics})
+- Decide which tools the solver might need (e.g., sympy_calculator for symbolic math,
+  linear_algebra_calculator for determinants, inverses, eigenvalues or linear systems of explicit matrices)
+- Suggest RAG depth: "deep" if complex formulas needed, "shallow" if basic, "none" if straightforward
+
+Output strictly in JSON with the following schema:
+{{
+  "parsed": {{
+    "problem_text": str,          # Cleaned, full problem statement
+    "topic": str,                 # One of: algebra, probability, calculus, linear_algebra
+    "variables": list[str],       # List of variable names (e.g., ["x", "y", "n"])
+    "constraints": list[str],     # List of constraints (e.g., ["x > 0", "n is integer"])
+    "needs_clarification": bool,  # True if ambiguous or incomplete
+    "clarification_needed": str   # Explanation if needs_clarification is true (otherwise empty string)
+  }},
+  "routing": {{
+    "topic": str,
+    "required_tools": list[str],   # e.g., ["sympy_calculator"] or []
+    "rag_depth": "deep" | "shallow" | "none"
+  }}
+}}
+
+Only output the JSON. No additional text.
+"""
+
+PARSE_ROUTE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", PARSE_ROUTE_SYSTEM_PROMPT),
+    ("human", "Raw input text:\n{raw_text}"),
+]).partial(
+    topics=", ".join(Config.SUPPORTED_TOPICS)
+)
+
 # -----------------------------
 # Solver Agent Prompt
 # -----------------------------
@@ -87,7 +138,8 @@ Rules:
 - Provide the final answer in <answer> tags.
 - List used sources at the end.
 
-Available tools: You can use Python code execution via the 'sympy_calculator' for symbolic math or numerical checks.
+Available tools: You can use Python code execution via the 'sympy_calculator' for symbolic math or numerical checks,
+and 'linear_algebra_calculator' for determinants, inverses, eigenvalues and linear systems of explicit matrices.
 
 Problem:
 {problem_text}
@@ -5,12 +5,13 @@ Hybrid RAG module handling:
 1. Static knowledge base (formulas, templates, common mistakes from knowledge/ directory)
 2. Dynamic memory of solved problems (parsed problem + solution + feedback)
 
-Uses Chroma for persistent vector stores.
-Embeddings: sentence-transformers/all-MiniLM-L6-v2 (local, fast)
+Uses Chroma for persistent vector stores (memory optionally behind a
+single-writer service, see core/memory_service.py).
+Embeddings: sentence-transformers/all-MiniLM-L6-v2 (local, fast; torch or ONNX int8, see core/embeddings.py)
 
 Provides:
 - Initialization of static KB (on first run)
-- Retrieval from static KB
+- Retrieval from static KB (exact formula-index hits ahead of vector results, see core/formula_index.py)
 - Add solved problem to memory
 - Retrieve similar solved problems
 - Combined hybrid retrieval (static + memory) with source tracking
@@ -21,17 +22,27 @@ from pathlib import Path
 from typing import List, Dict, Any
 
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 from core.config import Config
+from core.embeddings import load_embedding_backend
+from core.formula_index import FormulaIndex, split_markdown_sections
+from core.model_manager import ManagedEmbeddings, model_manager
 
-# Embedding model (local)
-embedding_model = HuggingFaceEmbeddings(model_name=Config.EMBEDDING_MODEL)
+# Embedding model (local, or shared via the model worker pool)
+if Config.MULTIMODAL_WORKER_MODE == "pool":
+    from core.model_workers import PooledEmbeddings
+    embedding_model = PooledEmbeddings()
+else:
+    # Owned by the lifecycle manager so it can be unloaded when idle;
+    # torch or quantized ONNX backend per Config.EMBEDDING_BACKEND
+    model_manager.register("embedding", load_embedding_backend)
+    embedding_model = ManagedEmbeddings(model_manager, "embedding")
 
-# Persistent directories
-KB_COLLECTION = "knowledge_base"
+# Persistent directories (KB chunks are split on markdown headings; the
+# collection was renamed from "knowledge_base" so existing stores are rebuilt)
+KB_COLLECTION = "knowledge_base_sections"
 MEMORY_COLLECTION = "solved_problems"
 
 # Initialize vector stores
@@ -41,11 +52,20 @@ kb_vectorstore = Chroma(
     persist_directory=str(Config.VECTOR_STORE_PATH)
 )
 
-memory_vectorstore = Chroma(
-    collection_name=MEMORY_COLLECTION,
-    embedding_function=embedding_model,
-    persist_directory=str(Config.SOLVED_PROBLEMS_VECTOR_STORE_PATH)
-)
+def open_memory_vectorstore() -> Chroma:
+    return Chroma(
+        collection_name=MEMORY_COLLECTION,
+        embedding_function=embedding_model,
+        persist_directory=str(Config.SOLVED_PROBLEMS_VECTOR_STORE_PATH)
+    )
+
+# Solved-problems memory: in service mode one writer process owns the index
+# and this process searches a local snapshot (core/memory_service.py)
+if Config.MEMORY_STORE_MODE == "service":
+    from core.memory_service import memory_snapshot, remote_memory_store
+    memory_vectorstore = None
+else:
+    memory_vectorstore = open_memory_vectorstore()
 
 def _load_knowledge_base_documents() -> List[Document]:
     """Load all markdown files from knowledge/ directory recursively."""
@@ -70,12 +90,21 @@ def initialize_static_kb_if_needed():
             print("Warning: No markdown files found in knowledge/")
             return
         
+        # One chunk per markdown section; only sections longer than CHUNK_SIZE are split further
+        sections = [
+            Document(
+                page_content=section["content"],
+                metadata={**doc.metadata, "heading": section["heading"]}
+            )
+            for doc in raw_docs
+            for section in split_markdown_sections(doc.page_content, doc.metadata["source"])
+        ]
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=Config.CHUNK_SIZE,
             chunk_overlap=Config.CHUNK_OVERLAP,
             separators=["\n\n", "\n", " ", ""]
         )
-        splits = text_splitter.split_documents(raw_docs)
+        splits = text_splitter.split_documents(sections)
         
         # Add with unique IDs
         kb_vectorstore.add_documents(splits)
@@ -97,13 +126,13 @@ def retrieve_from_kb(query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[Dict[s
         })
     return retrieved
 
-def add_solved_problem_to_memory(
+def solved_problem_document(
     parsed_problem: Dict,
     solution: Dict,
     feedback: str = None
-):
+) -> Document:
     """
-    Add a solved problem to memory vector store.
+    Build the memory document for a solved problem.
     Document content: combination of problem + solution for better similarity.
     """
     content = f"""
@@ -123,33 +152,95 @@ Feedback: {feedback or 'None'}
         "source": "memory"
     }
     
-    doc = Document(page_content=content, metadata=metadata)
+    return Document(page_content=content, metadata=metadata)
+
+def add_solved_problem_to_memory(
+    parsed_problem: Dict,
+    solution: Dict,
+    feedback: str = None
+):
+    """
+    Add a solved problem to memory vector store.
+    (Bulk corpora go through memory/bulk_import.py instead.)
+    """
+    doc = solved_problem_document(parsed_problem, solution, feedback)
+    if memory_vectorstore is None:
+        remote_memory_store().add(doc.page_content, doc.metadata)
+        memory_snapshot.invalidate()
+        return
     memory_vectorstore.add_documents([doc])
     memory_vectorstore.persist()
 
+def upsert_memory_documents(
+    ids: List[str],
+    embeddings: List[List[float]],
+    documents: List[str],
+    metadatas: List[Dict]
+):
+    """Bulk write of pre-embedded memory documents (used by memory/bulk_import.py)."""
+    if memory_vectorstore is None:
+        remote_memory_store().upsert(ids, embeddings, documents, metadatas)
+        memory_snapshot.invalidate()
+        return
+    memory_vectorstore._collection.upsert(
+        ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+    )
+
 def retrieve_similar_problems(query: str, k: int = Config.TOP_K_MEMORY_RETRIEVAL) -> List[Dict[str, Any]]:
     """Retrieve similar previously solved problems."""
-    if memory_vectorstore._collection.count() == 0:
-        return []
-    
-    results = memory_vectorstore.similarity_search_with_score(query, k=k)
+    if memory_vectorstore is None:
+        if memory_snapshot.count() == 0:
+            return []
+        results = memory_snapshot.search(embedding_model.embed_query(query), k)
+    else:
+        if memory_vectorstore._collection.count() == 0:
+            return []
+        results = [
+            (doc.page_content, doc.metadata, score)
+            for doc, score in memory_vectorstore.similarity_search_with_score(query, k=k)
+        ]
+
     retrieved = []
-    for doc, score in results:
+    for content, metadata, score in results:
         retrieved.append({
-            "content": doc.page_content,
-            "topic": doc.metadata.get("topic", "unknown"),
+            "content": content,
+            "topic": (metadata or {}).get("topic", "unknown"),
             "type": "solved_problem",
             "relevance_score": round(float(score), 4)
         })
     return retrieved
 
+def lookup_formula_index(query: str) -> List[Dict[str, Any]]:
+    """Exact formula/construct matches from the KB (empty when the query names none)."""
+    if formula_index is None:
+        return []
+    return [
+        {
+            "content": hit["content"],
+            "source": hit["source"],
+            "type": "knowledge_base",
+            "match": f"formula_index:{hit['matched']}",
+            "relevance_score": 0.0  # Exact match: closest possible distance
+        }
+        for hit in formula_index.lookup(query)
+    ]
+
 def hybrid_retrieval(query: str) -> List[Dict[str, Any]]:
     """
     Combined retrieval: static KB + similar solved problems.
     Returns sorted by relevance or simply concatenated with type distinction.
     No hallucination: if nothing relevant, returns empty list.
+    Exact formula-index hits (known formula or construct named in the query) come
+    first, followed by the KB vector-search results they do not already cover;
+    with an exact hit only Config.FORMULA_INDEX_VECTOR_K vector results are kept.
     """
-    kb_results = retrieve_from_kb(query, k=Config.TOP_K_RETRIEVAL)
+    exact_results = lookup_formula_index(query)
+    exact_contents = {item["content"] for item in exact_results}
+    k = Config.FORMULA_INDEX_VECTOR_K if exact_results else Config.TOP_K_RETRIEVAL
+    kb_results = exact_results + [
+        item for item in retrieve_from_kb(query, k=k)
+        if item["content"] not in exact_contents
+    ]
     memory_results = retrieve_similar_problems(query, k=Config.TOP_K_MEMORY_RETRIEVAL)
     
     # Simple concatenation, prioritising KB then memory
@@ -161,4 +252,7 @@ def hybrid_retrieval(query: str) -> List[Dict[str, Any]]:
     return all_results
 
 # Initialize static KB on import
-initialize_static_kb_if_needed()
\ No newline at end of file
+initialize_static_kb_if_needed()
+
+# Exact-lookup index over the same markdown (cheap to rebuild on every start)
+formula_index = FormulaIndex.build(Config.KNOWLEDGE_BASE_DIR) if Config.FORMULA_INDEX_ENABLED else None
\ No newline at end of file
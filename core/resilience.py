@@ -0,0 +1,258 @@
+# File: core/resilience.py
+"""
+Resilience layer for agent LLM calls.
+
+None of the agent chains had a request timeout. One slow upstream response
+stalled run_pipeline indefinitely, and each agent's fallback only fired after
+the hang was over. Every agent now invokes its chain through resilient_call():
+
+- Deadline: each agent has an overall time budget (Config.AGENT_RESILIENCE[agent]["timeout"]),
+  retries included, and never longer than what is left of the request's own
+  budget (core/deadline.py). When it expires the caller gets DeadlineExceeded
+  straight away (BudgetExhausted if the request budget ran out); the abandoned
+  request is bounded by the client's own timeout.
+- Retries: transport/provider errors are retried with full-jitter exponential backoff.
+  Output-format errors (bad JSON, missing keys) are not retried; they go to the
+  agent's fallback as before.
+- Hedging: once a call has run longer than the recent p95 for that agent/model,
+  a duplicate request is sent and whichever finishes first wins.
+- Circuit breaker (per model): after Config.CIRCUIT_FAILURE_THRESHOLD consecutive
+  provider failures, calls fail fast with CircuitOpenError for
+  Config.CIRCUIT_OPEN_SECONDS, so the agents serve their existing fallback
+  responses immediately. After that, one probe call decides whether to close the circuit.
+
+Counters and circuit states are exposed through report() (GET /resilience).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.exceptions import OutputParserException
+
+from core.config import Config
+from core.deadline import BudgetExhausted, current_budget
+
+# Errors caused by the model's output, not by the provider: never retried, never trip the breaker
+NON_RETRYABLE_ERRORS = (OutputParserException, ValueError, KeyError, TypeError)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The agent's time budget ran out before a response arrived."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is considered unhealthy; the call was not attempted."""
+
+
+# -----------------------------
+# Latency tracking (for hedging)
+# -----------------------------
+class LatencyTracker:
+    """Rolling window of successful call durations."""
+
+    def __init__(self, window: int = Config.LATENCY_WINDOW):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < Config.HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+class CircuitBreaker:
+    """closed → open after N consecutive failures → half-open probe after a cool-down."""
+
+    def __init__(self, threshold: int = Config.CIRCUIT_FAILURE_THRESHOLD, open_seconds: float = Config.CIRCUIT_OPEN_SECONDS):
+        self.threshold = threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"[resilience] circuit opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give back the half-open probe slot after a call that ended for reasons other than the provider's."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+# -----------------------------
+# Caller
+# -----------------------------
+class ResilientCaller:
+    """Runs agent calls with deadlines, retries, hedging and per-model circuit breakers."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=Config.RESILIENCE_MAX_THREADS, thread_name_prefix="llm-call")
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            return self._breakers.setdefault(model, CircuitBreaker())
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        with self._lock:
+            return self._latency.setdefault(key, LatencyTracker())
+
+    def _count(self, agent: str, event: str):
+        with self._lock:
+            counters = self._counters.setdefault(agent, {})
+            counters[event] = counters.get(event, 0) + 1
+
+    def _attempt(self, agent: str, fn: Callable, args: tuple, kwargs: dict, deadline: float, hedge_after: Optional[float], budget=None):
+        """One logical attempt: primary request, plus a hedge if it outlives hedge_after."""
+        started = time.monotonic()
+        futures = [self._executor.submit(fn, *args, **kwargs)]
+        hedged = False
+        while True:
+            if budget is not None:
+                budget.check(agent)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{agent} call exceeded its deadline")
+            timeout = min(remaining, hedge_after) if (hedge_after is not None and not hedged) else remaining
+            if budget is not None:
+                timeout = min(timeout, Config.DISCONNECT_POLL_SECONDS)  # Notice cancellation promptly
+            done, _ = wait([f for f in futures if not f.done()] or futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            finished = [f for f in futures if f.done()]
+            for future in finished:
+                if future.exception() is None:
+                    return future.result()
+            if finished and len(finished) == len(futures):
+                raise finished[0].exception()
+
+            if not done and hedge_after is not None and not hedged and time.monotonic() - started >= hedge_after:
+                hedged = True
+                self._count(agent, "hedges")
+                futures.append(self._executor.submit(fn, *args, **kwargs))
+
+    def call(self, agent: str, model: str, fn: Callable, *args, **kwargs) -> Any:
+        """Call fn(*args, **kwargs) under the agent's resilience policy; raises on final failure."""
+        policy = Config.AGENT_RESILIENCE[agent]
+        deadline = time.monotonic() + policy["timeout"]
+        budget = current_budget()
+        if budget is not None:
+            deadline = min(deadline, budget.deadline)  # Never outlive the request's own budget
+        breaker = self.breaker(model)
+        tracker = self._tracker(f"{agent}:{model}")
+        self._count(agent, "calls")
+
+        attempt = 0
+        while True:
+            if budget is not None:
+                budget.check(agent)
+            if not breaker.allow():
+                self._count(agent, "short_circuited")
+                raise CircuitOpenError(f"LLM provider unhealthy for {model}; serving fallback")
+
+            hedge_after = None
+            if policy.get("hedge"):
+                p95 = tracker.p95()
+                if p95 is not None:
+                    hedge_after = max(p95, Config.HEDGE_MIN_DELAY_SECONDS)
+
+            start = time.monotonic()
+            try:
+                result = self._attempt(agent, fn, args, kwargs, deadline, hedge_after, budget)
+            except BudgetExhausted:
+                breaker.release_probe()
+                self._count(agent, "budget_exhausted")  # The request's problem, not the provider's
+                raise
+            except NON_RETRYABLE_ERRORS:
+                breaker.record_success()  # The provider answered; the output was bad
+                raise
+            except DeadlineExceeded:
+                if budget is not None and budget.exhausted:
+                    breaker.release_probe()
+                    self._count(agent, "budget_exhausted")
+                    raise BudgetExhausted(budget.exhausted, agent)
+                breaker.record_failure()
+                self._count(agent, "deadline_exceeded")
+                raise
+            except Exception:
+                breaker.record_failure()
+                self._count(agent, "failures")
+                attempt += 1
+                remaining = deadline - time.monotonic()
+                if attempt > policy["retries"] or remaining <= 0 or (budget is not None and budget.exhausted):
+                    raise
+                self._count(agent, "retries")
+                backoff = random.uniform(0, min(Config.RETRY_BACKOFF_MAX_SECONDS, Config.RETRY_BACKOFF_BASE_SECONDS * 2 ** attempt))
+                time.sleep(min(backoff, remaining))
+                continue
+            except BaseException:
+                # Interrupted (e.g. cancelled) without an answer either way
+                breaker.release_probe()
+                raise
+
+            breaker.record_success()
+            tracker.record(time.monotonic() - start)
+            return result
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            latency = {key: tracker.p95() for key, tracker in self._latency.items()}
+            return {
+                "agents": {agent: dict(counters) for agent, counters in self._counters.items()},
+                "p95_seconds": {key: round(p95, 3) if p95 is not None else None for key, p95 in latency.items()},
+                "circuits": {
+                    model: {"state": b.state, "consecutive_failures": b.failures, "times_opened": b.times_opened}
+                    for model, b in self._breakers.items()
+                },
+            }
+
+
+# Process-wide caller shared by all agents
+resilient_caller = ResilientCaller()
+
+
+def resilient_call(agent: str, model: str, fn: Callable, *args, **kwargs) -> Any:
+    return resilient_caller.call(agent, model, fn, *args, **kwargs)
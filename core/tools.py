@@ -2,14 +2,18 @@
 
 """
 Tools for the Math Mentor application.
-Currently provides a safe SymPy-based calculator tool using PythonAstREPLTool.
-This allows symbolic mathematics without risking arbitrary code execution.
+- sympy_calculator: safe SymPy-based calculator using PythonAstREPLTool.
+  This allows symbolic mathematics without risking arbitrary code execution.
+- linear_algebra_calculator: det / inverse / eigenvalues / solve / rank, exact for
+  small matrices and NumPy-backed above Config.LINALG_EXACT_MAX_SIZE (core/numeric_linalg.py).
 """
 
 import sympy as sp
 from langchain_experimental.tools.python.tool import PythonAstREPLTool
 from langchain_core.tools import Tool
 
+from core.numeric_linalg import run_tool as run_linalg_tool
+
 # Safe SymPy calculator tool
 # Uses PythonAstREPLTool which only evaluates expressions (no statements, no imports, no side effects)
 # Locals pre-loaded with 'sp' = sympy
@@ -33,7 +37,27 @@ sympy_calculator = PythonAstREPLTool(
     locals={"sp": sp},
 )
 
+# Linear algebra on explicit matrices; avoids sp.Matrix blow-up on large inputs
+linear_algebra_calculator = Tool(
+    name="linear_algebra_calculator",
+    func=run_linalg_tool,
+    description="""
+    Linear algebra on an explicit matrix. Input is a JSON object:
+    {"operation": "det" | "inverse" | "eigenvalues" | "solve" | "rank",
+     "matrix": [[...], ...],          # rows; numbers, fractions as strings ("1/3") or symbols
+     "b": [...],                      # right-hand side, only for "solve"
+     "method": "auto" | "exact" | "numeric"}   # optional, default "auto"
+
+    "auto" computes exactly for small matrices and numerically (NumPy) for large ones.
+    Numeric results from rational input are given as exact fractions when they match
+    within round-off; otherwise as decimals.
+
+    Example: {"operation": "det", "matrix": [[2, 1], [1, 3]]}
+    Prefer this over sympy_calculator for determinants, inverses and eigenvalues.
+    """,
+)
+
 # List of available tools (can be extended later)
-tools = [sympy_calculator]
+tools = [sympy_calculator, linear_algebra_calculator]
 
 # Optional: additional simple numerical tool if needed (sympy handles .evalf() for numerical)
\ No newline at end of file
@@ -1,12 +1,16 @@
-import requests
 import anvil.server
 
+from client import SolveAPIError, SolveClient
+
 API_URL = "https://your-vercel-url.vercel.app"
 
+# One pooled keep-alive client for every click; explanations are generated off the
+# critical path, so the client fetches them once ready
+solve_client = SolveClient(API_URL, fetch_explanation=True)
+
 @anvil.server.callable
 def solve_text_api(problem):
-    response = requests.post(
-        f"{API_URL}/solve/text",
-        json={"problem": problem}
-    )
-    return response.json()
\ No newline at end of file
+    try:
+        return solve_client.solve(problem)
+    except SolveAPIError as e:
+        return {"status": "error", "message": str(e.detail)}
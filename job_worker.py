@@ -0,0 +1,51 @@
+# File: job_worker.py
+"""
+Worker processes for the durable job queue (core/job_queue.py).
+
+Usage:
+    python job_worker.py [--workers N]
+
+Each process claims queued /jobs submissions and runs them through the same
+extraction + pipeline functions as the synchronous endpoints.
+"""
+
+import argparse
+import multiprocessing as mp
+
+from core.config import Config
+
+
+def handle_job(kind: str, payload: bytes, params: dict) -> dict:
+    # Imported inside the worker process so model/agent initialization happens per worker
+    from app import run_pipeline, solve_image_bytes, solve_worksheet_bytes, solve_audio_bytes
+
+    profile = params.get("profile") or Config.DEFAULT_PIPELINE_PROFILE
+    session_id = params.get("session_id")
+    if kind == "image":
+        return solve_image_bytes(payload, profile, session_id)
+    if kind == "worksheet":
+        return solve_worksheet_bytes(payload, profile, session_id)
+    if kind == "audio":
+        return solve_audio_bytes(payload, profile, session_id)
+    if kind == "text":
+        return run_pipeline(payload.decode("utf-8").strip(), profile, session_id)
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def _worker_process(workers: int):
+    from core.job_queue import run_worker
+    run_worker(handle_job, workers=workers)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run job queue workers")
+    arg_parser.add_argument("--workers", type=int, default=Config.JOB_WORKERS)
+    args = arg_parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    processes = [ctx.Process(target=_worker_process, args=(args.workers,)) for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    print(f"Started {args.workers} job worker(s) on {Config.JOB_QUEUE_PATH}")
+    for process in processes:
+        process.join()
@@ -0,0 +1,242 @@
+# File: memory/bulk_import.py
+"""
+Bulk import of pre-solved problem corpora into the solved_problems memory.
+
+store_solved_problem() embeds one document and persists after every call,
+which is far too slow for tens of thousands of verified problems. This command:
+
+- reads JSONL or CSV rows with problem, topic, steps and answer
+  (optional: variables, constraints; CSV steps are newline- or "||"-separated)
+- embeds documents in batches of Config.BULK_IMPORT_BATCH_SIZE across
+  Config.BULK_IMPORT_WORKERS processes (each loads the embedding model once)
+- upserts each embedded batch into the memory collection in one write (through
+  the memory service when MEMORY_STORE_MODE=service), with ids
+  derived from the content, so re-importing a row never creates a duplicate
+  (rows repeated within a batch are stored once and counted as skipped)
+- logs and skips malformed rows (bad JSON, missing fields) instead of aborting
+- checkpoints the number of rows written under Config.BULK_IMPORT_CHECKPOINT_DIR,
+  so an interrupted import resumes where it stopped
+- prints progress and docs/sec
+
+Usage:
+    python -m memory.bulk_import corpus.jsonl [--workers 4] [--batch-size 256] [--restart]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.config import Config
+
+# -----------------------------
+# Corpus reading
+# -----------------------------
+REQUIRED_FIELDS = ("problem", "topic", "steps", "answer")
+
+
+def _split_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    text = str(value).strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        try:
+            return [str(v) for v in json.loads(text)]
+        except ValueError:
+            pass
+    separator = "||" if "||" in text else "\n"
+    return [part.strip() for part in text.split(separator) if part.strip()]
+
+
+def read_corpus(path: Path, report_errors: bool = True) -> Iterator[Optional[Dict]]:
+    """
+    Yield raw rows from a .jsonl or .csv file. A JSONL line that is not a JSON object
+    yields None (and is logged), so row numbering, and with it the checkpoint, stays stable.
+    """
+    if path.suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = None
+                    if report_errors:
+                        print(f"[bulk_import] {path.name}:{line_number}: skipping malformed JSON ({e})")
+                if row is not None and not isinstance(row, dict):
+                    if report_errors:
+                        print(f"[bulk_import] {path.name}:{line_number}: skipping non-object row")
+                    row = None
+                yield row
+
+
+def row_to_document(row: Optional[Dict], feedback: str) -> Optional[Tuple[str, str, Dict]]:
+    """(id, content, metadata) for a corpus row, or None if it is malformed or a required field is missing."""
+    from core.rag_hybrid import solved_problem_document
+
+    if row is None or any(not str(row.get(field) or "").strip() for field in REQUIRED_FIELDS):
+        return None
+    parsed_problem = {
+        "problem_text": str(row["problem"]).strip(),
+        "topic": str(row["topic"]).strip(),
+        "variables": _split_list(row.get("variables")),
+        "constraints": _split_list(row.get("constraints")),
+    }
+    solution = {"steps": _split_list(row["steps"]), "answer": str(row["answer"]).strip()}
+    doc = solved_problem_document(parsed_problem, solution, feedback)
+    doc_id = "bulk:" + hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+    return doc_id, doc.page_content, doc.metadata
+
+
+def iter_batches(path: Path, batch_size: int, skip_rows: int, feedback: str) -> Iterator[Tuple[int, List[Tuple[str, str, Dict]]]]:
+    """
+    Yield (rows_consumed, documents) batches, skipping the first `skip_rows` rows.
+    Documents are unique by id within a batch: Chroma rejects an upsert that repeats an id.
+    """
+    batch, consumed = {}, 0
+    for index, row in enumerate(read_corpus(path)):
+        if index < skip_rows:
+            continue
+        consumed += 1
+        doc = row_to_document(row, feedback)
+        if doc is not None:
+            batch.setdefault(doc[0], doc)
+        if consumed == batch_size:
+            yield consumed, list(batch.values())
+            batch, consumed = {}, 0
+    if consumed:
+        yield consumed, list(batch.values())
+
+
+# -----------------------------
+# Embedding workers
+# -----------------------------
+_worker_embeddings = None
+
+
+def _init_worker(threads: int):
+    """Load the embedding model once per worker process."""
+    global _worker_embeddings
+    try:
+        import torch
+        torch.set_num_threads(threads)  # Avoid oversubscribing cores across workers
+    except ImportError:
+        pass
+    from core.embeddings import load_embedding_backend
+    _worker_embeddings = load_embedding_backend(batch_queries=False)
+
+
+def _embed_batch(item: Tuple[int, List[Tuple[str, str, Dict]]]):
+    consumed, docs = item
+    vectors = _worker_embeddings.embed_documents([content for _, content, _ in docs]) if docs else []
+    return consumed, docs, vectors
+
+
+# -----------------------------
+# Checkpoints
+# -----------------------------
+def _checkpoint_path(corpus: Path) -> Path:
+    key = hashlib.sha1(str(corpus.resolve()).encode("utf-8")).hexdigest()[:12]
+    return Config.BULK_IMPORT_CHECKPOINT_DIR / f"{corpus.stem}-{key}.json"
+
+
+def _load_checkpoint(corpus: Path) -> Dict:
+    try:
+        with open(_checkpoint_path(corpus), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"rows_done": 0, "written": 0, "skipped": 0}
+
+
+def _save_checkpoint(corpus: Path, checkpoint: Dict):
+    path = _checkpoint_path(corpus)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+# -----------------------------
+# Import
+# -----------------------------
+def bulk_import(
+    corpus: Path,
+    workers: int = Config.BULK_IMPORT_WORKERS,
+    batch_size: int = Config.BULK_IMPORT_BATCH_SIZE,
+    restart: bool = False,
+    feedback: str = "Pre-verified corpus import",
+) -> Dict:
+    """Embed and store every row of `corpus`; returns the final checkpoint with timing."""
+    from core.rag_hybrid import memory_vectorstore, upsert_memory_documents
+
+    corpus = Path(corpus)
+    checkpoint = {"rows_done": 0, "written": 0, "skipped": 0} if restart else _load_checkpoint(corpus)
+    if checkpoint["rows_done"]:
+        print(f"Resuming {corpus.name} after {checkpoint['rows_done']} rows")
+
+    total_rows = sum(1 for _ in read_corpus(corpus, report_errors=False))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    batches = iter_batches(corpus, batch_size, checkpoint["rows_done"], feedback)
+
+    start = time.perf_counter()
+    written_this_run = 0
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(processes=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        # imap keeps results in corpus order, so rows_done is always a contiguous prefix
+        for consumed, docs, vectors in pool.imap(_embed_batch, batches):
+            if docs:
+                upsert_memory_documents(
+                    ids=[doc_id for doc_id, _, _ in docs],
+                    embeddings=vectors,
+                    documents=[content for _, content, _ in docs],
+                    metadatas=[metadata for _, _, metadata in docs],
+                )
+            checkpoint["rows_done"] += consumed
+            checkpoint["written"] += len(docs)
+            checkpoint["skipped"] += consumed - len(docs)
+            _save_checkpoint(corpus, checkpoint)
+
+            written_this_run += len(docs)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{checkpoint['rows_done']}/{total_rows} rows "
+                f"({checkpoint['written']} stored, {checkpoint['skipped']} skipped) — "
+                f"{written_this_run / elapsed:.1f} docs/sec"
+            )
+
+    if memory_vectorstore is not None and hasattr(memory_vectorstore, "persist"):
+        memory_vectorstore.persist()
+
+    elapsed = time.perf_counter() - start
+    checkpoint["elapsed_seconds"] = round(elapsed, 2)
+    checkpoint["docs_per_second"] = round(written_this_run / elapsed, 1) if elapsed else 0.0
+    print(f"Done: {checkpoint['written']} documents in memory from {corpus.name} "
+          f"({checkpoint['docs_per_second']} docs/sec this run)")
+    return checkpoint
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bulk import solved problems into memory")
+    arg_parser.add_argument("corpus", type=Path, help="JSONL or CSV with problem, topic, steps, answer")
+    arg_parser.add_argument("--workers", type=int, default=Config.BULK_IMPORT_WORKERS)
+    arg_parser.add_argument("--batch-size", type=int, default=Config.BULK_IMPORT_BATCH_SIZE)
+    arg_parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    arg_parser.add_argument("--feedback", default="Pre-verified corpus import", help="Feedback line stored with each document")
+    args = arg_parser.parse_args()
+
+    bulk_import(args.corpus, workers=args.workers, batch_size=args.batch_size, restart=args.restart, feedback=args.feedback)
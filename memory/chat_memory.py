@@ -4,20 +4,26 @@
 Simple chat memory layer for the Math Mentor application.
 
 Since most interactions are single-turn (question → solution → feedback), 
-we use a lightweight in-memory approach based on Streamlit session state.
+the Streamlit UI keeps the working copy in session state, while every update
+is also written through to the persistent session store (memory/session_store.py),
+so API clients can use the same helpers by passing an explicit `session_id`.
 
 This file provides:
 - Helper functions to store/retrieve the current conversation state
 - Basic conversation history (for potential future multi-turn clarification)
-- No persistent storage here — persistence happens only via solved_problems vector store
+- Compact persistence in Config.SESSIONS_DIR (retrieved chunks kept as ids, TTL expiry,
+  bounded history) — long-term learning still happens via the solved_problems vector store
 
 For multi-turn support in the future (e.g., "explain step 3 again", "why not this method?"):
 - We can later extend this with LangChain ConversationBufferMemory or similar
 """
 
+import uuid
 from typing import List, Dict, Optional
 import streamlit as st
 
+from memory.session_store import session_store
+
 # Session state keys
 SESSION_KEY_HISTORY = "chat_history"
 SESSION_KEY_CURRENT_INPUT = "current_input"
@@ -29,6 +35,23 @@ SESSION_KEY_SOLUTION = "solution"
 SESSION_KEY_VERIFICATION = "verification"
 SESSION_KEY_EXPLANATION = "explanation"
 SESSION_KEY_AGENT_TRACE = "agent_trace"
+SESSION_KEY_ID = "session_id"
+SESSION_KEY_STAGE_OUTPUTS = "stage_outputs"   # Per-stage outputs for incremental re-execution
+SESSION_KEY_FINGERPRINTS = "stage_fingerprints"  # Input fingerprint per stage (core/incremental.py)
+
+# Mapping between Streamlit session keys and persisted state fields
+_STATE_FIELDS = {
+    "input": SESSION_KEY_CURRENT_INPUT,
+    "extraction": SESSION_KEY_CURRENT_EXTRACTION,
+    "parsed": SESSION_KEY_PARSED_PROBLEM,
+    "routing": SESSION_KEY_ROUTING,
+    "retrieved": SESSION_KEY_RETRIEVED,
+    "solution": SESSION_KEY_SOLUTION,
+    "verification": SESSION_KEY_VERIFICATION,
+    "explanation": SESSION_KEY_EXPLANATION,
+    "stage_outputs": SESSION_KEY_STAGE_OUTPUTS,
+    "fingerprints": SESSION_KEY_FINGERPRINTS,
+}
 
 def initialize_session_state():
     """Initialize all required session state keys if they don't exist."""
@@ -42,41 +65,62 @@ def initialize_session_state():
         SESSION_KEY_SOLUTION: None,
         SESSION_KEY_VERIFICATION: None,
         SESSION_KEY_EXPLANATION: None,
-        SESSION_KEY_AGENT_TRACE: []
+        SESSION_KEY_AGENT_TRACE: [],
+        SESSION_KEY_STAGE_OUTPUTS: {},
+        SESSION_KEY_FINGERPRINTS: {}
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
+    if SESSION_KEY_ID not in st.session_state:
+        st.session_state[SESSION_KEY_ID] = uuid.uuid4().hex
+
+
+def _resolve_session_id(session_id: Optional[str]) -> str:
+    """Explicit id for API callers; otherwise the current Streamlit session's id."""
+    if session_id:
+        return session_id
+    initialize_session_state()
+    return st.session_state[SESSION_KEY_ID]
+
 
-def add_to_history(message: Dict):
+def add_to_history(message: Dict, session_id: Optional[str] = None):
     """
     Add a message to conversation history.
     Message format: {"role": "user"/"assistant", "content": str, "type": "text"/"solution"/"feedback"}
     """
-    initialize_session_state()
-    st.session_state[SESSION_KEY_HISTORY].append(message)
+    if session_id is None:
+        initialize_session_state()
+        st.session_state[SESSION_KEY_HISTORY].append(message)
+    session_store.append_history(_resolve_session_id(session_id), message)
 
 
-def get_conversation_history() -> List[Dict]:
+def get_conversation_history(session_id: Optional[str] = None) -> List[Dict]:
     """Get full conversation history for current session."""
+    if session_id is not None:
+        return session_store.get_history(session_id)
     initialize_session_state()
     return st.session_state[SESSION_KEY_HISTORY]
 
 
-def clear_current_problem_state():
+def clear_current_problem_state(session_id: Optional[str] = None):
     """Reset state for a new problem (keep history)"""
-    initialize_session_state()
-    st.session_state[SESSION_KEY_CURRENT_INPUT] = None
-    st.session_state[SESSION_KEY_CURRENT_EXTRACTION] = None
-    st.session_state[SESSION_KEY_PARSED_PROBLEM] = None
-    st.session_state[SESSION_KEY_ROUTING] = None
-    st.session_state[SESSION_KEY_RETRIEVED] = []
-    st.session_state[SESSION_KEY_SOLUTION] = None
-    st.session_state[SESSION_KEY_VERIFICATION] = None
-    st.session_state[SESSION_KEY_EXPLANATION] = None
-    st.session_state[SESSION_KEY_AGENT_TRACE] = []
+    if session_id is None:
+        initialize_session_state()
+        st.session_state[SESSION_KEY_CURRENT_INPUT] = None
+        st.session_state[SESSION_KEY_CURRENT_EXTRACTION] = None
+        st.session_state[SESSION_KEY_PARSED_PROBLEM] = None
+        st.session_state[SESSION_KEY_ROUTING] = None
+        st.session_state[SESSION_KEY_RETRIEVED] = []
+        st.session_state[SESSION_KEY_SOLUTION] = None
+        st.session_state[SESSION_KEY_VERIFICATION] = None
+        st.session_state[SESSION_KEY_EXPLANATION] = None
+        st.session_state[SESSION_KEY_AGENT_TRACE] = []
+        st.session_state[SESSION_KEY_STAGE_OUTPUTS] = {}
+        st.session_state[SESSION_KEY_FINGERPRINTS] = {}
+    session_store.update_state(_resolve_session_id(session_id), {}, reset=True)
 
 
 def store_current_problem_state(
@@ -88,33 +132,47 @@ def store_current_problem_state(
     solution: Dict = None,
     verification: Dict = None,
     explanation: str = None,
-    trace_entry: str = None
+    trace_entry: str = None,
+    stage_outputs: Dict = None,
+    fingerprints: Dict = None,
+    session_id: Optional[str] = None
 ):
-    """Update current problem state in session."""
-    initialize_session_state()
-    
-    if input_data is not None:
-        st.session_state[SESSION_KEY_CURRENT_INPUT] = input_data
-    if extraction is not None:
-        st.session_state[SESSION_KEY_CURRENT_EXTRACTION] = extraction
-    if parsed is not None:
-        st.session_state[SESSION_KEY_PARSED_PROBLEM] = parsed
-    if routing is not None:
-        st.session_state[SESSION_KEY_ROUTING] = routing
-    if retrieved is not None:
-        st.session_state[SESSION_KEY_RETRIEVED] = retrieved
-    if solution is not None:
-        st.session_state[SESSION_KEY_SOLUTION] = solution
-    if verification is not None:
-        st.session_state[SESSION_KEY_VERIFICATION] = verification
-    if explanation is not None:
-        st.session_state[SESSION_KEY_EXPLANATION] = explanation
-    if trace_entry:
-        st.session_state[SESSION_KEY_AGENT_TRACE].append(trace_entry)
-
-
-def get_current_problem_state() -> Dict:
+    """Update current problem state in session (and persist it)."""
+    updates = {
+        "input": input_data,
+        "extraction": extraction,
+        "parsed": parsed,
+        "routing": routing,
+        "retrieved": retrieved,
+        "solution": solution,
+        "verification": verification,
+        "explanation": explanation,
+        "stage_outputs": stage_outputs,
+        "fingerprints": fingerprints,
+    }
+    updates = {field: value for field, value in updates.items() if value is not None}
+
+    if session_id is None:
+        initialize_session_state()
+        for field, value in updates.items():
+            st.session_state[_STATE_FIELDS[field]] = value
+        if trace_entry:
+            st.session_state[SESSION_KEY_AGENT_TRACE].append(trace_entry)
+
+    session_store.update_state(_resolve_session_id(session_id), updates, trace_entry=trace_entry)
+
+
+def get_current_problem_state(session_id: Optional[str] = None) -> Dict:
     """Get all current problem-related data as a dict."""
+    if session_id is not None:
+        state = session_store.load_state(session_id)
+        current = {field: state.get(field) for field in _STATE_FIELDS}
+        current["retrieved"] = current["retrieved"] or []
+        current["stage_outputs"] = current["stage_outputs"] or {}
+        current["fingerprints"] = current["fingerprints"] or {}
+        current["trace"] = state.get("trace") or []
+        return current
+
     initialize_session_state()
     return {
         "input": st.session_state[SESSION_KEY_CURRENT_INPUT],
@@ -125,11 +183,15 @@ def get_current_problem_state() -> Dict:
         "solution": st.session_state[SESSION_KEY_SOLUTION],
         "verification": st.session_state[SESSION_KEY_VERIFICATION],
         "explanation": st.session_state[SESSION_KEY_EXPLANATION],
+        "stage_outputs": st.session_state[SESSION_KEY_STAGE_OUTPUTS],
+        "fingerprints": st.session_state[SESSION_KEY_FINGERPRINTS],
         "trace": st.session_state[SESSION_KEY_AGENT_TRACE]
     }
 
 
-def add_agent_trace(step: str):
+def add_agent_trace(step: str, session_id: Optional[str] = None):
     """Add a line to the agent execution trace (for UI display)."""
-    initialize_session_state()
-    st.session_state[SESSION_KEY_AGENT_TRACE].append(step)
\ No newline at end of file
+    if session_id is None:
+        initialize_session_state()
+        st.session_state[SESSION_KEY_AGENT_TRACE].append(step)
+    session_store.update_state(_resolve_session_id(session_id), {}, trace_entry=step)
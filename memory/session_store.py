@@ -0,0 +1,237 @@
+# File: memory/session_store.py
+"""
+Persistent, compact per-session store for problem state and chat history.
+
+Streamlit's session_state only exists inside the UI process, so API clients
+had no memory of earlier stage outputs. This store keeps the same data in a
+SQLite database under Config.SESSIONS_DIR:
+
+- sessions: current problem state per session (extraction, parsed, routing,
+  retrieved, solution, verification, explanation, trace)
+- history:  conversation messages, bounded to Config.SESSION_HISTORY_LIMIT per session
+- chunks:   retrieved KB / memory text, stored once and referenced by id, so
+            session rows hold ["kb:1a2b…", …] instead of repeated 1000-char chunks
+
+parsed / routing / solution / verification / explanation are usually identical
+to a stage output in "stage_outputs", so they are only stored at the top level
+when they differ (e.g. a reviewer-edited answer); load_state() fills them back in.
+Writes run in BEGIN IMMEDIATE transactions, so concurrent requests on one
+session neither lose state updates nor collide on history sequence numbers.
+
+Sessions untouched for Config.SESSION_TTL_SECONDS are deleted.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    state       TEXT NOT NULL,
+    updated     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    session_id  TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    message     TEXT NOT NULL,
+    created     REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id    TEXT PRIMARY KEY,
+    item        TEXT NOT NULL,
+    last_used   REAL NOT NULL
+);
+"""
+
+# Trace lines kept per session (the UI only shows the latest run)
+MAX_TRACE_ENTRIES = 50
+
+# Top-level state fields that duplicate a stage output: (stage, key within its output or None)
+_STAGE_DERIVED = {
+    "parsed": (("parse", None), ("parse_route", "parsed")),
+    "routing": (("route", None), ("parse_route", "routing")),
+    "solution": (("solve", "solution"),),
+    "verification": (("verify", None), ("solve", "verification")),
+    "explanation": (("explain", "explanation"),),
+}
+
+
+def _derived_value(stage_outputs: Optional[Dict], field: str):
+    for stage, key in _STAGE_DERIVED[field]:
+        output = (stage_outputs or {}).get(stage)
+        if output is not None:
+            return output if key is None else output.get(key)
+    return None
+
+
+def _same(a, b) -> bool:
+    return json.dumps(a, sort_keys=True, default=str) == json.dumps(b, sort_keys=True, default=str)
+
+
+def _expand_derived(state: Dict) -> Dict:
+    for field in _STAGE_DERIVED:
+        if field not in state:
+            state[field] = _derived_value(state.get("stage_outputs"), field)
+    return state
+
+
+def _compact_derived(state: Dict) -> Dict:
+    for field in _STAGE_DERIVED:
+        if field in state and _same(state[field], _derived_value(state.get("stage_outputs"), field)):
+            del state[field]
+    return state
+
+
+def chunk_id(item: Dict) -> str:
+    """Stable id for a retrieved item, derived from its type and content."""
+    prefix = "mem" if item.get("type") == "solved_problem" else "kb"
+    digest = hashlib.sha1(item.get("content", "").encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}:{digest}"
+
+
+class SessionStore:
+    """SQLite-backed session state; safe to share across processes."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or Config.SESSIONS_DIR / "sessions.sqlite3")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._last_purge = 0.0
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self):
+        """Connection holding the write lock from the first read (read-modify-write safe)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    # -----------------------------
+    # Compaction
+    # -----------------------------
+    def _compact_retrieved(self, conn, retrieved: List[Dict]) -> List[Dict]:
+        now = time.time()
+        refs = []
+        for item in retrieved:
+            cid = chunk_id(item)
+            conn.execute(
+                "INSERT INTO chunks (chunk_id, item, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(chunk_id) DO UPDATE SET last_used = excluded.last_used",
+                (cid, json.dumps({k: v for k, v in item.items() if k != "relevance_score"}), now),
+            )
+            refs.append({"id": cid, "relevance_score": item.get("relevance_score")})
+        return refs
+
+    def _expand_retrieved(self, conn, refs: List[Dict]) -> List[Dict]:
+        expanded = []
+        for ref in refs:
+            row = conn.execute("SELECT item FROM chunks WHERE chunk_id = ?", (ref["id"],)).fetchone()
+            if row is None:
+                continue  # chunk expired; caller will re-retrieve if needed
+            item = json.loads(row[0])
+            item["relevance_score"] = ref.get("relevance_score")
+            item["chunk_id"] = ref["id"]
+            expanded.append(item)
+        return expanded
+
+    # -----------------------------
+    # Problem state
+    # -----------------------------
+    def load_state(self, session_id: str) -> Dict:
+        self._maybe_purge()
+        with self._connect() as conn:
+            row = conn.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return {}
+            state = _expand_derived(json.loads(row[0]))
+            if state.get("retrieved"):
+                state["retrieved"] = self._expand_retrieved(conn, state["retrieved"])
+        return state
+
+    def update_state(self, session_id: str, updates: Dict, trace_entry: Optional[str] = None, reset: bool = False):
+        """Merge `updates` into the stored state (or replace it when reset=True)."""
+        with self._write() as conn:
+            row = conn.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            state = {} if (row is None or reset) else _expand_derived(json.loads(row[0]))
+
+            for key, value in updates.items():
+                if key == "retrieved" and value is not None:
+                    value = self._compact_retrieved(conn, value)
+                state[key] = value
+            if trace_entry:
+                state["trace"] = (state.get("trace") or [])[-(MAX_TRACE_ENTRIES - 1):] + [trace_entry]
+
+            conn.execute(
+                "INSERT INTO sessions (session_id, state, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated = excluded.updated",
+                (session_id, json.dumps(_compact_derived(state), default=str), time.time()),
+            )
+
+    # -----------------------------
+    # History
+    # -----------------------------
+    def append_history(self, session_id: str, message: Dict):
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT MAX(seq) FROM history WHERE session_id = ?", (session_id,)).fetchone()
+            seq = (row[0] or 0) + 1
+            conn.execute(
+                "INSERT INTO history (session_id, seq, message, created) VALUES (?, ?, ?, ?)",
+                (session_id, seq, json.dumps(message, default=str), now),
+            )
+            conn.execute(
+                "DELETE FROM history WHERE session_id = ? AND seq <= ?",
+                (session_id, seq - Config.SESSION_HISTORY_LIMIT),
+            )
+            conn.execute(
+                "INSERT INTO sessions (session_id, state, updated) VALUES (?, '{}', ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated = excluded.updated",
+                (session_id, now),
+            )
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT message FROM history WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # -----------------------------
+    # Expiry
+    # -----------------------------
+    def purge_expired(self):
+        cutoff = time.time() - Config.SESSION_TTL_SECONDS
+        with self._connect() as conn:
+            expired = [r[0] for r in conn.execute("SELECT session_id FROM sessions WHERE updated < ?", (cutoff,))]
+            for session_id in expired:
+                conn.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+            conn.execute("DELETE FROM chunks WHERE last_used < ?", (cutoff,))
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge > 300:
+            self._last_purge = now
+            self.purge_expired()
+
+
+# Shared store used by memory/chat_memory.py
+session_store = SessionStore()